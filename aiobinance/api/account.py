@@ -41,15 +41,16 @@ class Account(AccountBase):
 
     @property
     def assets(self) -> Dict[str, Asset]:
+        # Note : computed once here, not for each asset
+        balances = self.balances
+        interesting = self.interesting_markets
         return (
             {
                 asst: Asset(
-                    amount=self.balances.get(asst, AssetAmount(asset=asst)),
+                    amount=balances.get(asst, AssetAmount(asset=asst)),
                     info=ainf,
-                    base_markets=[  # retrieving tradeview for related markets
-                        m for m in self._markets_with_base(asst)
-                    ],
-                    quote_markets=[m for m in self._markets_with_quote(asst)],
+                    base_markets=self._markets_with_base(asst, interesting),
+                    quote_markets=self._markets_with_quote(asst, interesting),
                 )
                 for asst, ainf in self.assets_info.items()
             }
@@ -63,7 +64,7 @@ class Account(AccountBase):
         if self.api.creds is None:
             return Err(RuntimeError("Credentials not specified !"))
 
-        res = self.api.call_api(command="account")
+        res = await self.api.call_api(command="account")
 
         if res.is_ok():
             res = res.value
@@ -92,7 +93,7 @@ class Account(AccountBase):
 
     async def assetsinfo(self) -> Result[Dict[str, AssetInfo], RuntimeError]:
 
-        res = self.api.call_api(command="coins")
+        res = await self.api.call_api(command="coins")
 
         if res.is_ok():
             res = res.value
@@ -56,7 +56,7 @@ class Asset(AssetBase):
 
     async def assetinfo(self, **kwargs) -> Result[Dict[str, AssetInfo], RuntimeError]:
 
-        res = self.api.call_api(command="coins")
+        res = await self.api.call_api(command="coins")
 
         if res.is_ok():
             res = res.value
@@ -116,7 +116,7 @@ class Asset(AssetBase):
         return Ok(assets)
 
     async def amountrequest(self, **kwargs) -> Result[AssetAmount, RuntimeError]:
-        res = self.api.call_api(command="account")
+        res = await self.api.call_api(command="account")
 
         if res.is_ok():
             res = res.ok()
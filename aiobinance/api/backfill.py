@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.timeinterval import TimeStep
+from aiobinance.api.rawapi import Binance
+
+
+class OHLCBackfill:
+    """Retrieves klines for a (possibly long) time interval.
+    The interval is split in pages of at most `limit` candles, fetched concurrently (the api rate limiter
+    is the one pacing the actual calls), and merged in a single frame when all pages have arrived.
+
+    Pages already retrieved are kept, so that awaiting the same backfill again, after a failure,
+    only requests the missing pages. Another backfill, of an overlapping interval, can resume from them.
+    """
+
+    api: Binance
+    symbol: str
+    step: TimeStep
+
+    pages: List[Tuple[int, int]]  # [ms] bounds, both inclusive, as for binance API
+    results: Dict[int, List[List]]  # raw klines rows, indexed by page start
+
+    progress: Optional[Callable[[int, int], Any]]  # called with (done, total) pages
+
+    # when set, candles are stored as scaled int64 in the frame
+    precision: Optional[FixedPoint]
+
+    def __init__(
+        self,
+        api: Binance,
+        symbol: str,
+        step: TimeStep,
+        start_time: datetime,
+        stop_time: datetime,
+        limit: int = 1000,
+        concurrency: int = 8,
+        progress: Optional[Callable[[int, int], Any]] = None,
+        validate: bool = False,
+        precision: Optional[FixedPoint] = None,
+    ):
+        # to make sure the timezone is set at this stage (otherwise timestamps will be ambiguous)
+        assert start_time.tzinfo is not None and stop_time.tzinfo is not None
+
+        self.api = api
+        self.symbol = symbol
+        self.step = step
+        self.limit = limit
+        self.concurrency = concurrency
+        self.progress = progress
+        self.validate = validate
+        self.precision = precision
+
+        start_ms = int(start_time.timestamp() * 1000)
+        stop_ms = int(stop_time.timestamp() * 1000)
+        page_ms = (step.delta.value // timedelta(milliseconds=1)) * limit
+
+        # one page cannot contain more than limit candle open times
+        self.pages = [
+            (page_start, min(page_start + page_ms - 1, stop_ms))
+            for page_start in range(start_ms, stop_ms + 1, page_ms)
+        ]
+        self.results = {}
+
+    @property
+    def total(self) -> int:
+        return len(self.pages)
+
+    @property
+    def done(self) -> int:
+        return len(self.results)
+
+    @property
+    def complete(self) -> bool:
+        return self.done == self.total
+
+    @property
+    def pending(self) -> List[Tuple[int, int]]:
+        return [p for p in self.pages if p[0] not in self.results]
+
+    def resume(self, other: OHLCBackfill):
+        """Takes the rows retrieved by other, a backfill of the same symbol and step, for the pending pages
+        they cover entirely. Only the pages not retrieved already are then requested."""
+        if other.symbol != self.symbol or other.step != self.step:
+            return
+        # the time ranges retrieved by other, with contiguous pages merged
+        covered: List[Tuple[int, int]] = []
+        for start, stop in sorted(p for p in other.pages if p[0] in other.results):
+            if covered and covered[-1][1] + 1 == start:
+                covered[-1] = (covered[-1][0], stop)
+            else:
+                covered.append((start, stop))
+        rows = sorted(
+            (row for p in other.pages for row in other.results.get(p[0], [])),
+            key=lambda row: row[0],
+        )
+        times = [row[0] for row in rows]  # open times [ms]
+
+        for start, stop in self.pending:
+            if any(c[0] <= start and stop <= c[1] for c in covered):
+                self.results[start] = rows[
+                    bisect.bisect_left(times, start) : bisect.bisect_right(times, stop)
+                ]
+
+    async def _fetch(self, page: Tuple[int, int], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            res = await self.api.call_api(
+                command="klines",
+                symbol=self.symbol,
+                interval=self.step.to_api(),
+                startTime=page[0],
+                endTime=page[1],
+                limit=self.limit,
+            )
+
+        if res.is_err():
+            raise RuntimeError(res.err())
+
+        self.results[page[0]] = res.ok()
+
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+    async def __call__(self) -> OHLCFrame:
+        """ fetches the pending pages, and returns the frame for the whole interval """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        # waiting for all pages to settle, to keep as much progress as possible in case of failure
+        errors = [
+            r
+            for r in await asyncio.gather(
+                *(self._fetch(p, semaphore) for p in self.pending),
+                return_exceptions=True,
+            )
+            if isinstance(r, BaseException)
+        ]
+        if errors:
+            raise errors[0]
+
+        # only one frame built (and sorted) for all the pages
+        return OHLCFrame.from_klines(
+            [row for p in self.pages for row in self.results[p[0]]],
+            validate=self.validate,
+            precision=self.precision,
+        )
+
+    def __repr__(self):
+        return (
+            f"OHLCBackfill({self.symbol} {self.step}: {self.done}/{self.total} pages)"
+        )
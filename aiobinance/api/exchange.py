@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import functools
+import json
+import logging
+import os
 import re
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import hypothesis.strategies as st
 from hypothesis.strategies import SearchStrategy
@@ -15,12 +18,24 @@ from aiobinance.api.market import Market
 from aiobinance.api.model.exchange_info import ExchangeInfo, RateLimit
 from aiobinance.api.model.filters import Filter
 from aiobinance.api.model.market_info import MarketInfo
+from aiobinance.api.model.timeinterval import from_ms, to_ms
 from aiobinance.api.pure.exchangebase import ExchangeBase
 from aiobinance.api.rawapi import Binance
 
 # converting camel case (API) to snake case (aiobinance)
 camel_snake = re.compile(r"(?<!^)(?=[A-Z])")
 
+logger = logging.getLogger("aiobinance.api.exchange")
+
+
+@dataclass
+class CacheStats:
+    """ how exchange updates were served """
+
+    hits: int = 0  # from cached data
+    misses: int = 0  # waiting for an exchangeInfo request
+    refreshes: int = 0  # exchangeInfo requests done
+
 
 @dataclass(frozen=False)
 class Exchange(ExchangeBase):
@@ -29,29 +44,118 @@ class Exchange(ExchangeBase):
     api: Binance = field(init=True, default=Binance())
     test: bool = field(init=True, default=True)
 
+    # exchange info is served from cache for that long, and refreshed in the background after.
+    ttl: timedelta = field(init=True, default=timedelta(minutes=10))
+    # when set, the last exchangeInfo received is kept on disk, in that directory.
+    cache_dir: Optional[str] = field(init=True, default=None)
+    # when set, the markets store candles and trades as int64, scaled by their precision.
+    fixed_point: bool = field(init=True, default=False)
+
+    # when the current info was received from binance
+    fetched: Optional[datetime] = field(init=False, default=None)
+    stats: CacheStats = field(init=False, default_factory=CacheStats, compare=False)
+
+    # the update in progress, shared by concurrent callers
+    refreshing: Optional[asyncio.Task] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+
     @classmethod
     def strategy(cls, **kwargs) -> SearchStrategy:
         raise RuntimeError(
             "Strategy should not be used with real implementation. Build an instance from actual data instead."
         )
 
-    @property  # not cached ! we have only one instance. And api can change, giving private access to markets.
-    def markets(self) -> Dict[str, Market]:
-        return (
-            {
-                s.symbol: Market(api=self.api, info=s, test=self.test)
-                for s in self.info.symbols
-            }
-            if self.info is not None
-            else {}
+    def _market(self, info: MarketInfo) -> Market:
+        return Market(
+            api=self.api,
+            info=info,
+            test=self.test,
+            cache_dir=self.cache_dir,
+            fixed_point=self.fixed_point,
         )
 
+    def _index_key(self) -> Tuple:
+        # Note : api can change, giving private access to markets.
+        return super(Exchange, self)._index_key() + (self.api, self.test)
+
+    async def __call__(
+        self, *, info: Optional[ExchangeInfo] = None, refresh: bool = False, **kwargs
+    ) -> Exchange:
+        """Updates exchange data, from the cache when it is recent enough.
+        Outdated data is still served, while it is refreshed in the background.
+        Concurrent updates, like one per web request, share the same exchangeInfo request.
+
+        :param refresh: to wait for new data from binance, even if the cache is recent.
+        """
+        if info is not None:  # injected data : nothing to request
+            self.fetched = datetime.now(tz=timezone.utc)
+            return await super(Exchange, self).__call__(info=info, **kwargs)
+
+        if self.info is None and not refresh:
+            self.restore()
+
+        if self.info is None or refresh:
+            self.stats.misses += 1
+            # Note : one caller being cancelled must not cancel the update for the others
+            await asyncio.shield(self._refresh(**kwargs))
+        else:
+            self.stats.hits += 1
+            if (
+                self.fetched is None
+                or datetime.now(tz=timezone.utc) - self.fetched > self.ttl
+            ):
+                self._refresh(**kwargs)
+        return self
+
+    def _refresh(self, **kwargs) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        if (
+            self.refreshing is None
+            or self.refreshing.done()
+            or self.refreshing.get_loop() is not loop
+        ):
+            self.refreshing = loop.create_task(super(Exchange, self).__call__(**kwargs))
+            self.refreshing.add_done_callback(self._refreshed)
+        return self.refreshing
+
+    @staticmethod
+    def _refreshed(task: asyncio.Task):
+        # Note : nobody might be waiting for a background refresh
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Exchange refresh failed: {task.exception()}")
+
+    def _cache_file(self) -> str:
+        return os.path.join(self.cache_dir, "exchangeInfo.json")
+
+    def restore(self) -> bool:
+        """ loads the exchangeInfo stored on disk, if any """
+        if self.cache_dir is None or not os.path.exists(self._cache_file()):
+            return False
+        with open(self._cache_file(), mode="r", encoding="utf-8") as f:
+            cached = json.load(f)
+        info = self.parse(cached["exchangeInfo"])
+        if info.is_err():
+            return False
+        self.info = info.ok()
+        self.fetched = from_ms(cached["fetched"])
+        return True
+
+    def persist(self, payload: Dict, fetched: datetime):
+        """ keeps the exchangeInfo payload on disk, as received """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        filepath = self._cache_file()
+        # writing in a temporary file first, to never leave a partial file behind
+        with open(filepath + ".tmp", mode="w", encoding="utf-8") as f:
+            json.dump({"fetched": to_ms(fetched), "exchangeInfo": payload}, f)
+        os.replace(filepath + ".tmp", filepath)
+
     # TODO : system status : https://binance-docs.github.io/apidocs/spot/en/#system-status-system
 
     async def exchangeinfo(self) -> Result[ExchangeInfo, RuntimeError]:
 
-        # TODO : implement rate limiting somehow...
-        res = self.api.call_api(command="exchangeInfo")
+        res = await self.api.call_api(command="exchangeInfo")
+        self.stats.refreshes += 1
 
         if res.is_ok():
             res = res.value
@@ -59,6 +163,15 @@ class Exchange(ExchangeBase):
             # TODO : handle API error properly
             return Err(RuntimeError(res.value))
 
+        info = self.parse(res)
+        if info.is_ok():
+            self.fetched = datetime.now(tz=timezone.utc)
+            if self.cache_dir is not None:
+                self.persist(res, self.fetched)
+        return info
+
+    def parse(self, res: Dict) -> Result[ExchangeInfo, RuntimeError]:
+        """ builds the ExchangeInfo from the binance exchangeInfo payload """
         # timezone mess
         if res["timezone"] == "UTC":
             tz = timezone.utc
@@ -114,6 +227,9 @@ class Exchange(ExchangeBase):
             ],
         )
 
+        # the api rate limiter needs to follow the exchange limits
+        self.api.set_rate_limits(info.rate_limits)
+
         return Ok(info)
 
 
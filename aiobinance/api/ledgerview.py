@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import asyncio
-from asyncio import Queue, Task
+from asyncio import Task
 from dataclasses import field
 from datetime import datetime, timedelta, timezone
 from typing import Callable, Dict, List, Optional
@@ -10,10 +10,12 @@ import hypothesis.strategies as st
 
 from aiobinance.api.model.account_info import AssetAmount
 from aiobinance.api.model.asset_info import AssetInfo
+from aiobinance.api.model.timeinterval import TimeStep
 from aiobinance.api.model.trade import Trade
 from aiobinance.api.model.tradeframe import TradeFrame
 from aiobinance.api.pure.ledgerviewbase import LedgerViewBase
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.scheduler import Expectations
 
 # TODO: this should probably done in types instead (metaclass, etc.)
 from aiobinance.api.tradesview import TradesView
@@ -33,9 +35,8 @@ class LedgerView(LedgerViewBase):
 
     api: Binance = field(init=True)
 
-    # TODO : aiostream instead of queue here ?
-    #  we need to think about combining expectatinos in a way that make sense (Time Interval arithmetic)
-    expectations: Optional[Queue]  # containing TimeInterval as the requested dataset
+    # the TimeIntervals requested, merged and dispatched by the shared scheduler
+    expectations: Expectations
 
     # HOOK UP to TRADES updates for now...
     # update_hooks: List[Callable[[TradeFrame], bool]]
@@ -80,7 +81,9 @@ class LedgerView(LedgerViewBase):
     ):
         self.api = api
 
-        self.expectations = None  # maybe no async event loop just yet
+        self.expectations = Expectations(
+            key=(LedgerView, coin.coin), fetch=self._expected
+        )
         self.update_hooks = []  # because multiple things can wait for one update
         self.update_loop = None
 
@@ -95,45 +98,28 @@ class LedgerView(LedgerViewBase):
     ):
         raise NotImplementedError  # binance doesnt have a ledger API, but some exchange do (kraken f.i.)
 
-    async def loop(self, mini_sleep: timedelta = timedelta(seconds=3)):
-
-        if self.expectations is None:
-            self.expectations = Queue()
+    async def _expected(
+        self,
+        start_time: Optional[datetime],
+        stop_time: Optional[datetime],
+        step: Optional[TimeStep] = None,
+    ):
+        # Note that timeStep is not involved in trade requests
+        for s in {**self.base_trades, **self.quote_trades}.keys():
+            await self.at(symbol=s, start_time=start_time, stop_time=stop_time)
 
-        for s, t in {**self.base_trades, **self.quote_trades}.items():
+    async def loop(self, mini_sleep: timedelta = timedelta(seconds=3)):
+        """Processes the current expectations, while leaving the shared scheduler running,
+        to process later ones, and to retrieve recent trades of all markets on each tick."""
+        for t in {**self.base_trades, **self.quote_trades}.values():
             # TODO: we should probably limit the number of markets to look at ??
-
-            # start loop if needed, so that it can react to expectations in queue...
-            if t.update_loop is None:
-                await t.loop()
-
-        # TODO : avoid multiple calls here !!
-        if not self.expectations.empty():  # to avoid blocking when not useful
-            tint = await self.expectations.get()
-            for s in {**self.base_trades, **self.quote_trades}.keys():
-                await self.at(  # Note that timeStep is not involved in trade requests
-                    symbol=s, start_time=tint.start, stop_time=tint.stop
-                )
-
-            self.expectations.task_done()
-
-        if self.update_loop is not None:  # not the first time
-            await asyncio.sleep(
-                mini_sleep.total_seconds()
-            )  # minisleep to avoid looping too fast.
-
-        # this trampoline and behaves as a minimal inner service...
-        self.update_loop = asyncio.get_running_loop().create_task(
-            self.loop(mini_sleep=mini_sleep)
-        )
-
-        # we return after first process, while leaving a task running when possible...
-        # TODO:investigate if trio might be better here for structured async concurrency...
+            t.expectations.poll()
+        await self.expectations.scheduler.run(mini_sleep=mini_sleep)
+        self.update_loop = self.expectations.scheduler.task
 
     async def run(self, mini_sleep: timedelta = timedelta(seconds=3)):
-        if self.update_loop is None:
-            await self.loop(mini_sleep=mini_sleep)
-        # else we silently skip it because we ever want only ONE loop !
+        # Note : the scheduler runs only ONE loop for all views.
+        await self.loop(mini_sleep=mini_sleep)
 
     async def at(
         self,
@@ -6,6 +6,7 @@ from typing import List, Optional
 
 from result import Err, Ok, Result
 
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.market_info import MarketInfo
 from aiobinance.api.model.order import LimitOrder, MarketOrder, OrderFill, OrderSide
 from aiobinance.api.model.pricecandle import PriceCandle
@@ -14,6 +15,7 @@ from aiobinance.api.ohlcview import OHLCView
 from aiobinance.api.pure.marketbase import MarketBase
 from aiobinance.api.pure.ticker import Ticker
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.store import CandleStore, TradeStore, pyarrow
 from aiobinance.api.tradesview import TradesView
 
 
@@ -27,20 +29,45 @@ class Market(MarketBase):
 
     api: Binance = field(init=True, default=Binance())
     test: bool = field(init=True, default=True)
+    # when set, market data is kept on disk, in that directory, if pyarrow is installed.
+    cache_dir: Optional[str] = field(init=True, default=None)
+    # when set, candles and trades are stored as int64, scaled by the market precision.
+    # Note : values must fit, volumes over 9.2e18 / 10 ** base_asset_precision cannot be stored.
+    fixed_point: bool = field(init=True, default=False)
 
     @functools.cached_property
     def price(self) -> OHLCView:
         if self.info is None:
             return OHLCView(api=self.api)
         else:
-            return OHLCView(api=self.api, symbol=self.info.symbol)
+            ohlcv = OHLCView(
+                api=self.api,
+                symbol=self.info.symbol,
+                precision=FixedPoint.for_candles(self.info)
+                if self.fixed_point
+                else None,
+            )
+            if self.cache_dir is not None and pyarrow is not None:
+                # only the candles not stored yet will be requested
+                ohlcv.store = CandleStore(path=self.cache_dir)
+            return ohlcv
 
     @functools.cached_property
     def trades(self) -> TradesView:
         if self.info is None:
             return TradesView(api=self.api)  # TODO: should we just raise instead ??
         else:
-            return TradesView(api=self.api, symbol=self.info.symbol)
+            trades = TradesView(
+                api=self.api,
+                symbol=self.info.symbol,
+                precision=FixedPoint.for_trades(self.info)
+                if self.fixed_point
+                else None,
+            )
+            if self.cache_dir is not None and pyarrow is not None:
+                # only the trades after the last one stored will be requested
+                trades.store = TradeStore(path=self.cache_dir)
+            return trades
 
     async def marketinfo(self, **kwargs) -> Result[MarketInfo, NotImplementedError]:
         """ This is a coroutine to be implemented in childrens, with implementation details..."""
@@ -49,7 +76,7 @@ class Market(MarketBase):
     def ticker24(  # TODO : async
         self,
     ) -> Ticker:  # TODO : build a pure mock version we can use for simulations...
-        res = self.api.call_api(
+        res = self.api.call_api_sync(
             command="ticker24hr",
             symbol=self.info.symbol,
         )
@@ -107,9 +134,9 @@ class Market(MarketBase):
         )
 
         if self.test:
-            res = self.api.call_api(command="testOrder", **sent_params)
+            res = self.api.call_api_sync(command="testOrder", **sent_params)
         else:
-            res = self.api.call_api(command="createOrder", **sent_params)
+            res = self.api.call_api_sync(command="createOrder", **sent_params)
 
         if res.is_ok():
             res = res.value
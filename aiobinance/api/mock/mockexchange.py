@@ -14,6 +14,7 @@ from result import Err, Ok, Result
 
 from aiobinance.api.mock.mockmarket import MockMarket
 from aiobinance.api.model.exchange_info import ExchangeInfo
+from aiobinance.api.model.market_info import MarketInfo
 from aiobinance.api.pure.exchangebase import ExchangeBase
 
 
@@ -34,13 +35,8 @@ class MockExchange(ExchangeBase):
     ) -> st.SearchStrategy:
         return st.builds(cls, info=info, _remote_info=_remote_info)
 
-    @cached_property
-    def markets(self) -> Dict[str, MockMarket]:
-        return (
-            {s.symbol: MockMarket(info=s) for s in self.info.symbols}
-            if self.info is not None
-            else {}
-        )
+    def _market(self, info: MarketInfo) -> MockMarket:
+        return MockMarket(info=info)
 
     async def __call__(
         self,
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from enum import Enum
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.tradeframe import TradeFrame
+
+
+class BarKind(Enum):
+    # the trade column summed until a bar is complete, tick bars count trades instead
+    tick = "tick"  # a fixed count of trades
+    volume = "qty"  # a fixed volume of base asset
+    dollar = "quote_qty"  # a fixed volume of quote asset
+
+
+# candle columns, and the trade column they are built from
+_candle_columns = {
+    "open": "price",
+    "high": "price",
+    "low": "price",
+    "close": "price",
+    "volume": "qty",
+    "qav": "quote_qty",
+    "taker_base_vol": "qty",
+    "taker_quote_vol": "quote_qty",
+}
+
+
+class BarBuilder:
+    """Builds bars of a fixed count of trades, base volume or quote volume, as trades arrive.
+
+    A trade belongs to the bar of the amount traded before it : bar k has the trades starting while
+    the cumulative amount is in [k * threshold, (k + 1) * threshold[. A bar ends with the trade
+    reaching the next multiple of threshold, and the excess of that trade counts for the next bar.
+    This allows assigning all trades to bars at once, and a large trade does not make empty bars.
+    Bars are candles of an OHLCFrame, opening and closing at the time of their first and last trades.
+    They do not last a fixed TimeStep, so the interval of their frames is None.
+    """
+
+    kind: BarKind
+    threshold: Union[int, Decimal]
+
+    # bars that cannot change anymore, appended as they close, and the open one.
+    closed: List[pd.DataFrame]
+    open: Optional[pd.DataFrame]
+    _bars: Optional[OHLCFrame]  # all of them, until the next update
+    # trades are stored with this precision, the one of the first trades received
+    precision: Optional[FixedPoint]
+
+    last_id: Optional[int]  # the last trade received
+    pending: Optional[pd.DataFrame]  # the trades of the open bar
+    # the amount traded before the open bar, modulo threshold
+    offset: Union[int, Decimal]
+
+    def __init__(self, kind: BarKind, threshold: Union[int, Decimal, str]):
+        self.kind = kind
+        self.threshold = int(threshold) if kind == BarKind.tick else Decimal(threshold)
+        if self.threshold <= 0:
+            raise ValueError(f"{kind.name} bars need a positive threshold")
+        self.closed = []
+        self.open = None
+        self._bars = None
+        self.precision = None
+        self.last_id = None
+        self.pending = None
+        self.offset = 0
+
+    @property
+    def bars(self) -> OHLCFrame:
+        """all bars built so far, the last one is still open, unless its threshold was reached exactly.
+        Note : this copies all bars after an update, the bars that changed are returned on each call"""
+        if self._bars is None:
+            if len(self.closed) > 1:
+                self.closed = [pd.concat(self.closed)]
+            dfs = self.closed + ([] if self.open is None else [self.open])
+            self._bars = self._frame(pd.concat(dfs)) if dfs else self._frame(None)
+        return self._bars
+
+    def _amounts(self, df: pd.DataFrame):
+        """ the amount of each trade, and the threshold, comparable exactly with numpy """
+        if self.kind == BarKind.tick:
+            return np.ones(len(df), dtype="int64"), self.threshold
+        column = self.kind.value
+        if self.precision is not None and column in self.precision.places:
+            # scaled int64 : exact and fast
+            return (
+                df[column].to_numpy(),
+                int(self.precision.to_int(column, [self.threshold])[0]),
+            )
+        # Note : Decimal objects are exact, but numpy operates on them at python speed
+        return df[column].to_numpy(), self.threshold
+
+    def _sums_fit(self, df: pd.DataFrame) -> bool:
+        """ whether the volumes of these trades, and the amounts counted for bars, fit in int64 """
+        first = np.zeros(1, dtype="int64")
+        amounts, threshold = self._amounts(df)
+        # Note : amounts are counted from the offset, below threshold, until the multiple after them
+        return self.precision.sums_fit(
+            np.r_[threshold, threshold, amounts], first
+        ) and all(
+            self.precision.sums_fit(df[c].to_numpy(), first)
+            for c in ["qty", "quote_qty"]
+            if c in self.precision.places
+        )
+
+    def _to_decimal(self):
+        """ trades and bars are stored as Decimal from now on """
+        bars = self._bars_precision()
+        self.closed = [bars.decode(df) for df in self.closed]
+        self.open = None if self.open is None else bars.decode(self.open)
+        self.offset = self.precision.decode_value(self.kind.value, self.offset)
+        self.precision = None
+        self._bars = None
+
+    def __call__(self, trades: TradeFrame) -> OHLCFrame:
+        """Adds trades to the bars, ignoring the ones already received.
+        Returns the bars that changed : the bar that was open, and the new ones."""
+        if self.last_id is None:
+            self.precision = trades.precision
+        else:
+            trades = trades.with_precision(self.precision)
+        df = trades.df
+        if self.last_id is not None:
+            df = df.iloc[df.index.searchsorted(self.last_id, side="right") :]
+        if df.empty:
+            return self._frame(None)
+
+        self.last_id = int(df.index[-1])
+        if self.pending is not None:
+            df = pd.concat([self.pending, df])  # the open bar is built again
+        if self.precision is not None and not self._sums_fit(df):
+            # numpy would wrap around silently : the bars are summed as Decimal instead
+            df = self.precision.decode(df)
+            self._to_decimal()
+
+        amounts, threshold = self._amounts(df)
+        after = self.offset + np.cumsum(amounts)
+        before = after - amounts
+        # Note : trades are in order, so trades of a bar are contiguous rows
+        bar = before // threshold
+        starts = np.flatnonzero(np.r_[True, bar[1:] != bar[:-1]])
+        ends = np.r_[starts[1:], len(df)] - 1
+
+        if after[-1] < (bar[-1] + 1) * threshold:
+            # the last bar is still open, its trades will be part of it on the next call
+            self.pending = df.iloc[starts[-1] :]
+            self.offset = before[starts[-1]] % threshold
+        else:
+            self.pending = None
+            self.offset = after[-1] % threshold
+
+        # Note : the last closed bar does not change
+        changed = self._candles(
+            df,
+            starts,
+            ends,
+            after=self.closed[-1].index[-1].value if self.closed else None,
+        )
+        # only new bars are appended, without copying the previous ones
+        closed = changed if self.pending is None else changed.iloc[:-1]
+        self.open = None if self.pending is None else changed.iloc[-1:]
+        if not closed.empty:
+            self.closed.append(closed)
+        self._bars = None
+        return self._frame(changed)
+
+    def _frame(self, df: Optional[pd.DataFrame]) -> OHLCFrame:
+        """ an OHLCFrame of bars, without the TimeStep it would guess from their durations """
+        if df is None:
+            return OHLCFrame(precision=self._bars_precision())
+        frame = OHLCFrame(df=df, precision=self._bars_precision())
+        object.__setattr__(frame, "interval", None)
+        return frame
+
+    def _bars_precision(self) -> Optional[FixedPoint]:
+        if self.precision is None:
+            return None
+        return FixedPoint(
+            places={
+                c: self.precision.places[t]
+                for c, t in _candle_columns.items()
+                if t in self.precision.places
+            }
+        )
+
+    def _candles(
+        self,
+        df: pd.DataFrame,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        after: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """aggregates trades between starts and ends positions into the dataframe of candles,
+        opening after the open_time `after`, as int64 nanoseconds"""
+        price = df.price.to_numpy()
+        qty = df.qty.to_numpy()
+        quote_qty = df.quote_qty.to_numpy()
+        # the taker was buying when we bought as taker, or sold as maker
+        taker_buy = df.is_buyer.to_numpy(dtype=bool) != df.is_maker.to_numpy(dtype=bool)
+
+        # Note : open_time indexes candles, bars opening at the same time are shifted by 1 ns
+        opens = df.time_utc.to_numpy()[starts].astype("int64")
+        if after is None:
+            after = opens[0] - 1
+        shift = np.arange(len(opens) + 1)
+        opens = (np.maximum.accumulate(np.r_[after, opens] - shift) + shift)[1:]
+        closes = np.maximum(df.time_utc.to_numpy()[ends].astype("int64"), opens)
+
+        return pd.DataFrame(
+            {
+                "open": price[starts],
+                "high": np.maximum.reduceat(price, starts),
+                "low": np.minimum.reduceat(price, starts),
+                "close": price[ends],
+                "volume": np.add.reduceat(qty, starts),
+                "close_time": closes.astype("datetime64[ns]"),
+                "qav": np.add.reduceat(quote_qty, starts),
+                "num_trades": (ends - starts + 1).astype("uint64"),
+                # Note : zeros of the same type, to sum Decimal with Decimal only
+                "taker_base_vol": np.add.reduceat(
+                    np.where(taker_buy, qty, qty - qty), starts
+                ),
+                "taker_quote_vol": np.add.reduceat(
+                    np.where(taker_buy, quote_qty, quote_qty - quote_qty), starts
+                ),
+                "is_best_match": np.zeros(len(starts), dtype="uint64"),
+            },
+            index=pd.DatetimeIndex(opens.astype("datetime64[ns]"), name="open_time"),
+        )
@@ -0,0 +1,65 @@
+"""Conversion of raw binance values, one column at a time, to the dtypes used in frames.
+This is the fast path for ingesting data, where validation is done per column instead of per row.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+# bounds of datetime64[ns], in [ms]
+_ms_min = pd.Timestamp.min.value // 1_000_000 + 1
+_ms_max = pd.Timestamp.max.value // 1_000_000
+
+
+def integers(name: str, values: Sequence[Any], dtype: str = "int64") -> np.ndarray:
+    arr = np.asarray(values)
+    if arr.dtype.kind == "U":  # numbers sent as strings
+        arr = arr.astype("int64")  # raises ValueError if not an integer
+    elif arr.dtype.kind in "fO" and arr.size > 0:
+        # Note : numpy has no common integer dtype for values beyond int64 mixed with negative ones,
+        # so we check python values, and let numpy raise OverflowError if they do not fit in dtype.
+        if not all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            raise TypeError(f"{name} values are not all integers")
+        if np.dtype(dtype).kind == "u" and any(v < 0 for v in values):
+            raise ValueError(f"{name} values cannot be negative")
+        return np.array(list(values), dtype=dtype)
+    if arr.dtype.kind not in "iu" and arr.size > 0:
+        raise TypeError(f"{name} values are not integers, but {arr.dtype}")
+    if np.dtype(dtype).kind == "u" and (arr < 0).any():
+        raise ValueError(f"{name} values cannot be negative")
+    return arr.astype(dtype)
+
+
+def datetimes_from_ms(name: str, values: Sequence[Any]) -> np.ndarray:
+    """ binance timestamps are integers in [ms] """
+    ms = integers(name, values)
+    if ((ms < _ms_min) | (ms > _ms_max)).any():
+        raise ValueError(f"{name} values are not in pandas.Timestamp bounds")
+    return ms.astype("datetime64[ms]").astype("datetime64[ns]")
+
+
+def decimals(name: str, values: Sequence[Any]) -> np.ndarray:
+    try:
+        # Note : converting via str, to get the value as displayed, for floats as well.
+        return np.array(list(map(Decimal, map(str, values))), dtype=object)
+    except InvalidOperation as io:
+        raise ValueError(f"{name} values are not all decimals") from io
+
+
+def booleans(name: str, values: Sequence[Any], optional: bool = False) -> np.ndarray:
+    if optional and None in values:
+        if not all(v is None or isinstance(v, bool) for v in values):
+            raise TypeError(f"{name} values are not all booleans or None")
+        return objects(name, values)
+    arr = np.asarray(values)
+    if arr.dtype.kind != "b" and arr.size > 0:
+        raise TypeError(f"{name} values are not booleans, but {arr.dtype}")
+    # stored as python objects, like from the validated models
+    return arr.astype(bool).astype(object)
+
+
+def objects(name: str, values: Sequence[Any]) -> np.ndarray:
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+import portion
+from portion import Interval
+
+# binance timestamps are in [ms], both bounds of requests are included
+_resolution = timedelta(milliseconds=1)
+
+
+class Coverage:
+    """The time ranges already fetched, and among them, the ones known to be empty.
+
+    Ranges are closed intervals of datetimes, as in binance requests, so that missing ranges
+    can be requested as they are.
+    """
+
+    fetched: Interval
+    empty: Interval
+
+    def __init__(self):
+        self.fetched = portion.empty()
+        self.empty = portion.empty()
+
+    def add(self, start: datetime, stop: datetime, empty: bool = False) -> Coverage:
+        """ records the [start, stop] range as fetched, without any data if empty """
+        if start <= stop:
+            self.fetched |= portion.closed(start, stop)
+            if empty:
+                self.empty |= portion.closed(start, stop)
+        return self
+
+    def gaps(self, start: datetime, stop: datetime) -> List[Tuple[datetime, datetime]]:
+        """ the ranges, both bounds included, still to be fetched in [start, stop] """
+        gaps = []
+        for i in portion.closed(start, stop) - self.fetched:
+            # Note : timestamps are in [ms], so open bounds are closed on the next [ms]
+            lower = i.lower if i.left == portion.CLOSED else i.lower + _resolution
+            upper = i.upper if i.right == portion.CLOSED else i.upper - _resolution
+            if lower <= upper:
+                gaps.append((lower, upper))
+        return gaps
+
+    def __contains__(self, item: Tuple[datetime, datetime]) -> bool:
+        """ whether the (start, stop) range has been fetched already """
+        return not self.gaps(*item)
+
+    def __repr__(self):
+        return f"Coverage(fetched={self.fetched}, empty={self.empty})"
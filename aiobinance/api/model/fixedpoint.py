@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Context, Decimal
+from typing import Any, Dict, Iterable, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aiobinance.api.model.market_info import MarketInfo
+
+# enough precision to never round when scaling
+_exact = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+_int64 = np.iinfo(np.dtype("int64"))
+
+
+# rows converted at once, to bound the memory of character matrices
+_chunk = 1 << 16
+
+_pow10 = 10 ** np.arange(19, dtype="int64")
+
+
+def _array(values: Iterable[Any]) -> np.ndarray:
+    return np.asarray(values if hasattr(values, "__len__") else list(values))
+
+
+def _parse(chars: np.ndarray, places: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Scaled int64 of ascii decimal strings, and whether each one is a plain decimal, stored exactly.
+    Others (exponents, nan, too many digits...) are left for the exact Decimal conversion."""
+    width = chars.dtype.itemsize
+    m = chars.view(np.uint8).reshape(len(chars), width)
+    digit = (m >= ord("0")) & (m <= ord("9"))
+    point = m == ord(".")
+    signed = (m[:, 0] == ord("-")) | (m[:, 0] == ord("+"))
+
+    # Note : strings are padded with zeros, only digits, one point and a leading sign are plain
+    other = ~digit & ~point & (m != 0)
+    other[:, 0] &= ~signed
+    points = point.sum(axis=1)
+    plain = ~other.any(axis=1) & (points <= 1) & digit.any(axis=1)
+
+    # the power of ten of each digit, once scaled
+    position = np.where(points == 1, point.argmax(axis=1), (m != 0).sum(axis=1))
+    column = np.arange(width)
+    exponent = position[:, None] - column - 1 + (column > position[:, None]) + places
+    value = np.where(digit, m - ord("0"), 0).astype("int64")
+    # digits beyond places must be zeros, and int64 bounds are checked exactly for long values
+    plain &= ~((value > 0) & ((exponent < 0) | (exponent >= 18))).any(axis=1)
+
+    ints = (value * _pow10[np.clip(exponent, 0, 18)]).sum(axis=1)
+    return np.where(m[:, 0] == ord("-"), -ints, ints), plain
+
+
+# Decimal of each ascii string, in an object array
+_from_ascii = np.frompyfunc(lambda s: Decimal(s.decode()), 1, 1)
+
+
+def _format(ints: np.ndarray, places: int) -> np.ndarray:
+    """ ascii decimal strings of scaled int64, with leading zeros """
+    # Note : the absolute value of int64 min overflows, but is right as uint64
+    magnitude = np.abs(ints).view("uint64")
+    digits = max(places + 1, 20)  # 20 digits of uint64
+    m = np.empty((len(ints), digits + 2), dtype=np.uint8)
+    m[:, 0] = np.where(ints < 0, ord("-"), ord("0"))
+    # digits written from the last one, with the point before the last places
+    columns = [c for c in range(digits + 1, 0, -1) if c != digits + 1 - places]
+    for c in columns:
+        m[:, c] = magnitude % 10 + ord("0")
+        magnitude = magnitude // 10
+    m[:, digits + 1 - places] = ord(".")
+    return m.view(f"S{digits + 2}")[:, 0]
+
+
+@dataclass(frozen=True)
+class FixedPoint:
+    """Storage of decimal columns as int64, scaled by 10 ** places.
+    This is exact, as long as values fit in the precision, and lets numpy operate natively on these columns.
+    """
+
+    places: Dict[str, int]  # decimal places, indexed by column name
+
+    @classmethod
+    def for_candles(cls, info: MarketInfo) -> FixedPoint:
+        base = info.base_asset_precision
+        quote = info.quote_asset_precision
+        return cls(
+            places={
+                "open": quote,
+                "high": quote,
+                "low": quote,
+                "close": quote,
+                "volume": base,
+                "qav": quote,
+                "taker_base_vol": base,
+                "taker_quote_vol": quote,
+            }
+        )
+
+    @classmethod
+    def for_trades(cls, info: MarketInfo) -> FixedPoint:
+        # Note : commission remains a Decimal, as the commission asset is not always one of the market.
+        return cls(
+            places={
+                "price": info.quote_asset_precision,
+                "qty": info.base_asset_precision,
+                "quote_qty": info.quote_asset_precision,
+            }
+        )
+
+    def dtypes(self, dtypes: Mapping[str, np.dtype]) -> Dict[str, np.dtype]:
+        """ the dtypes of a record, once stored with this precision """
+        return {
+            k: np.dtype("int64") if k in self.places else v for k, v in dtypes.items()
+        }
+
+    def to_int(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """Scales decimal values to int64, raising ValueError if one is not stored exactly.
+
+        Decimal strings, as sent by binance, are parsed on the whole array at once, as a matrix of
+        characters. Only other values (floats, exponents, nan...) are scaled one by one, as Decimal.
+        """
+        values = _array(values)
+        if values.dtype.kind == "f":
+            # Note : the shortest repr of a float is not its exact value
+            return np.array(
+                [self._scaled(column, v) for v in values.tolist()], dtype="int64"
+            )
+
+        places = self.places[column]
+        chars = values.astype("S")
+        ints = np.zeros(len(chars), dtype="int64")
+        plain = np.zeros(len(chars), dtype=bool)
+        for start in range(0, len(chars), _chunk):
+            stop = start + _chunk
+            ints[start:stop], plain[start:stop] = _parse(chars[start:stop], places)
+
+        for i in np.flatnonzero(~plain):
+            ints[i] = self._scaled(column, values[i])
+        return ints
+
+    def _scaled(self, column: str, value: Any) -> int:
+        """ one value scaled to int64, exactly, through Decimal """
+        places = self.places[column]
+        scaled = Decimal(value).scaleb(places, context=_exact)
+        if not scaled.is_finite() or scaled != scaled.to_integral_value(context=_exact):
+            raise ValueError(
+                f"{value} cannot be stored exactly with {places} decimal places in {column}"
+            )
+        i = int(scaled)
+        if i < _int64.min or i > _int64.max:
+            raise ValueError(
+                f"{value} with {places} decimal places in {column} is not in numpy.int64 bounds"
+            )
+        return i
+
+    @staticmethod
+    def sums_fit(values: np.ndarray, starts: np.ndarray) -> bool:
+        """Whether np.add.reduceat(values, starts) on scaled int64, and all partial sums, fit in int64.
+        Note : numpy wraps around silently. Partial sums are bounded by the sums of absolute values,
+        estimated in float64, with a margin for its rounding."""
+        bounds = np.add.reduceat(np.abs(values.astype("float64")), starts)
+        return bool((bounds < 2.0 ** 62).all())
+
+    def to_decimal(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        """Exact Decimal values of scaled int64.
+        Their strings are written on the whole array at once, only Decimal objects are made one by one,
+        and shared by equal values.
+        """
+        places = self.places[column]
+        # Note : prices and quantities repeat, one Decimal is made for each distinct value
+        ints, inverse = np.unique(_array(values).astype("int64"), return_inverse=True)
+        decimals = np.empty(len(ints), dtype=object)
+        for start in range(0, len(ints), _chunk):
+            # Note : filling an object array from a list of Decimal is much slower
+            decimals[start : start + _chunk] = _from_ascii(
+                _format(ints[start : start + _chunk], places)
+            )
+        return decimals[inverse]
+
+    def decode_value(self, column: str, value: Any) -> Any:
+        if column in self.places:
+            return Decimal(int(value)).scaleb(-self.places[column], context=_exact)
+        return value
+
+    def encode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ returns a copy of the dataframe, with the decimal columns stored as scaled int64 """
+        encoded = df.copy()
+        for col in self.places:
+            if col in encoded.columns:
+                encoded[col] = self.to_int(col, df[col])
+        return encoded
+
+    def decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ returns a copy of the dataframe, with the scaled int64 columns converted back to Decimal """
+        decoded = df.copy()
+        for col in self.places:
+            if col in decoded.columns:
+                decoded[col] = self.to_decimal(col, df[col])
+        return decoded
+
+    def to_float(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ returns a copy of the dataframe, with the scaled int64 columns converted to float64, losing precision """
+        floats = df.copy()
+        for col in self.places:
+            if col in floats.columns:
+                floats[col] = df[col].to_numpy(dtype="float64") / 10 ** self.places[col]
+        return floats
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field, fields
+from dataclasses import asdict, astuple, dataclass, field, fields
 from datetime import MAXYEAR, MINYEAR, datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Iterable, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 import hypothesis.strategies as st
 import numpy as np
@@ -13,13 +13,14 @@ from bokeh.plotting import Figure
 from hypothesis import assume, infer
 from hypothesis.strategies import SearchStrategy
 from pandas import merge, merge_ordered
-from pandas._libs.tslibs.np_datetime import OutOfBoundsDatetime
 from pydantic import validator
 
 # Leveraging pydantic to validate based on type hints
 from tabulate import tabulate
 
-from aiobinance.api.model.pricecandle import PriceCandle
+from aiobinance.api.model import columns
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.pricecandle import PriceCandle, PriceCandleRecord
 from aiobinance.api.model.timeinterval import (
     TimeStep,
     timeinterval_from_timedelta,
@@ -27,6 +28,70 @@ from aiobinance.api.model.timeinterval import (
 )
 
 
+class CandleBuffer:
+    """Candles followed by spare rows, to append candles without copying the previous ones.
+
+    Frames are views on the first rows of the buffer. Spare rows are indexed by the next expected
+    open times, so that appended candles, when they follow each other, only fill values in place.
+    Rows already in a frame are never written again.
+    """
+
+    df: pd.DataFrame
+    arrays: Dict[str, np.ndarray]  # the arrays of each column, written to directly
+    size: int  # rows used by the latest frame, only this one can append more
+
+    def __init__(self, dfs: List[pd.DataFrame], step: timedelta, capacity: int):
+        """ the candles of dfs, following each other, in a buffer of capacity rows """
+        spare = capacity - sum(len(df) for df in dfs)
+        last = dfs[-1]
+        index = np.concatenate(
+            [df.index.to_numpy() for df in dfs]
+            + [
+                last.index[-1].to_datetime64()
+                + np.timedelta64(step) * np.arange(1, spare + 1)
+            ]
+        )
+        arrays = {
+            c: np.concatenate(
+                [df[c].to_numpy() for df in dfs]
+                + [np.empty(spare, dtype=last[c].dtype)]
+            )
+            for c in last.columns
+        }
+        self.df = pd.DataFrame(
+            arrays, index=pd.DatetimeIndex(index, name="open_time"), copy=False
+        )
+        # Note : pandas < 1.3 copies arrays in blocks, which are then the ones to write to
+        self.arrays = {
+            c: a
+            if np.shares_memory(self.df[c].to_numpy(), a)
+            else self.df[c].to_numpy()
+            for c, a in arrays.items()
+        }
+        self.size = capacity - spare
+
+    def __len__(self):
+        return len(self.df)
+
+    def frame(self) -> pd.DataFrame:
+        """ the candles of the rows used, without copying them """
+        return self.df.iloc[: self.size]
+
+    def write(self, start: int, df: pd.DataFrame) -> bool:
+        """ appends candles after the rows used, only if they fit in the expected open times """
+        stop = start + len(df)
+        if (
+            start != self.size
+            or stop > len(self.df)
+            or not self.df.index[start:stop].equals(df.index)
+        ):
+            return False
+        for c in df.columns:
+            self.arrays[c][start:stop] = df[c].to_numpy()
+        self.size = stop
+        return True
+
+
 # Note : these are python dataclasses as pydantic cannot really typecheck dataframe content...
 @dataclass(frozen=True)
 class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can help us enforce correct shape of dataframe...
@@ -44,6 +109,17 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         ),
     )
 
+    # when set, decimal columns are stored as scaled int64 in the dataframe
+    precision: Optional[FixedPoint] = field(init=True, default=None)
+
+    # whether close_time is sorted like open_time, allowing binary search on both.
+    close_sorted: bool = field(init=False, default=True, repr=False, compare=False)
+
+    # when df is a view on a buffer, to append candles in place.
+    buffer: Optional[CandleBuffer] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+
     @property
     def empty(self) -> bool:
         return self.df.empty
@@ -65,19 +141,30 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
 
     @property
     def open(self) -> Decimal:
-        return self.df.open[0]
+        return self._value("open", self.df.open[0])
 
     @property
     def high(self) -> Decimal:
-        return max(self.df.high)
+        return self._value("high", max(self.df.high))
 
     @property
     def low(self) -> Decimal:
-        return min(self.df.low)
+        return self._value("low", min(self.df.low))
 
     @property
     def close(self) -> Decimal:
-        return self.df.close[-1]
+        return self._value("close", self.df.close[-1])
+
+    def _value(self, column: str, value):
+        return (
+            value
+            if self.precision is None
+            else self.precision.decode_value(column, value)
+        )
+
+    def _decoded(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ the dataframe with Decimal columns, as in PriceCandle """
+        return df if self.precision is None else self.precision.decode(df)
 
     @st.composite
     @staticmethod
@@ -118,7 +205,9 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         return OHLCFrame.from_candleslist(*candles)
 
     @classmethod
-    def from_candleslist(cls, *candles: PriceCandle):
+    def from_candleslist(
+        cls, *candles: PriceCandle, precision: Optional[FixedPoint] = None
+    ):
         arraylike = [
             tuple(
                 # explicitely drop timezone after converting to UTC
@@ -135,7 +224,70 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         )  # Drops timezone info (because numpy)
 
         df = pd.DataFrame(data=npa)
-        return cls(df=df)
+        if precision is not None:
+            df = precision.encode(df)
+        return cls(df=df, precision=precision)
+
+    @classmethod
+    def from_klines(
+        cls,
+        rows: List[List],
+        precision: Optional[FixedPoint] = None,
+        validate: bool = False,
+    ):
+        """Builds a frame from binance klines, converting values one column at a time.
+        With validate, a PriceCandle is built for each row instead, which is much slower."""
+        # Ref : https://binance-docs.github.io/apidocs/spot/en/#kline-candlestick-data
+        # Note : binance klines columns are in the same order as PriceCandle fields.
+        names = list(PriceCandle.as_dtype().keys())
+
+        if validate:
+            return cls.from_candleslist(
+                *(PriceCandle(**dict(zip(names, r))) for r in rows),
+                precision=precision,
+            )
+        if not rows:
+            return cls.from_candleslist(precision=precision)
+
+        raw = dict(zip(names, zip(*rows)))
+        df = pd.DataFrame(
+            {
+                "open_time": columns.datetimes_from_ms("open_time", raw["open_time"]),
+                "open": columns.decimals("open", raw["open"]),
+                "high": columns.decimals("high", raw["high"]),
+                "low": columns.decimals("low", raw["low"]),
+                "close": columns.decimals("close", raw["close"]),
+                "volume": columns.decimals("volume", raw["volume"]),
+                "close_time": columns.datetimes_from_ms(
+                    "close_time", raw["close_time"]
+                ),
+                "qav": columns.decimals("qav", raw["qav"]),
+                "num_trades": columns.integers(
+                    "num_trades", raw["num_trades"], dtype="uint64"
+                ),
+                "taker_base_vol": columns.decimals(
+                    "taker_base_vol", raw["taker_base_vol"]
+                ),
+                "taker_quote_vol": columns.decimals(
+                    "taker_quote_vol", raw["taker_quote_vol"]
+                ),
+                "is_best_match": columns.integers(
+                    "is_best_match", raw["is_best_match"], dtype="uint64"
+                ),
+            }
+        )
+        if precision is not None:
+            df = precision.encode(df)
+        return cls(df=df, precision=precision)
+
+    def with_precision(self, precision: Optional[FixedPoint]) -> OHLCFrame:
+        """ the same candles, stored with another precision (None for Decimal) """
+        if precision == self.precision:
+            return self
+        df = self._decoded(self.df)
+        if precision is not None:
+            df = precision.encode(df)
+        return OHLCFrame(df=df, precision=precision)
 
     def as_datasource(
         self, compute_mid_time=True, compute_upwards=True
@@ -195,7 +347,7 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         # TODO
 
         # setting interval timedelta automatically
-        td = (self.df.iloc[0].close_time - self.df.iloc[0].name).to_pytimedelta()
+        td = (self.df.close_time.iloc[0] - self.df.index[0]).to_pytimedelta()
         # normalize to TimeStep !!!
         tdn = TimeStep(td)
         object.__setattr__(
@@ -203,27 +355,89 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
             "interval",  # We need to restrict ourselves to ONE candle here
             tdn,
         )
+        # Note : usually true, as all candles have the same interval, but we support overlapping candles.
+        object.__setattr__(
+            self, "close_sorted", self.df.close_time.is_monotonic_increasing
+        )
+
+    def _selector(
+        self, start: Optional[datetime], stop: Optional[datetime]
+    ) -> Union[slice, np.ndarray]:
+        """Selects the candles with start <= close_time and open_time <= stop, with naive UTC datetimes.
+        This is a slice of positions found by binary search, unless close_time is not sorted.
+        """
+        if self.df.empty:
+            return slice(0, 0)
+
+        # REMINDER : precision matters here (python datetime precision is microsecond)
+        first_open = self.df.index[0].to_pydatetime(warn=False)
+        last_close = (
+            self.df.close_time[-1] if self.close_sorted else self.df.close_time.max()
+        ).to_pydatetime(warn=False)
+
+        # checking bounds first, to not overflow with datetimes pandas cannot represent
+        if (start is not None and start > last_close) or (
+            stop is not None and stop < first_open
+        ):
+            return slice(0, 0)
+        if start is not None and start <= first_open:
+            start = None
+        if stop is not None and stop >= last_close:
+            stop = None
+
+        if self.close_sorted:
+            begin = (
+                0
+                if start is None
+                else self.df.close_time.searchsorted(pd.Timestamp(start), side="left")
+            )
+            end = (
+                len(self.df)
+                if stop is None
+                # open_time in the same microsecond as stop is still before stop
+                else self.df.index.searchsorted(
+                    pd.Timestamp(stop) + timedelta(microseconds=1), side="left"
+                )
+            )
+            return slice(begin, max(begin, end))
+        else:
+            selector = np.ones(len(self.df), dtype=bool)
+            if start is not None:
+                selector &= self.df.close_time.to_numpy() >= np.datetime64(start)
+            if stop is not None:
+                selector &= self.df.index.to_numpy() < np.datetime64(
+                    stop + timedelta(microseconds=1)
+                )
+            return selector
 
     def __contains__(self, item: Union[PriceCandle, datetime]) -> bool:
         # https://docs.python.org/2/reference/datamodel.html#object.__contains__
         if isinstance(item, PriceCandle):
-            for t in self:  # iterates and cast to PriceCandle
-                if t == item:  # using PriceCandle equality
+            record = PriceCandleRecord(
+                *(
+                    # explicitely drop timezone after converting to UTC
+                    v.astimezone(tz=timezone.utc).replace(tzinfo=None)
+                    if isinstance(v, datetime)
+                    else v
+                    for v in astuple(item)
+                )
+            )
+            for r in self.records():
+                if r == record:
                     return True
         elif isinstance(item, datetime):  # continuous index
             if (
                 item.tzinfo is None
             ):  # because we will do a tz-aware comparison with item
                 item = item.replace(tzinfo=timezone.utc)
-            # converting datetime to utc in any case
-            item = item.astimezone(tz=timezone.utc)
-
-            for t in self:
-                # Note : same semantics as getitem
-                if (
-                    t.open_time <= item <= t.close_time  # CAREFUL: tz-aware comparison
-                ):  # checking one candle contains the datetime
-                    return True
+            # converting datetime to utc in any case, and unaware to compare with numpy values
+            item = item.astimezone(tz=timezone.utc).replace(tzinfo=None)
+
+            # Note : same semantics as getitem, checking one candle contains the datetime
+            selector = self._selector(item, item)
+            if isinstance(selector, slice):
+                return selector.stop > selector.start
+            return bool(selector.any())
         return False
 
     def __eq__(self, other: OHLCFrame) -> bool:
@@ -235,8 +449,10 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
             return True
         elif len(self) == len(other):
             # BEWARE : https://github.com/pandas-dev/pandas/issues/20442
-            for s, o in zip(self, other):  # this iterates and cast to Trade
-                if s != o:  # here we use PriceCandle.__eq__ !
+            # Note : values stored the same way are compared as they are
+            scaled = self.precision == other.precision
+            for s, o in zip(self.records(scaled), other.records(scaled)):
+                if s != o:
                     break
             else:
                 return True
@@ -257,72 +473,34 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
             if stop is not None and stop.tzinfo is not None:
                 stop = stop.astimezone(tz=timezone.utc).replace(tzinfo=None)
 
-            # sanitizing slice...
-            item = slice(start, stop)
-
-            # dataframe slice handled by pandas boolean indexer
-            try:
-                selector = pd.Series({i: True for i in self.df.index})
-
-                if item.start is not None and item.start >= self.open_time.replace(
-                    tzinfo=None
-                ):
-                    selector = selector & (
-                        item.start <= self.df.close_time.astype(dtype="datetime64[us]")
-                    )
-
-                if item.stop is not None and item.stop <= self.close_time.replace(
-                    tzinfo=None
-                ):
-                    selector = selector & (
-                        self.df.index.to_series().astype(dtype="datetime64[us]")
-                        <= item.stop
-                    )
-
-                df = self.df.loc[selector]
-
-            except TypeError as te:
-                raise KeyError(
-                    f"{item} is too high a value for PriceCandle.open_time "
-                ) from te
+            # Note : a slice of positions gives a view on the same data, without copy.
+            return OHLCFrame(
+                df=self.df.iloc[self._selector(start, stop)], precision=self.precision
+            )
 
-            return OHLCFrame(df=df)
         elif isinstance(item, datetime):
 
             if item.tzinfo is not None:
                 # converting datetime to unaware timezone, in utc. to allow comparison with unaware numpy values.
                 item = item.astimezone(tz=timezone.utc).replace(tzinfo=None)
 
-            try:
-                rs = self.df.loc[  # self.df.index.to_series().astype(dtype='datetime64[us]') ]  # using index as such
-                    # OLD : finding containing candle...
-                    (  # REMINDER : precision matters here (python datetime precision is microsecond)
-                        self.df.index.to_series().astype(dtype="datetime64[us]") <= item
-                    )  # CAREFUL with time bounds semantics !
-                    # Note we want to err towards using open_time as index, not close time, in case one == the other...
-                    & (item <= self.df.close_time.astype(dtype="datetime64[us]"))
-                ]
-
-                if len(rs) == 1:
-                    return PriceCandle(**rs.reset_index(drop=False).iloc[0])
-                elif len(rs) == 0:
-                    raise KeyError(f"Invalid index {item}")
-                else:
-                    # Multiple matches return another frame
-                    return OHLCFrame(df=rs)
-
-            except OutOfBoundsDatetime as oobd:
-                # TODO : handle/prevent overflow error when int is too large to be optimized by pandas/numpy
-                # E   OverflowError: Python int too large to convert to C long
-                # pandas/_libs/hashtable_class_helper.pxi:1032: OverflowError
-                raise KeyError(f"{item} out of bounds ") from oobd
-            except IndexError as ie:
-                raise KeyError(f"No PriceCandle.open_time matching {item}") from ie
+            # finding containing candles
+            # CAREFUL with time bounds semantics !
+            # Note we want to err towards using open_time as index, not close time, in case one == the other...
+            rs = self.df.iloc[self._selector(item, item)]
+
+            if len(rs) == 1:
+                return PriceCandle(**self._decoded(rs).reset_index(drop=False).iloc[0])
+            elif len(rs) == 0:
+                raise KeyError(f"Invalid index {item}")
+            else:
+                # Multiple matches return another frame
+                return OHLCFrame(df=rs, precision=self.precision)
         else:
             raise KeyError(f"Invalid index {item}")
 
     def __iter__(self):
-        for t in self.df.itertuples(index=True):
+        for t in self._decoded(self.df).itertuples(index=True):
             # CAREFUL : reset_index may create an index column (BUG ?)
             # yield PriceCandle(**{k: v for k, v in t._asdict().items() if k != 'index'})
             yield PriceCandle(
@@ -332,21 +510,195 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
                 }
             )
 
+    def records(self, scaled: bool = False) -> Iterator[PriceCandleRecord]:
+        """Iterates on candles as lightweight records, without validation.
+        Datetimes are naive UTC, like in the dataframe, and no PriceCandle is built.
+        When scaled, the columns of the precision are the int stored, of value * 10 ** precision.places,
+        without making Decimal objects for them."""
+        if self.df.empty:
+            return iter(())
+        df = self.df if scaled else self._decoded(self.df)
+        columns = [
+            df[c].to_numpy(dtype="datetime64[us]").astype(object)
+            if c == "close_time"
+            else df[c].tolist()
+            for c in df.columns
+        ]
+        return map(
+            PriceCandleRecord._make,
+            zip(df.index.to_numpy(dtype="datetime64[us]").astype(object), *columns),
+        )
+
     def __len__(self):
         return len(self.df)
 
+    def _equal_index(self, other: OHLCFrame) -> pd.Index:
+        """ open_time of the candles that are in both frames, with exactly the same values """
+        if self.df.empty or other.df.empty:
+            return pd.DatetimeIndex([], name="open_time")
+
+        # comparing values stored the same way
+        other = other.with_precision(self.precision)
+
+        common = self.df.index.intersection(other.df.index)
+        mine = self.df.loc[common]
+        theirs = other.df.loc[common]
+
+        equal = np.ones(len(common), dtype=bool)
+        for col in mine.columns:
+            if col == "close_time":
+                # same precision as PriceCandle (python datetime)
+                equal &= mine[col].to_numpy(dtype="datetime64[us]") == theirs[
+                    col
+                ].to_numpy(dtype="datetime64[us]")
+            else:
+                equal &= mine[col].to_numpy() == theirs[col].to_numpy()
+
+        return common[equal]
+
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.intersection
     def intersection(self, other: OHLCFrame):
         # extracting candles when there is *exact* equality
-        candles = []
-        # very naive implementation. TODO : optimize
         # REMINDER : this is just a set of candle, no candle merging.
         # TODO : somehow enforce same timeframe...
-        for t in self:
-            if t in other:
-                candles.append(t)
+        ix = self._equal_index(other)
 
-        return OHLCFrame.from_candleslist(*candles)
+        if len(ix) == 0:
+            return OHLCFrame.from_candleslist(precision=self.precision)
+        return OHLCFrame(df=self.df.loc[ix], precision=self.precision)
+
+    def resample(self, step: TimeStep) -> OHLCFrame:
+        """Aggregates candles in candles of a coarser step, aligned like binance ones.
+
+        Candles are expected to be of a step dividing this one. A coarser candle is built from
+        the finer ones it contains, even when some are missing, like the current binance candle.
+        """
+        if self.df.empty:
+            return OHLCFrame.from_candleslist(precision=self.precision)
+
+        # Note : int64 nanoseconds, to find buckets with integer arithmetic only
+        opens = self.df.index.asi8
+        origin = pd.Timestamp(step.origin).value
+        delta = pd.Timedelta(step.delta.value).value
+        buckets = origin + (opens - origin) // delta * delta
+
+        # candles are sorted, each bucket is a contiguous range of rows
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+
+        df = self.df
+        if self.precision is not None and not all(
+            self.precision.sums_fit(df[c].to_numpy(), starts)
+            for c in ["volume", "qav", "taker_base_vol", "taker_quote_vol"]
+            if c in self.precision.places
+        ):
+            # the sums do not fit in int64 : the coarser candles are Decimal
+            return self.with_precision(None).resample(step)
+
+        # the coarser candle closes when its last finer candle would (binance close_time is 1 ms early)
+        close_offset = (
+            df.close_time.to_numpy()[ends]
+            - df.index.to_numpy()[ends]
+            - np.timedelta64(self.interval.delta.value)
+        )
+        aggregated = {
+            "open": df.open.to_numpy()[starts],
+            "high": np.maximum.reduceat(df.high.to_numpy(), starts),
+            "low": np.minimum.reduceat(df.low.to_numpy(), starts),
+            "close": df.close.to_numpy()[ends],
+            "volume": np.add.reduceat(df.volume.to_numpy(), starts),
+            "close_time": buckets[starts].astype("datetime64[ns]")
+            + np.timedelta64(step.delta.value)
+            + close_offset,
+            "qav": np.add.reduceat(df.qav.to_numpy(), starts),
+            "num_trades": np.add.reduceat(df.num_trades.to_numpy(), starts),
+            "taker_base_vol": np.add.reduceat(df.taker_base_vol.to_numpy(), starts),
+            "taker_quote_vol": np.add.reduceat(df.taker_quote_vol.to_numpy(), starts),
+            "is_best_match": df.is_best_match.to_numpy()[starts],
+        }
+        return OHLCFrame(
+            df=pd.DataFrame(
+                {c: aggregated[c] for c in df.columns},
+                index=pd.DatetimeIndex(
+                    buckets[starts].astype("datetime64[ns]"), name="open_time"
+                ),
+            ),
+            precision=self.precision,
+        )
+
+    @staticmethod
+    def _better(mine: pd.DataFrame, theirs: pd.DataFrame) -> np.ndarray:
+        """ whether each candle of theirs should replace the one of mine, with the same open_time """
+        # the candle from other replaces ours only when it is "better" (more trades, more volume, or larger range)
+        return (
+            (theirs.num_trades.to_numpy() > mine.num_trades.to_numpy())
+            | (theirs.volume.to_numpy() > mine.volume.to_numpy())
+            | (
+                (theirs.high.to_numpy() >= mine.high.to_numpy())
+                & (theirs.low.to_numpy() < mine.low.to_numpy())
+            )
+            | (
+                (theirs.high.to_numpy() > mine.high.to_numpy())
+                & (theirs.low.to_numpy() <= mine.low.to_numpy())
+            )
+        )
+
+    def extend(self, other: OHLCFrame, force: bool = False) -> Optional[OHLCFrame]:
+        """Same as union, when other starts at the last candle or after it, like live updates.
+
+        The last candle is replaced if the one from other is better (always with force), and later
+        ones are appended in spare rows of a buffer, growing geometrically, so that previous candles
+        are neither copied nor sorted again.
+        Frames do not change : replacing the last candle copies candles in a new buffer.
+        Returns None when other has older candles, which union has to merge.
+        """
+        if other.df.empty:
+            return self
+        if self.df.empty or other.df.index[0] < self.df.index[-1]:
+            return None
+
+        other = other.with_precision(self.precision)
+        new = other.df
+        start = len(self.df)
+        if new.index[0] == self.df.index[-1]:
+            if force or self._better(self.df.iloc[-1:], new.iloc[:1])[0]:
+                start -= 1  # replacing our last candle
+            else:
+                new = new.iloc[1:]
+        if new.empty:
+            return self
+
+        buffer = self.buffer
+        if (
+            buffer is None
+            or buffer.size != len(self.df)  # a later frame is using the spare rows
+            or not buffer.write(start, new)  # replacing a candle of self
+        ):
+            # copying candles in a new buffer, twice as large as needed
+            size = start + len(new)
+            buffer = CandleBuffer(
+                [self.df.iloc[:start], new],
+                step=self.interval.delta.value,
+                capacity=max(2 * size, 16),
+            )
+
+        frame = object.__new__(OHLCFrame)
+        # Note : candles are already in shape, no need to check them again in __post_init__
+        object.__setattr__(frame, "df", buffer.frame())
+        object.__setattr__(frame, "precision", self.precision)
+        object.__setattr__(frame, "interval", self.interval)
+        object.__setattr__(
+            frame,
+            "close_sorted",
+            self.close_sorted
+            and other.close_sorted
+            and (
+                start == 0
+                or new.close_time.iloc[0] >= self.df.close_time.iloc[start - 1]
+            ),
+        )
+        object.__setattr__(frame, "buffer", buffer)
+        return frame
 
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.union
     def union(self, other: OHLCFrame):
@@ -354,73 +706,43 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         # special empty case => return the other one.
         # This avoid different columns issue when dataframe is empty (open_time is not the index - pandas 1.1.5)
         if self.df.empty:
-            return OHLCFrame(df=other.df.copy(deep=True))
+            if self.precision is not None:
+                return other.with_precision(self.precision)
+            return OHLCFrame(df=other.df.copy(deep=True), precision=other.precision)
         if other.df.empty:
-            return OHLCFrame(df=self.df.copy(deep=True))
+            return OHLCFrame(df=self.df.copy(deep=True), precision=self.precision)
+
+        # the result is stored as self is.
+        other = other.with_precision(self.precision)
 
-        # otherwise we need to merge
-        newdf_noidx = self.df.reset_index(drop=False).merge(
-            other.df.reset_index(drop=False), how="outer"
+        # otherwise we need to merge.
+        # open_time is unique in each frame, so conflicts are only between one candle of self and one of other.
+        common = self.df.index.intersection(other.df.index)
+        mine = self.df.loc[common]
+        theirs = other.df.loc[common]
+
+        better = self._better(mine, theirs)
+
+        newdf = pd.concat(
+            [
+                self.df[~self.df.index.isin(common[better])],
+                other.df[~other.df.index.isin(common[~better])],
+            ]
         )
 
-        # Note : previous merging attempts with "aggregate" and function application failed
-        # on tricky bugs/pandas limitations...
-        # Attempting a different way based on resolving duplicates in groups and replacing.
-        dups = newdf_noidx.duplicated(subset="open_time", keep=False)
-
-        dupgroups = newdf_noidx[dups].groupby(by="open_time")
-
-        # keeping all non-duplicates in boolean filter
-        grpfltr = ~newdf_noidx.open_time.isin(dupgroups.groups)
-
-        for grp, frm in dupgroups:
-            best_idx = frm.iloc[0].name  # picking first in frame
-            for el in frm.itertuples():
-                if (
-                    el.num_trades > frm.loc[best_idx].num_trades
-                    or el.volume > frm.loc[best_idx].volume
-                    or (
-                        (
-                            el.high >= frm.loc[best_idx].high
-                            and el.low < frm.loc[best_idx].low
-                        )
-                        or (
-                            el.high > frm.loc[best_idx].high
-                            and el.low <= frm.loc[best_idx].low
-                        )
-                    )
-                ):
-                    # keep only the best index
-                    best_idx = (
-                        el.Index
-                    )  # because ".name" becomes "Index" in Pandas tuples...
-
-            # here we have hte best candle index
-            # merge in group filter (set it to true, all other in same group must remain false)
-            grpfltr = grpfltr | (grpfltr.index == best_idx)
-
-        # replace groups into merged dataframe
-        newdf_noidx = newdf_noidx[grpfltr]
-
-        # the OHLCFrame constructor will reindex properly.
-        return OHLCFrame(df=newdf_noidx)
+        # the OHLCFrame constructor will sort properly.
+        return OHLCFrame(df=newdf, precision=self.precision)
 
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.difference
     def difference(self, other: OHLCFrame):
-        # finding identical indexes in both dataframe, and extracting subset
-
-        ix = self.intersection(other)
-
-        candles = []
-        # very naive implementation. TODO : optimize
         # Reminder : this is just a set of candles, no candle merging.
-        for t in self:
-            # Note : in case of conflict (same index, different values), this has the effect of
-            #        ignoring other and prioritizing having candles from self in result.
-            if t not in ix:
-                candles.append(t)
+        # Note : in case of conflict (same index, different values), this has the effect of
+        #        ignoring other and prioritizing having candles from self in result.
+        ix = self._equal_index(other)
 
-        return OHLCFrame.from_candleslist(*candles)
+        if len(ix) == len(self.df):
+            return OHLCFrame.from_candleslist(precision=self.precision)
+        return OHLCFrame(df=self.df[~self.df.index.isin(ix)], precision=self.precision)
 
     def __str__(self):
         # optimize before display (high decimal precision is not manageable by humans)
@@ -428,6 +750,9 @@ class OHLCFrame:  # TODO : manipulating th class itself (with a meta class) can
         return tabulate(optdf, headers="keys", tablefmt="psql")
 
     def optimized(self) -> pd.DataFrame:
+        if self.precision is not None:
+            # scaled int64 cannot be displayed as such
+            return self.precision.to_float(self.df)
         opt_copy = self.df.copy(deep=True)
         opt_copy.convert_dtypes()
         return opt_copy
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import namedtuple
 from dataclasses import fields
 from datetime import MAXYEAR, MINYEAR, datetime, timedelta, timezone
 from decimal import Decimal
@@ -210,5 +211,11 @@ is_best_match: {self.is_best_match}
         return [f.name for f in fields(self)]
 
 
+# Lightweight, unvalidated, PriceCandle, for fast iteration over frames (validation happens on ingest).
+PriceCandleRecord = namedtuple(
+    "PriceCandleRecord", [f.name for f in fields(PriceCandle)]
+)
+
+
 if __name__ == "__main__":
     print(PriceCandle.strategy().example())
@@ -0,0 +1,147 @@
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import hypothesis.strategies as st
+from hypothesis import HealthCheck, given, settings
+
+from aiobinance.api.model.bars import BarBuilder, BarKind
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.tradeframe import TradeFrame
+
+start_ms = int(datetime(2020, 8, 27, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def mytrades(qties, times=None):
+    """ a frame of trades, as retrieved from binance, with the given quantities """
+    times = range(0, 1000 * len(qties), 1000) if times is None else times
+    return TradeFrame.from_mytrades(
+        "COTIBNB",
+        [
+            {
+                "symbol": "COTIBNB",
+                "id": 1000 + i,
+                "orderId": 5000 + i,
+                "orderListId": -1,
+                "price": f"0.003{i % 7}",
+                "qty": qty,
+                "quoteQty": str(Decimal(qty) * Decimal(f"0.003{i % 7}")),
+                "commission": "0.00066035",
+                "commissionAsset": "BNB",
+                "time": start_ms + t,
+                "isBuyer": i % 2 == 0,
+                "isMaker": i % 3 == 0,
+                "isBestMatch": True,
+            }
+            for i, (qty, t) in enumerate(zip(qties, times))
+        ],
+    )
+
+
+class TestBarBuilder(unittest.TestCase):
+    def test_tick(self):
+        trades = mytrades(["1.0"] * 10)
+        builder = BarBuilder(BarKind.tick, 3)
+        bars = builder(trades)
+
+        assert list(bars.df.num_trades) == [3, 3, 3, 1]
+        assert bars == builder.bars
+        assert bars.open_time == trades.time_utc[0]
+        assert list(bars.df.close) == [trades.df.price.iloc[i] for i in [2, 5, 8, 9]]
+        assert list(bars.df.high) == [
+            trades.df.price.iloc[s : s + 3].max() for s in [0, 3, 6, 9]
+        ]
+
+        # trades already received are ignored, the open bar gets the new ones
+        more = mytrades(["1.0"] * 13)
+        changed = builder(more)
+        assert list(changed.df.num_trades) == [3, 1]
+        assert list(builder.bars.df.num_trades) == [3, 3, 3, 3, 1]
+        assert builder.bars == BarBuilder(BarKind.tick, 3)(more)
+        # bars do not last a fixed timestep
+        assert builder.bars.interval is None and changed.interval is None
+        # bars returned before do not change
+        assert list(bars.df.num_trades) == [3, 3, 3, 1]
+
+    def test_volume(self):
+        trades = mytrades(["1.0", "2.0", "0.5", "7.0", "1.0", "0.5"])
+        bars = BarBuilder(BarKind.volume, "3")(trades)
+
+        # the excess of a large trade is carried, without empty bars
+        assert list(bars.df.volume) == [Decimal("3.0"), Decimal("7.5"), Decimal("1.5")]
+        assert list(bars.df.num_trades) == [2, 2, 2]
+        # taker buy volume, when we bought as taker or sold as maker
+        assert list(bars.df.taker_base_vol) == [
+            Decimal("0"),
+            Decimal("7.5"),
+            Decimal("1.0"),
+        ]
+
+    def test_dollar(self):
+        trades = mytrades(["100"] * 10)
+        bars = BarBuilder(BarKind.dollar, "0.9")(trades)
+        assert sum(bars.df.qav) == sum(trades.df.quote_qty)
+        # bars end when the traded amount reaches a multiple of the threshold
+        traded = bars.df.qav.cumsum()
+        for i, amount in enumerate(traded.iloc[:-1]):
+            assert amount // Decimal("0.9") == i + 1
+
+    def test_same_time(self):
+        # many bars in the same millisecond still have a unique open_time
+        trades = mytrades(["1.0"] * 10, times=[0] * 10)
+        builder = BarBuilder(BarKind.tick, 2)
+        builder(trades[:1003])  # the first 4 trades, by id
+        builder(trades)
+        assert len(builder.bars) == 5
+        assert builder.bars.df.index.is_unique
+        assert builder.bars.df.index.is_monotonic_increasing
+
+    @given(
+        qties=st.lists(
+            st.decimals(min_value="0.01", max_value="10", places=2).map(str),
+            min_size=1,
+            max_size=30,
+        ),
+        cut=st.integers(min_value=0, max_value=30),
+        kind=st.sampled_from(BarKind),
+    )
+    @settings(suppress_health_check=[HealthCheck.too_slow], deadline=None)
+    def test_incremental(self, qties, cut, kind):
+        trades = mytrades(qties)
+        threshold = 4 if kind == BarKind.tick else "5.5"
+        expected = BarBuilder(kind, threshold)(trades)
+
+        # receiving trades in two parts gives the same bars
+        builder = BarBuilder(kind, threshold)
+        builder(trades[: trades.time_utc[min(cut, len(trades) - 1)]])
+        builder(trades)
+        assert builder.bars == expected
+
+        # with scaled int64 as well
+        precision = FixedPoint(places={"price": 8, "qty": 8, "quote_qty": 16})
+        fixed = BarBuilder(kind, threshold)(trades.with_precision(precision))
+        assert fixed == expected.with_precision(fixed.precision)
+
+    def test_large_volumes(self):
+        # each trade fits in int64 with 8 decimal places, not the volume of a bar
+        trades = mytrades(["90000000000.00000000"] * 4)
+        precision = FixedPoint(places={"price": 8, "qty": 8, "quote_qty": 8})
+        builder = BarBuilder(BarKind.tick, 3)
+        builder(trades[:1001].with_precision(precision))
+        bars = builder(trades.with_precision(precision))
+
+        # Note : the sums are not wrapped around, the bars are stored as Decimal instead
+        assert bars.precision is None
+        assert list(builder.bars.df.volume) == [
+            Decimal("270000000000"),
+            Decimal("90000000000"),
+        ]
+        assert builder.bars == BarBuilder(BarKind.tick, 3)(trades)
+
+    def test_threshold(self):
+        with self.assertRaises(ValueError):
+            BarBuilder(BarKind.volume, "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from aiobinance.api.model.coverage import Coverage
+
+start = datetime(2020, 8, 27, tzinfo=timezone.utc)
+ms = timedelta(milliseconds=1)
+
+# ranges in [ms], as for binance requests
+ranges = st.tuples(
+    st.integers(min_value=0, max_value=10_000), st.integers(min_value=0, max_value=100)
+).map(lambda r: (start + r[0] * ms, start + (r[0] + r[1]) * ms))
+
+
+class TestCoverage(unittest.TestCase):
+    def test_gaps(self):
+        coverage = Coverage()
+        assert coverage.gaps(start, start + timedelta(hours=1)) == [
+            (start, start + timedelta(hours=1))
+        ]
+
+        coverage.add(start + timedelta(minutes=10), start + timedelta(minutes=20))
+        coverage.add(
+            start + timedelta(minutes=30), start + timedelta(minutes=40), empty=True
+        )
+
+        # only the middle of the range is missing
+        assert coverage.gaps(start, start + timedelta(hours=1)) == [
+            (start, start + timedelta(minutes=10) - ms),
+            (start + timedelta(minutes=20) + ms, start + timedelta(minutes=30) - ms),
+            (start + timedelta(minutes=40) + ms, start + timedelta(hours=1)),
+        ]
+        assert (
+            start + timedelta(minutes=12),
+            start + timedelta(minutes=15),
+        ) in coverage
+        assert (
+            start + timedelta(minutes=15),
+            start + timedelta(minutes=35),
+        ) not in coverage
+
+        # empty ranges are covered too
+        assert (
+            start + timedelta(minutes=30),
+            start + timedelta(minutes=40),
+        ) in coverage
+        assert (start + timedelta(minutes=35)) in coverage.empty
+        assert (start + timedelta(minutes=15)) not in coverage.empty
+
+    @given(added=st.lists(ranges), requested=ranges)
+    def test_gaps_complete(self, added, requested):
+        coverage = Coverage()
+        for r in added:
+            coverage.add(*r)
+
+        gaps = coverage.gaps(*requested)
+        # fetching the gaps covers the requested range
+        for g in gaps:
+            assert g not in coverage
+            assert requested[0] <= g[0] <= g[1] <= requested[1]
+            coverage.add(*g)
+        assert requested in coverage
+        assert coverage.gaps(*requested) == []
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import HealthCheck, given, settings
+
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.market_info import MarketInfo
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.pricecandle import PriceCandle
+from aiobinance.api.model.trade import Trade
+from aiobinance.api.model.tradeframe import TradeFrame
+
+# Binance usual precision
+candles_precision = FixedPoint(
+    places={
+        "open": 8,
+        "high": 8,
+        "low": 8,
+        "close": 8,
+        "volume": 8,
+        "qav": 8,
+        "taker_base_vol": 8,
+        "taker_quote_vol": 8,
+    }
+)
+
+trades_precision = FixedPoint(places={"price": 8, "qty": 8, "quote_qty": 8})
+
+# values that can be stored with this precision
+fixed_decimals = st.decimals(
+    min_value=Decimal(-(10 ** 9)), max_value=Decimal(10 ** 9), places=8
+)
+
+
+@st.composite
+def candles(draw, max_size=5):
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    return [
+        PriceCandle(
+            open_time=start + timedelta(minutes=i),
+            open=draw(fixed_decimals),
+            high=draw(fixed_decimals),
+            low=draw(fixed_decimals),
+            close=draw(fixed_decimals),
+            volume=draw(fixed_decimals),
+            close_time=start + timedelta(minutes=i + 1),
+            qav=draw(fixed_decimals),
+            num_trades=draw(st.integers(min_value=0, max_value=1000)),
+            taker_base_vol=draw(fixed_decimals),
+            taker_quote_vol=draw(fixed_decimals),
+            is_best_match=1,
+        )
+        # some candles are missing, to make set operations interesting
+        for i in draw(
+            st.sets(st.integers(min_value=0, max_value=10), max_size=max_size)
+        )
+    ]
+
+
+@st.composite
+def trades(draw, max_size=5):
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    return [
+        Trade(
+            id=i,
+            time_utc=start + timedelta(seconds=i),
+            symbol="COTIBNB",
+            price=draw(fixed_decimals),
+            qty=draw(fixed_decimals),
+            quote_qty=draw(fixed_decimals),
+            commission=draw(st.decimals(allow_nan=False, allow_infinity=False)),
+            commission_asset="BNB",
+            is_buyer=draw(st.booleans()),
+            is_maker=draw(st.booleans()),
+        )
+        for i in draw(
+            st.sets(st.integers(min_value=0, max_value=10), max_size=max_size)
+        )
+    ]
+
+
+class TestFixedPoint(unittest.TestCase):
+    @given(values=st.lists(fixed_decimals))
+    def test_roundtrip(self, values):
+        ints = candles_precision.to_int("open", values)
+        assert ints.dtype == np.dtype("int64")
+        assert list(candles_precision.to_decimal("open", ints)) == values
+
+    @given(values=st.lists(fixed_decimals))
+    def test_strings(self, values):
+        # as binance sends them, with all decimal places, and as python writes them
+        for strings in (
+            [f"{v:.8f}" for v in values],
+            [str(v) for v in values],
+            np.array([str(v) for v in values], dtype=object),
+        ):
+            ints = candles_precision.to_int("open", strings)
+            assert list(ints) == list(candles_precision.to_int("open", values))
+            assert list(candles_precision.to_decimal("open", ints)) == values
+
+    def test_int64_bounds(self):
+        bounds = [Decimal(i).scaleb(-8) for i in (2 ** 63 - 1, -(2 ** 63))]
+        ints = candles_precision.to_int("open", bounds)
+        assert list(ints) == [2 ** 63 - 1, -(2 ** 63)]
+        assert list(candles_precision.to_decimal("open", ints)) == bounds
+
+    def test_shared_decimals(self):
+        # one Decimal is made for each distinct value, however many rows there are
+        ints = np.tile(np.array([100_000_000, 250_000_000, -1]), 100_000)
+        decimals = candles_precision.to_decimal("open", ints)
+        assert len(decimals) == 300_000
+        assert len({id(d) for d in decimals}) == 3
+        assert list(decimals[:3]) == [
+            Decimal("1"),
+            Decimal("2.5"),
+            Decimal("-0.00000001"),
+        ]
+
+    def test_inexact(self):
+        with self.assertRaises(ValueError):
+            candles_precision.to_int("open", [Decimal("0.123456789")])
+        with self.assertRaises(ValueError):
+            candles_precision.to_int("open", [Decimal(2 ** 63)])
+        with self.assertRaises(ValueError):
+            candles_precision.to_int("open", [Decimal("NaN")])
+        with self.assertRaises(ValueError):
+            candles_precision.to_int("open", ["1.000000001"])
+        with self.assertRaises(ValueError):
+            # a float 0.1 is not exactly 0.1
+            candles_precision.to_int("open", [0.1])
+
+    @given(mi=MarketInfo.strategy())
+    def test_from_market(self, mi):
+        fp = FixedPoint.for_candles(mi)
+        assert fp.places["open"] == mi.quote_asset_precision
+        assert fp.places["volume"] == mi.base_asset_precision
+
+        fp = FixedPoint.for_trades(mi)
+        assert fp.places["price"] == mi.quote_asset_precision
+        assert fp.places["qty"] == mi.base_asset_precision
+        assert "commission" not in fp.places
+
+    @given(cl1=candles(), cl2=candles())
+    @settings(suppress_health_check=[HealthCheck.too_slow], deadline=None)
+    def test_ohlcframe(self, cl1, cl2):
+        dec1 = OHLCFrame.from_candleslist(*cl1)
+        fix1 = OHLCFrame.from_candleslist(*cl1, precision=candles_precision)
+        dec2 = OHLCFrame.from_candleslist(*cl2)
+        fix2 = OHLCFrame.from_candleslist(*cl2, precision=candles_precision)
+
+        if not fix1.empty:
+            assert fix1.df.open.dtype == np.dtype("int64")
+            assert fix1.high == dec1.high
+            assert fix1[cl1[0].open_time + timedelta(seconds=30)] == cl1[0]
+
+        # exact round trip
+        assert list(fix1) == list(dec1)
+        assert list(fix1.records()) == list(dec1.records())
+        # stored ints are iterated as they are
+        assert [r.volume for r in fix1.records(scaled=True)] == fix1.df.volume.tolist()
+        assert fix1.with_precision(None) == dec1
+        assert dec1.with_precision(candles_precision) == fix1
+
+        # same results as with Decimal, whatever the storage of other
+        assert fix1.union(fix2) == dec1.union(dec2)
+        assert fix1.union(dec2).precision == candles_precision
+        assert fix1.union(dec2) == dec1.union(dec2)
+        assert fix1.intersection(dec2) == dec1.intersection(dec2)
+        assert fix1.difference(fix2) == dec1.difference(dec2)
+
+    @given(tl1=trades(), tl2=trades())
+    @settings(suppress_health_check=[HealthCheck.too_slow], deadline=None)
+    def test_tradeframe(self, tl1, tl2):
+        dec1 = TradeFrame.from_tradeslist("COTIBNB", *tl1)
+        fix1 = TradeFrame.from_tradeslist("COTIBNB", *tl1, precision=trades_precision)
+        dec2 = TradeFrame.from_tradeslist("COTIBNB", *tl2)
+        fix2 = TradeFrame.from_tradeslist("COTIBNB", *tl2, precision=trades_precision)
+
+        if not fix1.empty:
+            assert fix1.df.price.dtype == np.dtype("int64")
+            assert fix1[tl1[0].id] == tl1[0]
+            # display and plots get floats
+            assert fix1.optimized().price.dtype == np.dtype("float64")
+
+        # exact round trip
+        assert list(fix1) == list(dec1)
+        assert list(fix1.records()) == list(dec1.records())
+        # stored ints are iterated as they are
+        assert [r.qty for r in fix1.records(scaled=True)] == fix1.df.qty.tolist()
+
+        # same results as with Decimal, whatever the storage of other
+        assert fix1.union(fix2) == dec1.union(dec2)
+        assert fix1.union(dec2) == dec1.union(dec2)
+        assert fix1.intersection(dec2) == dec1.intersection(dec2)
+        assert fix1.difference(fix2) == dec1.difference(dec2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,16 @@
 import dataclasses
 import unittest
-from datetime import timedelta, timezone
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
 import hypothesis.strategies as st
 import pandas as pd
 from hypothesis import HealthCheck, assume, given, reproduce_failure, settings
 
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.ohlcframe import OHLCFrame
 from aiobinance.api.model.pricecandle import PriceCandle
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
 
 # TMP : to temporary help us verify frame structure
 # TODO : do it in hte type itself somehow...
@@ -34,6 +37,30 @@ def assert_columns(ohlcframe):
     ) + ohlcframe.df.columns.to_list() == OHLCFrameColumns
 
 
+def klines(minutes, trades=42, start=datetime(2020, 1, 1, tzinfo=timezone.utc)):
+    """ a frame of 1m candles, as retrieved from binance, with prices varying with time """
+    start_ms = int(start.timestamp() * 1000)
+    return OHLCFrame.from_klines(
+        [
+            [
+                start_ms + m * 60_000,
+                f"0.00{1000 + m % 7}",
+                f"0.00{1100 + m % 13}",
+                f"0.00{900 + m % 11}",
+                f"0.00{1000 + m % 5}",
+                f"{1234 + m}.56000000",
+                start_ms + (m + 1) * 60_000 - 1,
+                "1.52400000",
+                trades,
+                "600.00000000",
+                "0.74100000",
+                "0",
+            ]
+            for m in minutes
+        ]
+    )
+
+
 class TestOHLCFrame(unittest.TestCase):
     @given(
         trade1=st.one_of(st.none(), PriceCandle.strategy()),
@@ -342,6 +369,150 @@ class TestOHLCFrame(unittest.TestCase):
             if c not in tf2:
                 assert c in dtf1
 
+    @given(
+        candles=st.lists(
+            PriceCandle.strategy(
+                # binance era minutes, to not have float imprecision when validating [ms] timestamps
+                timebounds=st.integers(min_value=0, max_value=10 ** 7).map(
+                    lambda m: (
+                        datetime(2017, 1, 1) + timedelta(minutes=m),
+                        datetime(2017, 1, 1) + timedelta(minutes=m + 1),
+                    )
+                )
+            ),
+            max_size=5,
+            unique_by=lambda c: c.open_time,
+        )
+    )
+    @settings(suppress_health_check=[HealthCheck.too_slow], deadline=None)
+    def test_from_klines(self, candles):
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        # binance klines have [ms] timestamps and decimals as strings
+        klines = [
+            [
+                (v - epoch) // timedelta(milliseconds=1)
+                if isinstance(v, datetime)
+                else str(v)
+                if isinstance(v, Decimal)
+                else v
+                for v in dataclasses.astuple(c)
+            ]
+            for c in candles
+        ]
+
+        frame = OHLCFrame.from_klines(klines)
+        assert_columns(frame)
+        assert len(frame) == len(candles)
+
+        # same frame as when validating each row
+        assert frame == OHLCFrame.from_klines(klines, validate=True)
+
+    def test_extend(self):
+        frame = klines(range(3))
+
+        # the last candle is replaced by a better one, and the next one is appended
+        update = klines([2, 3], trades=50)
+        extended = frame.extend(update)
+        assert_columns(extended)
+        assert extended == frame.union(update)
+        assert extended.close_sorted
+        assert len(extended) == 4
+
+        # later candles are written in the same buffer, without copying previous ones
+        more = extended.extend(klines([3, 4], trades=10))
+        assert more.buffer is extended.buffer
+        assert more == extended.union(klines([3, 4], trades=10))
+        assert len(more) == 5 and len(extended) == 4
+        assert more.df.num_trades.iloc[3] == 50  # not better, not replaced
+
+        # unless forced, like for the current candle
+        forced = more.extend(klines([4], trades=5), force=True)
+        assert forced.df.num_trades.iloc[-1] == 5
+        # in another buffer, as frames do not change
+        assert forced.buffer is not more.buffer
+        assert more.df.num_trades.iloc[-1] == 10
+
+        # an earlier frame cannot write in the spare rows used by a later one
+        forked = extended.extend(klines([4], trades=60))
+        assert forked.buffer is not more.buffer
+        assert more.df.num_trades.iloc[-1] == 10
+        assert forked.df.num_trades.iloc[-1] == 60
+
+        # a gap, or candles not at the end, are not appended
+        assert frame.extend(klines([10])) == frame.union(klines([10]))
+        assert frame.extend(klines([1, 3])) is None
+        assert frame.extend(OHLCFrame()) is frame
+
+    def test_resample(self):
+        frame = klines(range(2, 1000))
+        fivemin = TimeStep(TimeIntervalDelta.minutely_5)
+        resampled = frame.resample(fivemin)
+        assert_columns(resampled)
+        assert resampled.interval == fivemin
+
+        # aligned like binance candles, the first and last ones have fewer candles
+        assert len(resampled) == 200
+        assert resampled.df.index[0] == datetime(2020, 1, 1)
+        assert resampled.df.num_trades.iloc[0] == 3 * 42
+        assert resampled.close_time == datetime(
+            2020, 1, 1, 16, 40, tzinfo=timezone.utc
+        ) - timedelta(milliseconds=1)
+
+        # same as aggregating with pandas
+        expected = frame.df.resample("5min").agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+                "qav": "sum",
+                "num_trades": "sum",
+            }
+        )
+        for c in expected.columns:
+            assert (resampled.df[c] == expected[c]).all(), c
+
+        # with precision as well
+        precise = frame.with_precision(
+            FixedPoint(
+                places={
+                    c: 8
+                    for c in ["open", "high", "low", "close", "volume", "qav"]
+                    + ["taker_base_vol", "taker_quote_vol"]
+                }
+            )
+        )
+        assert precise.resample(fivemin) == resampled.with_precision(precise.precision)
+
+        # weekly candles open on monday
+        weekly = frame.resample(TimeStep(TimeIntervalDelta.weekly))
+        assert weekly.df.index[0] == datetime(2019, 12, 30)
+        assert len(weekly) == 1
+
+        assert OHLCFrame().resample(fivemin).empty
+
+    def test_resample_large_volumes(self):
+        # each volume fits in int64 with 8 decimal places, not the sum of an hour
+        frame = klines(range(60))
+        frame.df["volume"] = Decimal("90000000000.00000000")
+        precise = frame.with_precision(FixedPoint(places={"volume": 8}))
+
+        hourly = precise.resample(TimeStep(TimeIntervalDelta.hourly))
+        # Note : the sum is not wrapped around, the candle is stored as Decimal instead
+        assert hourly.precision is None
+        assert hourly.df.volume.iloc[0] == 60 * Decimal("90000000000.00000000")
+        assert hourly == frame.resample(TimeStep(TimeIntervalDelta.hourly))
+
+    @given(ohlcv=OHLCFrame.strategy())
+    def test_records(self, ohlcv: OHLCFrame):
+        records = list(ohlcv.records())
+        assert len(records) == len(ohlcv)
+
+        for r, c in zip(records, ohlcv):  # same values as the validated candles
+            assert PriceCandle(**r._asdict()) == c
+            assert c in ohlcv
+
     @given(ohlcv=OHLCFrame.strategy())
     def test_str(self, ohlcv: OHLCFrame):
         # Check sensible information is displayed (order doesnt matter for output to human)
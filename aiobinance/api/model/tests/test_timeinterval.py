@@ -1,5 +1,5 @@
 import unittest
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from hypothesis import given
 from hypothesis import strategies as st
@@ -82,6 +82,34 @@ class TestTimeStep(unittest.TestCase):
 
         assert ts == td
 
+    @given(
+        tdelta=st.sampled_from(TimeIntervalDelta),
+        dt=st.datetimes(min_value=datetime(2017, 1, 1)),
+    )
+    def test_floor(self, tdelta, dt):
+        ts = TimeStep(tdelta)
+        floor = ts.floor(dt)
+
+        # the open time of the candle containing dt
+        assert floor <= dt < floor + tdelta.value
+        assert ts.floor(floor) == floor
+        if tdelta == TimeIntervalDelta.weekly:
+            assert floor.weekday() == 0  # like binance, weekly candles open on monday
+        else:
+            assert (floor - datetime(1970, 1, 1)) % tdelta.value == timedelta(0)
+
+    def test_divides(self):
+        minutely = TimeStep(TimeIntervalDelta.minutely)
+        daily = TimeStep(TimeIntervalDelta.daily)
+        for tdelta in TimeIntervalDelta:
+            assert minutely.divides(TimeStep(tdelta))
+
+        assert daily.divides(TimeStep(TimeIntervalDelta.weekly))
+        assert not TimeStep(TimeIntervalDelta.daily_3).divides(
+            TimeStep(TimeIntervalDelta.weekly)
+        )
+        assert not daily.divides(TimeStep(TimeIntervalDelta.hourly_12))
+
     # TODO: TimeInterval tests
     # @given(tdelta=st.one_of(st.none(), st.timedeltas()))
     # def test_union(self, tdelta):
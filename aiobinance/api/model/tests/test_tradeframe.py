@@ -1,6 +1,6 @@
 import dataclasses
 import unittest
-from datetime import timedelta, timezone
+from datetime import datetime, timedelta, timezone
 
 import hypothesis.strategies as st
 import pandas as pd
@@ -393,6 +393,96 @@ class TestTradeFrame(unittest.TestCase):
                 if c not in tf2:
                     assert c in dtf1
 
+    @given(
+        trades=st.lists(
+            Trade.strategy(symbols=st.just("COTIBNB")).filter(
+                # binance era, to not have float imprecision when validating [ms] timestamps
+                lambda t: datetime(2017, 1, 1, tzinfo=timezone.utc)
+                <= t.time_utc
+                <= datetime(2100, 1, 1, tzinfo=timezone.utc)
+            ),
+            max_size=5,
+            unique_by=lambda t: t.id,
+        )
+    )
+    @settings(suppress_health_check=[HealthCheck.too_slow], deadline=None)
+    def test_from_mytrades(self, trades):
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        # binance myTrades json
+        mytrades = [
+            {
+                "symbol": t.symbol,
+                "id": t.id,
+                "orderId": t.order_id,
+                "orderListId": t.order_list_id,
+                "price": str(t.price),
+                "qty": str(t.qty),
+                "quoteQty": str(t.quote_qty),
+                "commission": str(t.commission),
+                "commissionAsset": t.commission_asset,
+                "time": (t.time_utc - epoch) // timedelta(milliseconds=1),
+                "isBuyer": t.is_buyer,
+                "isMaker": t.is_maker,
+                "isBestMatch": t.is_best_match,
+            }
+            for t in trades
+        ]
+
+        frame = TradeFrame.from_mytrades("COTIBNB", mytrades)
+        assert_columns(frame)
+        assert len(frame) == len(trades)
+
+        # same frame as when validating each row
+        assert frame == TradeFrame.from_mytrades("COTIBNB", mytrades, validate=True)
+
+    def test_unsorted_times(self):
+        start = datetime(2020, 8, 27, tzinfo=timezone.utc)
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        # some trade ids do not follow time
+        frame = TradeFrame.from_mytrades(
+            "COTIBNB",
+            [
+                {
+                    "symbol": "COTIBNB",
+                    "id": 1000 + i,
+                    "orderId": 5000,
+                    "orderListId": -1,
+                    "price": "0.00326100",
+                    "qty": "300.00000000",
+                    "quoteQty": "0.97830000",
+                    "commission": "0.00066035",
+                    "commissionAsset": "BNB",
+                    "time": (start - epoch) // timedelta(milliseconds=1) + s * 1000,
+                    "isBuyer": False,
+                    "isMaker": True,
+                    "isBestMatch": True,
+                }
+                for i, s in enumerate([0, 3, 1, 2])
+            ],
+        )
+        sorted_times = frame.sorted_times
+        assert list(sorted_times) == sorted(frame.df.time_utc)
+
+        # trades in the time range, in id order
+        assert frame[
+            start + timedelta(seconds=1) : start + timedelta(seconds=2)
+        ].id == [
+            1002,
+            1003,
+        ]
+        assert frame[start + timedelta(seconds=2) :].id == [1001, 1003]
+        # Note : times are sorted once, for all slices
+        assert frame.sorted_times is sorted_times
+
+    @given(tradeframe=TradeFrame.strategy())
+    def test_records(self, tradeframe: TradeFrame):
+        records = list(tradeframe.records())
+        assert len(records) == len(tradeframe)
+
+        for r, t in zip(records, tradeframe):  # same values as the validated trades
+            assert Trade(**r._asdict()) == t
+            assert t in tradeframe
+
     @given(tradeframe=TradeFrame.strategy())
     def test_str(self, tradeframe: TradeFrame):
         # Check sensible information is displayed (order doesnt matter for output to human)
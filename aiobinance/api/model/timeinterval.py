@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from typing import ClassVar, Dict, Optional, Union
 
 import portion
 from portion import Interval
 
+_epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_ms(dt: datetime) -> int:
+    """ binance timestamp of an aware datetime, without float rounding """
+    return (dt - _epoch) // timedelta(milliseconds=1)
+
+
+def from_ms(ms: int) -> datetime:
+    return _epoch + timedelta(milliseconds=ms)
+
 
 # TODO: get rid of that, TimeStep will do the job
 class TimeIntervalEnum(Enum):
@@ -182,6 +193,25 @@ class TimeStep:
     def to_api(self) -> str:
         return self._api_convert[self.delta]
 
+    @property
+    def origin(self) -> datetime:
+        """The open time of one candle, aligning all candles of this step, like on binance.
+        Weekly candles open on monday, others are aligned on the epoch."""
+        if self.delta == TimeIntervalDelta.weekly:
+            return datetime(1970, 1, 5)
+        return datetime(1970, 1, 1)
+
+    def floor(self, dt: datetime) -> datetime:
+        """ the open time of the candle of this step containing dt """
+        origin = self.origin.replace(tzinfo=dt.tzinfo)
+        return dt - (dt - origin) % self.delta.value
+
+    def divides(self, other: TimeStep) -> bool:
+        """ whether candles of other can be built from candles of this step """
+        return other.delta.value % self.delta.value == timedelta(0) and (
+            other.origin - self.origin
+        ) % self.delta.value == timedelta(0)
+
 
 class TimeInterval:
     # New class to manipulate time intervals
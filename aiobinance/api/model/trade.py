@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import namedtuple
 from dataclasses import asdict, field, fields
 from datetime import datetime, timezone
 from decimal import Decimal, getcontext
@@ -157,6 +158,10 @@ class Trade:
         return [f.name for f in fields(self)]
 
 
+# Lightweight, unvalidated, Trade, for fast iteration over frames (validation happens on ingest).
+TradeRecord = namedtuple("TradeRecord", [f.name for f in fields(Trade)])
+
+
 if __name__ == "__main__":
 
     print(Trade.strategy().example())
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass, field, fields
-from datetime import datetime, timezone
+from dataclasses import asdict, astuple, dataclass, field, fields
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal, getcontext
-from typing import Iterable, List, Optional, Union
+from typing import Iterable, Iterator, List, Optional, Union
 
 import hypothesis.strategies as st
 import numpy as np
@@ -15,9 +15,11 @@ from pydantic import validator
 # Leveraging pydantic to validate based on type hints
 from tabulate import tabulate
 
+from aiobinance.api.model import columns
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.order import OrderSide
 from aiobinance.api.model.timeinterval import TimeInterval
-from aiobinance.api.model.trade import Trade
+from aiobinance.api.model.trade import Trade, TradeRecord
 
 
 # Note : these are python dataclasses as pydantic cannot really typecheck dataframe content...
@@ -37,6 +39,17 @@ class TradeFrame:
     bounds: Optional[TimeInterval] = field(default=None)
     # TODO : handle known absence of data... ???
 
+    # when set, decimal columns are stored as scaled int64 in the dataframe
+    precision: Optional[FixedPoint] = field(default=None)
+
+    # positions of trades sorted by time_utc, when the id order is not the time order, and their times.
+    time_order: Optional[np.ndarray] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+    sorted_times: Optional[np.ndarray] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+
     @property
     def empty(self) -> bool:
         return self.df.empty
@@ -115,7 +128,9 @@ class TradeFrame:
         return TradeFrame.from_tradeslist(symbol, *tls)
 
     @classmethod
-    def from_tradeslist(cls, symbol: str, *trades: Trade):
+    def from_tradeslist(
+        cls, symbol: str, *trades: Trade, precision: Optional[FixedPoint] = None
+    ):
         # related : https://github.com/pandas-dev/pandas/issues/9216
         # building structured numpy array to specify optimal dtypes
         # Ref : https://numpy.org/doc/stable/user/basics.rec.html
@@ -140,8 +155,88 @@ class TradeFrame:
         df = pd.DataFrame(
             data=npa
         )  # TODO : use nparray directly ??? CAREFUL : numpy doesnt do timezones...
+        if precision is not None:
+            df = precision.encode(df)
 
-        return cls(symbol=symbol, df=df)
+        return cls(symbol=symbol, df=df, precision=precision)
+
+    @classmethod
+    def from_mytrades(
+        cls,
+        symbol: str,
+        rows: List[dict],
+        precision: Optional[FixedPoint] = None,
+        validate: bool = False,
+    ):
+        """Builds a frame from binance myTrades, converting values one column at a time.
+        With validate, a Trade is built for each row instead, which is much slower."""
+        # Ref : https://binance-docs.github.io/apidocs/spot/en/#account-trade-list-user_data
+        if validate:
+            return cls.from_tradeslist(
+                symbol,
+                *(
+                    Trade(
+                        time_utc=r["time"] * 1e-3,  # converting [ms] to [s] as float
+                        symbol=r["symbol"],
+                        id=r["id"],
+                        order_id=r["orderId"],
+                        order_list_id=r["orderListId"],
+                        price=r["price"],
+                        qty=r["qty"],
+                        quote_qty=r["quoteQty"],
+                        commission=r["commission"],
+                        commission_asset=r["commissionAsset"],
+                        is_buyer=r["isBuyer"],
+                        is_maker=r["isMaker"],
+                        is_best_match=r["isBestMatch"],
+                    )
+                    for r in rows
+                ),
+                precision=precision,
+            )
+        if not rows:
+            return cls.from_tradeslist(symbol, precision=precision)
+
+        def raw(key: str) -> List:
+            return [r[key] for r in rows]
+
+        df = pd.DataFrame(
+            {
+                "id": columns.integers("id", raw("id"), dtype="uint64"),
+                "time_utc": columns.datetimes_from_ms("time_utc", raw("time")),
+                "symbol": columns.objects("symbol", raw("symbol")),
+                "price": columns.decimals("price", raw("price")),
+                "qty": columns.decimals("qty", raw("qty")),
+                "quote_qty": columns.decimals("quote_qty", raw("quoteQty")),
+                "commission": columns.decimals("commission", raw("commission")),
+                "commission_asset": columns.objects(
+                    "commission_asset", raw("commissionAsset")
+                ),
+                "is_buyer": columns.booleans("is_buyer", raw("isBuyer")),
+                "is_maker": columns.booleans("is_maker", raw("isMaker")),
+                "order_id": columns.objects("order_id", raw("orderId")),
+                "order_list_id": columns.objects("order_list_id", raw("orderListId")),
+                "is_best_match": columns.booleans(
+                    "is_best_match", raw("isBestMatch"), optional=True
+                ),
+            }
+        )
+        if precision is not None:
+            df = precision.encode(df)
+        return cls(symbol=symbol, df=df, precision=precision)
+
+    def _decoded(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ the dataframe with Decimal columns, as in Trade """
+        return df if self.precision is None else self.precision.decode(df)
+
+    def with_precision(self, precision: Optional[FixedPoint]) -> TradeFrame:
+        """ the same trades, stored with another precision (None for Decimal) """
+        if precision == self.precision:
+            return self
+        df = self._decoded(self.df)
+        if precision is not None:
+            df = precision.encode(df)
+        return TradeFrame(symbol=self.symbol, df=df, precision=precision)
 
     def as_datasource(self) -> ColumnDataSource:
         plotdf = self.optimized()
@@ -209,15 +304,72 @@ class TradeFrame:
         # finally enforcing dtypes:
         # TODO
 
+        # Note : binance trade ids usually follow time, so we only need a secondary order in rare cases.
+        if not self.df.time_utc.is_monotonic_increasing:
+            times = self.df.time_utc.to_numpy()
+            object.__setattr__(self, "time_order", np.argsort(times, kind="stable"))
+            # Note : computed once, for every time slice to be a binary search only
+            object.__setattr__(self, "sorted_times", times[self.time_order])
+
+    def _selector(
+        self, start: Optional[datetime], stop: Optional[datetime]
+    ) -> Union[slice, np.ndarray]:
+        """Selects the trades with start <= time_utc <= stop, with naive UTC datetimes, at microsecond precision.
+        This is a slice of positions found by binary search, or sorted positions if the id order is not the time order.
+        """
+        if self.df.empty:
+            return slice(0, 0)
+
+        times = (
+            self.df.time_utc.to_numpy()
+            if self.sorted_times is None
+            else self.sorted_times
+        )
+
+        # REMINDER : precision matters here (python datetime precision is microsecond)
+        first = pd.Timestamp(times[0]).to_pydatetime(warn=False)
+        last = pd.Timestamp(times[-1]).to_pydatetime(warn=False)
+
+        # checking bounds first, to not overflow with datetimes pandas cannot represent
+        if (start is not None and start > last) or (stop is not None and stop < first):
+            return slice(0, 0)
+
+        begin = (
+            0
+            if start is None or start <= first
+            else times.searchsorted(np.datetime64(start, "ns"), side="left")
+        )
+        end = (
+            len(times)
+            if stop is None or stop >= last
+            # time_utc in the same microsecond as stop is still before stop
+            else times.searchsorted(
+                np.datetime64(stop + timedelta(microseconds=1), "ns"), side="left"
+            )
+        )
+        end = max(begin, end)
+
+        if self.time_order is None:
+            return slice(begin, end)
+        # keeping the id order in the result
+        return np.sort(self.time_order[begin:end])
+
     def __contains__(self, item: Union[Trade, int, datetime]):
         if isinstance(item, Trade):
-            for t in self:  # iterates and cast to Trade
-                if t == item:  # using Trade equality
+            record = TradeRecord(
+                *(
+                    # explicitely drop timezone after converting to UTC
+                    v.astimezone(tz=timezone.utc).replace(tzinfo=None)
+                    if isinstance(v, datetime)
+                    else v
+                    for v in astuple(item)
+                )
+            )
+            for r in self.records():
+                if r == record:
                     return True
         elif isinstance(item, int):
-            for t in self:
-                if t.id == item:
-                    return True
+            return item in self.df.index
         elif isinstance(
             item, datetime
         ):  # exact match (TODO : maybe take first trade before and first after ?)
@@ -225,15 +377,11 @@ class TradeFrame:
                 item.tzinfo is None
             ):  # because we will do a tz-aware comparison with item
                 item = item.replace(tzinfo=timezone.utc)
-            # converting datetime to utc in any case
-            item = item.astimezone(tz=timezone.utc)
-
-            for t in self:
-                # Note : same semantics as getitem
-                if (
-                    t.time_utc == item  # CAREFUL: tz-aware comparison
-                ):  # checking *exact* time match
-                    return True
+            # converting datetime to utc in any case, and unaware to compare with numpy values
+            item = item.astimezone(tz=timezone.utc).replace(tzinfo=None)
+
+            # Note : same semantics as getitem, checking *exact* time match
+            return len(self.df.iloc[self._selector(item, item)]) > 0
         return False
 
     def __eq__(self, other: TradeFrame) -> bool:
@@ -245,8 +393,10 @@ class TradeFrame:
             return True
         elif len(self) == len(other):
             # BEWARE : https://github.com/pandas-dev/pandas/issues/20442
-            for s, o in zip(self, other):  # this iterates and cast to Trade
-                if s != o:  # here we use Trade.__eq__ !
+            # Note : values stored the same way are compared as they are
+            scaled = self.precision == other.precision
+            for s, o in zip(self.records(scaled), other.records(scaled)):
+                if s != o:
                     break
             else:
                 return True
@@ -263,7 +413,12 @@ class TradeFrame:
                 return Trade(
                     **{
                         self.df.index.name: item,  # recovering trade id (index value)
-                        **rs.to_dict(),
+                        **{
+                            k: v
+                            if self.precision is None
+                            else self.precision.decode_value(k, v)
+                            for k, v in rs.to_dict().items()
+                        },
                     }
                 )
 
@@ -278,64 +433,47 @@ class TradeFrame:
                 # converting datetime to unaware timezone, in utc. to allow comparison with unaware numpy values.
                 item = item.astimezone(tz=timezone.utc).replace(tzinfo=None)
 
-            rs = self.df.loc[self.df.time_utc.astype(dtype="datetime64[us]") == item]
+            rs = self.df.iloc[self._selector(item, item)]
 
             if len(rs) == 1:
-                return Trade(**rs.reset_index(drop=False).iloc[0])
+                return Trade(**self._decoded(rs).reset_index(drop=False).iloc[0])
             elif len(rs) == 0:
                 raise KeyError(f"Invalid index {item}")
             else:
-                return TradeFrame(symbol=self.symbol, df=rs)
+                return TradeFrame(symbol=self.symbol, df=rs, precision=self.precision)
 
         elif isinstance(item, slice):
             if item.start is None and item.stop is None:
                 return TradeFrame(
-                    symbol=self.symbol, df=self.df.copy()
+                    symbol=self.symbol, df=self.df.copy(), precision=self.precision
                 )  # just duplicate data
 
             # relying on pandas indexing if slice of ids:
             if isinstance(item.start, int) or isinstance(item.stop, int):
-                return TradeFrame(symbol=self.symbol, df=self.df.loc[item])
-
-            # Otherwise: dataframe slice handled by pandas boolean indexer
-            try:
-                selector = pd.Series({i: True for i in self.df.index})
-
-                if item.start is not None and isinstance(item.start, datetime):
-                    if item.start.tzinfo is not None:
-                        # converting datetime to unaware timezone, in utc. to allow comparison with unaware numpy values.
-                        start = item.start.astimezone(tz=timezone.utc).replace(
-                            tzinfo=None
-                        )
-                    else:
-                        start = item.start
-                    selector = selector & (
-                        start <= self.df.time_utc.astype(dtype="datetime64[us]")
-                    )
-                if item.stop is not None and isinstance(item.stop, datetime):
-                    if item.stop.tzinfo is not None:
-                        stop = item.stop.astimezone(tz=timezone.utc).replace(
-                            tzinfo=None
-                        )
-                    else:
-                        stop = item.stop
-                    selector = selector & (
-                        self.df.time_utc.astype(dtype="datetime64[us]") <= stop
-                    )
-
-                df = self.df.loc[selector]
-
-            except TypeError as te:
-                raise KeyError(
-                    f"{item} is too high a value for Trade.time_utc or Trade.id "
-                ) from te
+                return TradeFrame(
+                    symbol=self.symbol, df=self.df.loc[item], precision=self.precision
+                )
 
-            return TradeFrame(symbol=self.symbol, df=df)
+            # Otherwise: time slice, found by binary search
+            start = item.start if isinstance(item.start, datetime) else None
+            stop = item.stop if isinstance(item.stop, datetime) else None
+            if start is not None and start.tzinfo is not None:
+                # converting datetime to unaware timezone, in utc. to allow comparison with unaware numpy values.
+                start = start.astimezone(tz=timezone.utc).replace(tzinfo=None)
+            if stop is not None and stop.tzinfo is not None:
+                stop = stop.astimezone(tz=timezone.utc).replace(tzinfo=None)
+
+            # Note : a slice of positions gives a view on the same data, without copy.
+            return TradeFrame(
+                symbol=self.symbol,
+                df=self.df.iloc[self._selector(start, stop)],
+                precision=self.precision,
+            )
 
     # NO SETTING ON TRADES :they are immutable events.
 
     def __iter__(self):
-        for t in self.df.itertuples(index=True):
+        for t in self._decoded(self.df).itertuples(index=True):
             # CAREFUL : reset_index may create an index column (BUG ?)
             yield Trade(
                 **{
@@ -344,81 +482,107 @@ class TradeFrame:
                 }
             )
 
+    def records(self, scaled: bool = False) -> Iterator[TradeRecord]:
+        """Iterates on trades as lightweight records, without validation.
+        Datetimes are naive UTC, like in the dataframe, and no Trade is built.
+        When scaled, the columns of the precision are the int stored, of value * 10 ** precision.places,
+        without making Decimal objects for them."""
+        if self.df.empty:
+            return iter(())
+        df = self.df if scaled else self._decoded(self.df)
+        columns = [
+            df[c].to_numpy(dtype="datetime64[us]").astype(object)
+            if c == "time_utc"
+            else df[c].tolist()
+            for c in df.columns
+        ]
+        return map(TradeRecord._make, zip(df.index.tolist(), *columns))
+
     def __len__(self):
         return len(self.df)
 
+    def _equal_index(self, other: TradeFrame) -> pd.Index:
+        """ ids of the trades that are in both frames, with exactly the same values """
+        if self.df.empty or other.df.empty:
+            return pd.Index([], dtype="uint64", name="id")
+
+        # comparing values stored the same way
+        other = other.with_precision(self.precision)
+
+        common = self.df.index.intersection(other.df.index)
+        mine = self.df.loc[common]
+        theirs = other.df.loc[common]
+
+        equal = np.ones(len(common), dtype=bool)
+        for col in mine.columns:
+            if col == "time_utc":
+                # same precision as Trade (python datetime)
+                equal &= mine[col].to_numpy(dtype="datetime64[us]") == theirs[
+                    col
+                ].to_numpy(dtype="datetime64[us]")
+            else:
+                equal &= mine[col].to_numpy() == theirs[col].to_numpy()
+
+        return common[equal]
+
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.intersection
     def intersection(self, other: TradeFrame):
-        # extracting candles when there is *exact* equality
-        trades = []
-        # very naive implementation. TODO : optimize
-        for t in self:
-            if t in other:
-                trades.append(t)
-
-        if len(trades) == 0:
-            return TradeFrame(symbol=self.symbol)
+        # extracting trades when there is *exact* equality
+        ix = self._equal_index(other)
+
+        if len(ix) == 0:
+            return TradeFrame.from_tradeslist(self.symbol, precision=self.precision)
         else:
-            return TradeFrame.from_tradeslist(self.symbol, *trades)
+            return TradeFrame(
+                symbol=self.symbol, df=self.df.loc[ix], precision=self.precision
+            )
 
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.union
     def union(self, other: TradeFrame):
         # special empty case => return the other one.
         # This avoid different columns issue when dataframe is empty (open_time is not the index - pandas 1.1.5)
         if self.df.empty:
-            return TradeFrame(symbol=self.symbol, df=other.df.copy(deep=True))
+            if self.precision is not None:
+                return other.with_precision(self.precision)
+            return TradeFrame(
+                symbol=self.symbol,
+                df=other.df.copy(deep=True),
+                precision=other.precision,
+            )
         if other.df.empty:
-            return TradeFrame(symbol=self.symbol, df=self.df.copy(deep=True))
+            return TradeFrame(
+                symbol=self.symbol, df=self.df.copy(deep=True), precision=self.precision
+            )
 
         assert self.symbol == other.symbol
 
-        # otherwise we need to merge
-        newdf_noidx = self.df.reset_index(drop=False).merge(
-            other.df.reset_index(drop=False), how="outer"
-        )
-
-        # Note : previous merging attempts with "aggregate" and fonction application failed
-        # on tricky bugs/pandas limitations...
-        # Attempting a different way based on resolving duplicates in groups and replacing.
-        dups = newdf_noidx.duplicated(subset="id", keep=False)
-
-        dupgroups = newdf_noidx[dups].groupby(by="id")
-
-        # keeping all non-duplicates in boolean filter
-        grpfltr = ~newdf_noidx.id.isin(dupgroups.groups)
+        # the result is stored as self is.
+        other = other.with_precision(self.precision)
 
-        for grp, frm in dupgroups:
-            best_idx = frm.iloc[0].name  # picking first in frame
-            # We could here implement some kind of clever merging if it becomes necessary (like for OHLCFrame)...
-
-            # merge in group filter (set it to true, all other in same group must remain false)
-            grpfltr = grpfltr | (grpfltr.index == best_idx)
-
-        # replace groups into merged dataframe
-        newdf_noidx = newdf_noidx[grpfltr]
+        # otherwise we need to merge.
+        # On id conflict, the trade from self is kept.
+        # We could here implement some kind of clever merging if it becomes necessary (like for OHLCFrame)...
+        newdf = pd.concat(
+            [self.df, other.df[~other.df.index.isin(self.df.index)]],
+        )
 
-        # the OHLCFrame constructor will reindex properly.
-        return TradeFrame(symbol=self.symbol, df=newdf_noidx)
+        # the TradeFrame constructor will sort properly.
+        return TradeFrame(symbol=self.symbol, df=newdf, precision=self.precision)
 
     # Ref : https://docs.python.org/3.8/library/stdtypes.html#set.difference
     def difference(self, other: TradeFrame):
-        # finding identical indexes in both dataframe, and extracting subset
-
-        ix = self.intersection(other)
+        # Note : in case of conflict (same index, different values), this has the effect of
+        #        ignoring other and prioritizing having trades from self in result.
+        ix = self._equal_index(other)
 
-        trades = []
-        # very naive implementation. TODO : optimize
-        # Reminder : this is just a set of candles, no candle merging.
-        for t in self:
-            # Note : in case of conflict (same index, different values), this has the effect of
-            #        ignoring other and prioritizing having candles from self in result.
-            if t not in ix:
-                trades.append(t)
-
-        if len(trades) == 0:
-            return TradeFrame(symbol=self.symbol)
+        if len(ix) == len(self.df):
+            return TradeFrame.from_tradeslist(self.symbol, precision=self.precision)
         else:
-            return TradeFrame.from_tradeslist(self.symbol, *trades)
+            return TradeFrame(
+                symbol=self.symbol,
+                df=self.df[~self.df.index.isin(ix)],
+                precision=self.precision,
+            )
 
     def __str__(self):
         # optimize before display (high decimal precision is not manageable by humans)
@@ -429,7 +593,11 @@ class TradeFrame:
         self,
     ) -> pd.DataFrame:  # returns a raw DataFrame, containing numpy data, ready for fast compute.
         """ optimize data for simplicity and speed, dropping precision."""
-        opt_copy = self.df.copy(deep=True)
+        opt_copy = (
+            self.df.copy(deep=True)
+            if self.precision is None
+            else self.precision.to_float(self.df)
+        )
         opt_copy.convert_dtypes()
         # also convert decimal to floats, losing precision
         opt_copy.price = opt_copy.price.to_numpy("float64")
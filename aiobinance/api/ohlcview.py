@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-from asyncio import AbstractEventLoop, Queue, Task
+from asyncio import AbstractEventLoop, Task
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import hypothesis.strategies as st
 
+from aiobinance.api.backfill import OHLCBackfill
+from aiobinance.api.model.coverage import Coverage
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.ohlcframe import OHLCFrame
 from aiobinance.api.model.pricecandle import PriceCandle
 from aiobinance.api.model.timeinterval import (
@@ -18,6 +21,8 @@ from aiobinance.api.model.timeinterval import (
 from aiobinance.api.model.trade import Trade
 from aiobinance.api.pure.ohlcviewbase import OHLCViewBase
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.scheduler import Expectations
+from aiobinance.api.store import CandleStore
 
 # TODO: this should probably done in types instead (metaclass, etc.)
 _ohlcview_instances: Dict[str, OHLCView] = {}
@@ -33,20 +38,39 @@ class OHLCView(OHLCViewBase):
     api: Binance
     symbol: Optional[str]
 
-    # TODO : aiostream instead of queue here ?
-    #  we need to think about combining expectatinos in a way that make sense (Time Interval arithmetic)
-    expectations: Optional[Queue]  # containing TimeInterval as the requested dataset
+    # the TimeIntervals requested, merged and dispatched by the shared scheduler
+    expectations: Expectations
+
+    backfills: Dict[Tuple[TimeStep, datetime, datetime], OHLCBackfill]
+
+    # time ranges already requested, for each timestep
+    coverage: Dict[TimeStep, Coverage]
 
     update_hooks: Dict[TimeStep, List[Callable[[OHLCFrame], bool]]]
     update_loop: Optional[Task]
 
+    # building a PriceCandle for each received kline, to debug data issues.
+    validate: bool = False
+
+    # when set, candles are kept on disk, and only missing time ranges are requested.
+    store: Optional[CandleStore] = None
+
+    # when set, candles are stored as scaled int64 in the frames, as numpy operates on them natively.
+    precision: Optional[FixedPoint] = None
+
     @st.composite
     @staticmethod
     def strategy(draw, max_size=5):
         frames = draw(st.lists(OHLCFrame.strategy(), max_size=max_size))
         return OHLCView(api=Binance(), symbol=draw(st.text(max_size=5)), *frames)
 
-    def __new__(cls, api: Binance = Binance(), symbol: Optional[str] = None, *frames):
+    def __new__(
+        cls,
+        api: Binance = Binance(),
+        symbol: Optional[str] = None,
+        *frames,
+        precision: Optional[FixedPoint] = None,
+    ):
 
         if symbol in _ohlcview_instances.keys():
             return _ohlcview_instances[
@@ -58,11 +82,26 @@ class OHLCView(OHLCViewBase):
         _ohlcview_instances[symbol] = self
         return self  # init will do the rest
 
-    def __init__(self, api: Binance = Binance(), symbol: Optional[str] = None, *frames):
+    def __init__(
+        self,
+        api: Binance = Binance(),
+        symbol: Optional[str] = None,
+        *frames,
+        precision: Optional[FixedPoint] = None,
+    ):
         self.api = api
         self.symbol = symbol
+        self.precision = precision
 
-        self.expectations = None  # maybe no async event loop just yet
+        self.expectations = Expectations(
+            key=(OHLCView, symbol),
+            fetch=lambda start, stop, step: self.at(
+                timestep=step, start_time=start, stop_time=stop
+            ),
+        )
+        # the last unfinished backfill of each timestep, to resume from it after a failure
+        self.backfills = {}
+        self.coverage = {}
         self.update_hooks = {}  # because multiple things can wait for one update
         self.update_loop = None
 
@@ -77,8 +116,12 @@ class OHLCView(OHLCViewBase):
         start_time: Optional[datetime] = None,
         stop_time: Optional[datetime] = None,
         interval: Optional[TimeStep] = None,
+        progress: Optional[Callable[[int, int], Any]] = None,
     ):
-        """ this retrieves price ohlcv data"""
+        """this retrieves price ohlcv data.
+        When the time interval is fully specified, it is retrieved in as many pages as needed,
+        and progress is called with (done, total) pages.
+        """
 
         if interval is None:
             # make request for one timeframe already present in self.frames
@@ -100,6 +143,17 @@ class OHLCView(OHLCViewBase):
                 ]
                 interval = max(useful_tfs) if useful_tfs else None
 
+        if start_time is not None and stop_time is not None and interval is not None:
+            frame = await self._backfill(
+                start_time=start_time,
+                stop_time=stop_time,
+                interval=interval,
+                progress=progress,
+            )
+
+            # We let base class merge the whole backfill at once
+            return super(OHLCView, self).__call__(frame=frame)
+
         # Interval might still be none, but we should examine start and stop time first...
 
         if start_time is not None:
@@ -134,11 +188,11 @@ class OHLCView(OHLCViewBase):
         if stop_timestamp is not None:
             req_args.update({"endTime": stop_timestamp})
 
-        res = self.api.call_api(
+        res = await self.api.call_api(
             command="klines",
             symbol=self.symbol,
             **req_args,
-            limit=1000,  # TODO: maybe some clever pagination system should be handled in API side...
+            limit=1000,  # Note : pagination is only done when the interval is fully specified
         )
 
         if res.is_ok():
@@ -146,67 +200,125 @@ class OHLCView(OHLCViewBase):
         else:
             raise RuntimeError(res.err())
 
-        # Binance translation is only a matter of binance json -> python data structure && avoid data duplication.
-        # We do not want to change the semantics of the exchange exposed models here.
-        candles = [
-            PriceCandle(
-                open_time=r[0],
-                open=r[1],
-                high=r[2],
-                low=r[3],
-                close=r[4],
-                volume=r[5],
-                close_time=r[6],
-                qav=r[7],
-                num_trades=r[8],
-                taker_base_vol=r[9],
-                taker_quote_vol=r[10],
-                is_best_match=r[11],
-            )
-            for r in res
-        ]
-
-        frame = OHLCFrame.from_candleslist(*candles)
+        frame = OHLCFrame.from_klines(
+            res, validate=self.validate, precision=self.precision
+        )
 
         # We let base class handle merging or replacing ohlcframes depending on interval
         return super(OHLCView, self).__call__(frame=frame)
 
+    async def _backfill(
+        self,
+        start_time: datetime,
+        stop_time: datetime,
+        interval: TimeStep,
+        progress: Optional[Callable[[int, int], Any]] = None,
+    ) -> OHLCFrame:
+        """paginated requests, resuming from a previous failed attempt if there is one.
+        Note : the time range requested usually moves with now, the pages of the overlap are reused."""
+        backfill = OHLCBackfill(
+            api=self.api,
+            symbol=self.symbol,
+            step=interval,
+            start_time=start_time,
+            stop_time=stop_time,
+            progress=progress,
+            validate=self.validate,
+            precision=self.precision,
+        )
+        previous = self.backfills.get(interval)
+        if previous is not None:
+            backfill.resume(previous)
+        self.backfills[interval] = backfill
+
+        frame = await backfill()  # raises if some pages failed
+        if self.backfills.get(interval) is backfill:
+            del self.backfills[interval]
+        return frame
+
+    async def restore(
+        self,
+        start_time: datetime,
+        stop_time: datetime,
+        interval: TimeStep,
+        progress: Optional[Callable[[int, int], Any]] = None,
+    ):
+        """Loads the candles already in the store, and requests only the missing time ranges.
+        These are then added to the store, for the next time."""
+        stored = self.store.load(self.symbol, interval, start_time, stop_time)
+        stored = stored.with_precision(self.precision)
+        super(OHLCView, self).__call__(frame=stored)
+
+        for gap_start, gap_stop in self.store.gaps(
+            self.symbol, interval, start_time, stop_time
+        ):
+            frame = await self._backfill(
+                start_time=gap_start,
+                stop_time=gap_stop,
+                interval=interval,
+                progress=progress,
+            )
+            self.store.append(self.symbol, interval, gap_start, gap_stop, frame)
+            super(OHLCView, self).__call__(frame=frame)
+
+        return self
+
     async def loop(self, mini_sleep: timedelta = timedelta(seconds=3)):
+        """Processes the current expectations, while leaving the shared scheduler running,
+        to process later ones, along with those of other views."""
+        await self.expectations.scheduler.run(mini_sleep=mini_sleep)
+        self.update_loop = self.expectations.scheduler.task
 
-        if self.expectations is None:
-            self.expectations = Queue()
-
-        # TODO : avoid multiple calls here !!
-        if not self.expectations.empty():  # to avoid blocking when not useful
-            tint = await self.expectations.get()
-
-            try:
-                # TODO : schedule requests and balance optimization with accuracy
-                #  multiple request might improve results (seen with kraken at least)
-                await self.at(
-                    timestep=tint.step, start_time=tint.start, stop_time=tint.stop
-                )
-            except Exception:
-                raise
-            finally:  # to be sure we mark this task as done and we can keep working...
-                self.expectations.task_done()
-
-        await asyncio.sleep(
-            mini_sleep.total_seconds()
-        )  # minisleep to avoid looping too fast.
-
-        # this trampoline and behaves as a minimal inner service...
-        self.update_loop = asyncio.get_running_loop().create_task(
-            self.loop(mini_sleep=mini_sleep)
+    async def run(self, mini_sleep: timedelta = timedelta(seconds=3)):
+        # Note : the scheduler runs only ONE loop for all views.
+        await self.loop(mini_sleep=mini_sleep)
+
+    def apply_kline(self, timestep: TimeStep, kline: Dict) -> OHLCFrame:
+        """Applies one kline event, as streamed by binance, and returns the candle.
+        The last candle is replaced, or a new candle is appended, without merging frames,
+        and update hooks are called with that candle only, or the derived candles containing it.
+        """
+        # Ref : https://binance-docs.github.io/apidocs/spot/en/#kline-candlestick-streams
+        # Note : in the order of klines rows
+        row = [kline[k] for k in "tohlcvTqnVQB"]
+        frame = self.frames.get(timestep)
+        candle = OHLCFrame.from_klines(
+            [row], precision=self.precision if frame is None else frame.precision
         )
 
-        # we return after first process, while leaving a task running when possible...
-        # TODO:investigate if trio might be better here for structured async concurrency...
+        if frame is None or frame.empty:
+            self.frames[timestep] = candle
+        else:
+            # Note : the current candle is changing, even with fewer trades than we know of (force)
+            extended = frame.extend(candle, force=True)
+            # an older candle is merged as usual
+            self.frames[timestep] = (
+                frame.union(candle) if extended is None else extended
+            )
+        derived = self._derive(timestep, candle)
 
-    async def run(self, mini_sleep: timedelta = timedelta(seconds=3)):
-        if self.update_loop is None:
-            await self.loop(mini_sleep=mini_sleep)
-        # else we silently skip it because we ever want only ONE loop !
+        for hook in self.update_hooks.get(timestep, []):
+            hook(candle)
+        for step, changed in derived.items():
+            for hook in self.update_hooks.get(step, []):
+                hook(changed)
+        return candle
+
+    def _broadcast(
+        self,
+        timestep: TimeStep,
+        old_frame: OHLCFrame,
+        start_time: Optional[datetime] = None,
+        stop_time: Optional[datetime] = None,
+    ):
+        """calls the update hooks with the candles, between start_time and stop_time,
+        that were not in old_frame"""
+        frameupdate = self.frames[timestep][start_time:stop_time].difference(old_frame)
+        # NEW WAY
+        if not frameupdate.empty:
+            for hook in self.update_hooks.get(timestep, []):
+                hook(frameupdate)
+                # TODO : somethg useful with return value ? popping the hook ?
 
     async def at(
         self,
@@ -220,7 +332,48 @@ class OHLCView(OHLCViewBase):
         :param stop_time: the stop_time of data we need to retrieve (might not be returned, use [] to access it if needed)
         :return:
         """
-        if (
+        if timestep in self.derived:
+            # the candles are built from those of the base timestep, which are retrieved instead
+            old_frame = self[timestep][start_time:stop_time]
+            await self.at(
+                self.derived[timestep],
+                # Note : the first candle is complete only with all the finer candles it contains
+                start_time=None if start_time is None else timestep.floor(start_time),
+                stop_time=stop_time,
+            )
+            self._broadcast(timestep, old_frame, start_time, stop_time)
+
+        elif start_time is not None and stop_time is not None:
+            # only the time ranges not fetched yet are requested
+            coverage = self.coverage.setdefault(timestep, Coverage())
+            gaps = coverage.gaps(start_time, stop_time)
+            if gaps:
+                # Note : only the candles in the time range can change
+                old_frame = self[timestep][start_time:stop_time]
+                now = datetime.now(tz=timezone.utc)
+
+                for gap_start, gap_stop in gaps:
+                    if self.store is not None:
+                        # only the time ranges not on disk yet are requested
+                        await self.restore(
+                            start_time=gap_start, stop_time=gap_stop, interval=timestep
+                        )
+                    else:
+                        frame = await self._backfill(
+                            start_time=gap_start, stop_time=gap_stop, interval=timestep
+                        )
+                        super(OHLCView, self).__call__(frame=frame)
+
+                    # the candle still open now will change, so it is not covered yet
+                    coverage.add(
+                        gap_start,
+                        min(gap_stop, now - timestep.delta.value),
+                        empty=self[timestep][gap_start:gap_stop].empty,
+                    )
+
+                self._broadcast(timestep, old_frame, start_time, stop_time)
+
+        elif (
             timestep not in self.frames
             or (self.frames[timestep].empty)
             or (start_time is not None and self.frames[timestep].open_time > start_time)
@@ -228,21 +381,14 @@ class OHLCView(OHLCViewBase):
         ):
             # keep old version
             # Note : for this to work, this must be the only point where it is possible to update the encapsulated data
-            old_frame = self.frames[timestep]
+            old_frame = self[timestep]  # empty if timestep is not there yet
 
             # do the first request to get recent data, and await
             await self.request(
                 start_time=start_time, stop_time=stop_time, interval=timestep
             )
 
-            # broadcast update
-            # TODO : OPTIMIZE THIS ! Difference Computation is too slow...
-            frameupdate = self.frames[timestep].difference(old_frame)
-            # NEW WAY
-            if not frameupdate.empty:
-                for hook in self.update_hooks[timestep]:
-                    hook(frameupdate)
-                    # TODO : somethg useful with return value ? popping the hook ?
+            self._broadcast(timestep, old_frame)
 
         # return the frame
         return self.frames[timestep]
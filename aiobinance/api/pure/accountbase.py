@@ -4,7 +4,7 @@ import asyncio
 from dataclasses import dataclass, field
 from datetime import MINYEAR, datetime, timedelta
 from functools import cached_property
-from typing import Dict, List, Optional, Type
+from typing import Dict, List, Optional, Set, Type
 
 import hypothesis.strategies as st
 from hypothesis.strategies import SearchStrategy
@@ -65,25 +65,23 @@ class AccountBase:
             set(self.balances.keys())
         )
 
-    def _markets_with_base(self, asset: str):
+    def _markets_with_base(self, asset: str, interesting: Optional[Set[str]] = None):
+        interesting = self.interesting_markets if interesting is None else interesting
         mkts = [  # retrieving tradeview for related markets
             m
-            for m in self.exchange.markets.values()
-            if (
-                asset == m.info.base_asset
-                and m.info.quote_asset in self.interesting_markets
-            )  # TODO : move this into a config (we want to limit the assets we look at)
+            for m in self.exchange.markets_with_base(asset).values()
+            if m.info.quote_asset in interesting
+            # TODO : move this into a config (we want to limit the assets we look at)
         ]
         return mkts
 
-    def _markets_with_quote(self, asset: str):
+    def _markets_with_quote(self, asset: str, interesting: Optional[Set[str]] = None):
+        interesting = self.interesting_markets if interesting is None else interesting
         mkts = [  # retrieving tradeview for related markets
             m
-            for m in self.exchange.markets.values()
-            if (
-                asset == m.info.quote_asset
-                and m.info.base_asset in self.interesting_markets
-            )  # TODO : move this into a config (we want to limit the assets we look at)
+            for m in self.exchange.markets_with_quote(asset).values()
+            if m.info.base_asset in interesting
+            # TODO : move this into a config (we want to limit the assets we look at)
         ]
         return mkts
 
@@ -104,15 +102,16 @@ class AccountBase:
     @property
     def assets(self) -> Dict[str, AssetBase]:
         # returns all assets, based on assets_info
+        # Note : computed once here, not for each asset
+        balances = self.balances
+        interesting = self.interesting_markets
         return (
             {
                 asst: AssetBase(
-                    amount=self.balances.get(asst, AssetAmount(asset=asst)),
+                    amount=balances.get(asst, AssetAmount(asset=asst)),
                     info=ainf,
-                    base_markets=[  # retrieving tradeview for related markets
-                        m for m in self._markets_with_base(asst)
-                    ],
-                    quote_markets=[m for m in self._markets_with_quote(asst)],
+                    base_markets=self._markets_with_base(asst, interesting),
+                    quote_markets=self._markets_with_quote(asst, interesting),
                 )
                 for asst, ainf in self.assets_info.items()
             }
@@ -6,13 +6,14 @@ from dataclasses import (
 from dataclasses import field
 from datetime import MINYEAR, datetime, timedelta, timezone
 from functools import cached_property
-from typing import Dict, Optional, Type
+from typing import Dict, Optional, Tuple, Type
 
 import hypothesis.strategies as st
 from hypothesis.strategies import SearchStrategy
 from result import Err, Ok, Result
 
 from aiobinance.api.model.exchange_info import ExchangeInfo
+from aiobinance.api.model.market_info import MarketInfo
 from aiobinance.api.pure.marketbase import MarketBase
 
 
@@ -20,6 +21,18 @@ from aiobinance.api.pure.marketbase import MarketBase
 class ExchangeBase:
     info: Optional[ExchangeInfo] = field(init=True, default=None)
 
+    # markets indexed by symbol, and by base and quote asset, built again only when info changes.
+    _markets: Dict[str, MarketBase] = field(
+        init=False, default_factory=dict, repr=False, compare=False
+    )
+    _markets_by_base: Dict[str, Dict[str, MarketBase]] = field(
+        init=False, default_factory=dict, repr=False, compare=False
+    )
+    _markets_by_quote: Dict[str, Dict[str, MarketBase]] = field(
+        init=False, default_factory=dict, repr=False, compare=False
+    )
+    _indexed: Tuple = field(init=False, default=(), repr=False, compare=False)
+
     @classmethod
     def strategy(
         cls, info=st.one_of(st.none(), ExchangeInfo.strategy()), **kwargs
@@ -34,17 +47,54 @@ class ExchangeBase:
             else datetime(year=MINYEAR, month=1, day=1, tzinfo=timezone.utc)
         )
 
+    def _market(self, info: MarketInfo) -> MarketBase:
+        """ builds the market for one symbol. Implementations return their own Market. """
+        return MarketBase(info=info)
+
+    def _index_key(self) -> Tuple:
+        """ what markets are built from. They are built again when any of it changes. """
+        # Note : servertime changes on every update of info, not the markets
+        return (None if self.info is None else self.info.symbols,)
+
+    def _index(self):
+        key = self._index_key()
+        if len(key) == len(self._indexed) and all(
+            k is i for k, i in zip(key, self._indexed)
+        ):
+            return  # markets are up to date
+        if key == self._indexed:
+            # new but equal data, like a refresh : the same markets are kept
+            self._indexed = key
+            return
+
+        self._markets = {}
+        self._markets_by_base = {}
+        self._markets_by_quote = {}
+        for s in self.info.symbols if self.info is not None else []:
+            m = self._market(s)
+            self._markets[s.symbol] = m
+            self._markets_by_base.setdefault(s.base_asset, {})[s.symbol] = m
+            self._markets_by_quote.setdefault(s.quote_asset, {})[s.symbol] = m
+        self._indexed = key
+
     @property
     def markets(
         self,
     ) -> Dict[
         str, MarketBase
     ]:  # monotonically increase -> start empty and assume exchange only adds market during a run...
-        return (
-            {s.symbol: MarketBase(info=s) for s in self.info.symbols}
-            if self.info is not None
-            else {}
-        )
+        self._index()
+        return self._markets
+
+    def markets_with_base(self, asset: str) -> Dict[str, MarketBase]:
+        """ the markets where asset is traded, by symbol """
+        self._index()
+        return self._markets_by_base.get(asset, {})
+
+    def markets_with_quote(self, asset: str) -> Dict[str, MarketBase]:
+        """ the markets where prices are in asset, by symbol """
+        self._index()
+        return self._markets_by_quote.get(asset, {})
 
     async def __call__(
         self, *, info: Optional[ExchangeInfo] = None, **kwargs
@@ -25,6 +25,9 @@ from aiobinance.api.model.timeinterval import TimeInterval, TimeStep
 class OHLCViewBase:
     frames: Dict[TimeStep, Optional[OHLCFrame]]
 
+    # timesteps whose frame is built from the frame of a finer timestep, instead of being retrieved
+    derived: Dict[TimeStep, TimeStep]
+
     # properties like those of a PriceCandle
     # for list of column value in the frame, access directly the frame attribute
     @property
@@ -47,6 +50,7 @@ class OHLCViewBase:
 
     def __init__(self, *frames: OHLCFrame):
         self.frames = {}
+        self.derived = {}
         for f in frames:
             # default to minutely when unknown
             tstep = TimeStep(timedelta(minutes=1)) if f.interval is None else f.interval
@@ -66,13 +70,55 @@ class OHLCViewBase:
         # TODO: this should probably be encoded in frame types somehow, to avoid any mistakes when operating on them...
         tstep: TimeStep = frame.interval
         if tstep in self.frames.keys():
-            self.frames[tstep] = self.frames[tstep].union(frame)
+            # fast path for recent candles, independent of the size of the frame,
+            # merging only when older candles are there.
+            extended = self.frames[tstep].extend(frame)
+            self.frames[tstep] = (
+                self.frames[tstep].union(frame) if extended is None else extended
+            )
         else:  # if interval is unknown, we store the new frame.
             self.frames[tstep] = frame
 
+        self._derive(tstep, frame)
+
         # returning self to allow chaining
         return self
 
+    def derive(self, step: TimeStep, base: TimeStep):
+        """Builds the frame of step from the frame of base, and keeps it updated when base changes.
+        This frame is then consistent with the base one, and does not need to be retrieved."""
+        if not base.divides(step) or base == step:
+            raise ValueError(f"{step} candles cannot be built from {base} candles")
+        if base in self.derived:
+            raise ValueError(f"{base} is already derived from {self.derived[base]}")
+        self.derived[step] = base
+        if base in self.frames and not self.frames[base].empty:
+            self.frames[step] = self.frames[base].resample(step)
+
+    def _derive(self, tstep: TimeStep, frame: OHLCFrame) -> Dict[TimeStep, OHLCFrame]:
+        """Updates the frames derived from the frame of tstep, where frame changed it.
+        Returns the candles that changed, for each derived timestep."""
+        changes = {}
+        if frame.empty:
+            return changes
+        for step, base in self.derived.items():
+            if base != tstep:
+                continue
+            # only the coarser candles containing frame are built again
+            start = step.floor(frame.df.index[0].to_pydatetime())
+            stop = (
+                step.floor(frame.df.index[-1].to_pydatetime())
+                + step.delta.value
+                - timedelta(milliseconds=1)
+            )
+            changes[step] = self.frames[base][start:stop].resample(step)
+            extended = self[step].extend(changes[step], force=True)
+            # Note : when older candles changed, rebuilding from base keeps frames consistent
+            self.frames[step] = (
+                self.frames[base].resample(step) if extended is None else extended
+            )
+        return changes
+
     # Exposing mapping interface on interval ! (user is expected to access a frame if frame operation is required)
     def __contains__(self, item: Union[timedelta, TimeStep]) -> bool:
         # https://docs.python.org/2/reference/datamodel.html#object.__contains__
@@ -1,5 +1,6 @@
 import asyncio
 import unittest
+from copy import deepcopy
 from datetime import MINYEAR, datetime, timezone
 
 import hypothesis.strategies as st
@@ -36,6 +37,45 @@ class TestExchangeBase(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             asyncio.run(eb())
 
+    @given(eb=ExchangeBase.strategy(info=ExchangeInfo.strategy()))
+    def test_markets_index(self, eb: ExchangeBase):
+        markets = eb.markets
+        # markets are built only once
+        assert eb.markets is markets
+        for s, m in markets.items():
+            assert eb.markets_with_base(m.info.base_asset)[s] is m
+            assert eb.markets_with_quote(m.info.quote_asset)[s] is m
+
+        for asset in {m.info.base_asset for m in markets.values()}:
+            assert eb.markets_with_base(asset) == {
+                s: m for s, m in markets.items() if m.info.base_asset == asset
+            }
+        for asset in {m.info.quote_asset for m in markets.values()}:
+            assert eb.markets_with_quote(asset) == {
+                s: m for s, m in markets.items() if m.info.quote_asset == asset
+            }
+        assert eb.markets_with_base("not an asset") == {}
+
+    @given(eb=ExchangeBase.strategy(), info_update=ExchangeInfo.strategy())
+    def test_markets_update(self, eb: ExchangeBase, info_update: ExchangeInfo):
+        markets = eb.markets
+        symbols = None if eb.info is None else eb.info.symbols
+
+        asyncio.run(eb(info=info_update))
+
+        # markets are built again from the new info
+        if symbols != info_update.symbols:
+            assert eb.markets is not markets
+        assert eb.markets == {s.symbol: MarketBase(info=s) for s in info_update.symbols}
+
+    @given(eb=ExchangeBase.strategy(info=ExchangeInfo.strategy()))
+    def test_markets_same_info(self, eb: ExchangeBase):
+        markets = eb.markets
+
+        # another, but equal, info keeps the same markets
+        asyncio.run(eb(info=deepcopy(eb.info)))
+        assert eb.markets is markets
+
 
 if __name__ == "__main__":
     unittest.main()
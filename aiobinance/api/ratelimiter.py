@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Mapping, Optional
+
+from aiobinance.api.model.exchange_info import RateLimit
+
+# Ref : https://binance-docs.github.io/apidocs/spot/en/#limits
+_interval_convert: Dict[str, timedelta] = {
+    "SECOND": timedelta(seconds=1),
+    "MINUTE": timedelta(minutes=1),
+    "HOUR": timedelta(hours=1),
+    "DAY": timedelta(days=1),
+}
+
+_header_convert: Dict[str, timedelta] = {
+    "s": timedelta(seconds=1),
+    "m": timedelta(minutes=1),
+    "h": timedelta(hours=1),
+    "d": timedelta(days=1),
+}
+
+# headers sent back by binance with the current usage, for each interval
+_used_header = re.compile(r"x-mbx-(used-weight|order-count)-(\d+)([smhd])")
+
+# default limits, until we get the actual ones from exchangeInfo
+DEFAULT_RATE_LIMITS = [
+    RateLimit(
+        rate_limit_type="REQUEST_WEIGHT", interval="MINUTE", interval_num=1, limit=1200
+    ),
+]
+
+
+class TokenBucket:
+    """A bucket of tokens, continuously refilled up to its capacity over the interval.
+    Binance actually counts usage in fixed windows, so the bucket is also synced from the usage reported
+    by the server, to never allow more than the limit in a window."""
+
+    capacity: int
+    interval: timedelta
+    tokens: float
+    timestamp: float
+
+    def __init__(
+        self,
+        capacity: int,
+        interval: timedelta,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.interval = interval
+        self.clock = clock
+
+        self.tokens = capacity  # starting full
+        self.timestamp = clock()
+
+    @property
+    def rate(self) -> float:
+        """ tokens per second """
+        return self.capacity / self.interval.total_seconds()
+
+    def refill(self) -> TokenBucket:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.timestamp) * self.rate
+        )
+        self.timestamp = now
+        return self
+
+    def delay(self, weight: int) -> float:
+        """ seconds to wait before weight tokens are available """
+        self.refill()
+        # a request heavier than the bucket can still be sent, once it is full.
+        weight = min(weight, self.capacity)
+        return 0.0 if self.tokens >= weight else (weight - self.tokens) / self.rate
+
+    def consume(self, weight: int) -> TokenBucket:
+        self.refill()
+        self.tokens -= weight
+        return self
+
+    def sync(self, used: int) -> TokenBucket:
+        """ adjusting to the usage reported by the server (only ever removing tokens) """
+        self.refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+        return self
+
+    def __repr__(self):
+        return f"TokenBucket({self.tokens:.1f}/{self.capacity} per {self.interval})"
+
+
+class RateLimiter:
+    """Delays api calls so that every binance rate limit is respected.
+    REQUEST_WEIGHT is consumed by the command weight, RAW_REQUESTS by every call, ORDERS by order creation."""
+
+    buckets: Dict[str, List[TokenBucket]]  # indexed by rate_limit_type
+    blocked_until: float  # when the server asks us to back off
+
+    def __init__(
+        self,
+        rate_limits: Optional[List[RateLimit]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.blocked_until = clock()
+
+        # Note : lock are created lazily, as asyncio ones are bound to an event loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_lock = threading.Lock()
+
+        self.buckets = {}
+        self.configure(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+
+    def configure(self, rate_limits: List[RateLimit]) -> RateLimiter:
+        """ replacing the buckets to match the rate limits, keeping the current usage when possible """
+        buckets: Dict[str, List[TokenBucket]] = {}
+        for rl in rate_limits:
+            interval = _interval_convert[rl.interval] * rl.interval_num
+            bucket = TokenBucket(capacity=rl.limit, interval=interval, clock=self.clock)
+            for previous in self.buckets.get(rl.rate_limit_type, []):
+                if previous.interval == interval:
+                    previous.refill()
+                    bucket.tokens = min(
+                        bucket.capacity,
+                        bucket.capacity - (previous.capacity - previous.tokens),
+                    )
+            buckets.setdefault(rl.rate_limit_type, []).append(bucket)
+
+        self.buckets = buckets
+        return self
+
+    def _costs(self, weight: int, orders: int) -> Dict[str, int]:
+        return {"REQUEST_WEIGHT": weight, "RAW_REQUESTS": 1, "ORDERS": orders}
+
+    def delay(self, weight: int, orders: int = 0) -> float:
+        """ seconds to wait before a call with this weight can be sent """
+        delay = max(0.0, self.blocked_until - self.clock())
+        for rlt, cost in self._costs(weight, orders).items():
+            if cost > 0:
+                for b in self.buckets.get(rlt, []):
+                    delay = max(delay, b.delay(cost))
+        return delay
+
+    def consume(self, weight: int, orders: int = 0) -> RateLimiter:
+        for rlt, cost in self._costs(weight, orders).items():
+            if cost > 0:
+                for b in self.buckets.get(rlt, []):
+                    b.consume(cost)
+        return self
+
+    async def acquire(self, weight: int, orders: int = 0) -> RateLimiter:
+        """ waits (without blocking the event loop) until the call can be sent. Calls are served in order. """
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+
+        async with self._lock:
+            delay = self.delay(weight, orders)
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.delay(weight, orders)
+            return self.consume(weight, orders)
+
+    def acquire_sync(self, weight: int, orders: int = 0) -> RateLimiter:
+        """ blocks until the call can be sent. """
+        with self._sync_lock:
+            delay = self.delay(weight, orders)
+            while delay > 0:
+                time.sleep(delay)
+                delay = self.delay(weight, orders)
+            return self.consume(weight, orders)
+
+    def update(self, status: int, headers: Mapping[str, str]) -> RateLimiter:
+        """ staying in sync with the usage reported by binance in response headers """
+        for k, v in headers.items():
+            match = _used_header.fullmatch(k.lower())
+            if match is None:
+                continue
+            rlt = "REQUEST_WEIGHT" if match.group(1) == "used-weight" else "ORDERS"
+            interval = _header_convert[match.group(3)] * int(match.group(2))
+            for b in self.buckets.get(rlt, []):
+                if b.interval == interval:
+                    b.sync(int(v))
+
+        # 429 : too many requests, 418 : IP banned. We have to back off.
+        if status in (418, 429):
+            retry_after = headers.get("Retry-After")
+            # if binance doesn't tell us how long, we wait for the longest weight interval.
+            backoff = (
+                float(retry_after)
+                if retry_after is not None
+                else max(
+                    (
+                        b.interval.total_seconds()
+                        for b in self.buckets.get("REQUEST_WEIGHT", [])
+                    ),
+                    default=60.0,
+                )
+            )
+            self.blocked_until = max(self.blocked_until, self.clock() + backoff)
+
+        return self
+
+    def __repr__(self):
+        return f"RateLimiter({self.buckets})"
@@ -1,19 +1,43 @@
 # Binance API
 # Credits to @Bablofil https://github.com/Bablofil/binance-api
+import asyncio
+import functools
 import hashlib
 import hmac
 import json
+import logging
 import time
 import urllib
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlencode, urlparse
 from urllib.request import Request, urlopen
 
 import requests
+from requests.adapters import HTTPAdapter
 from result import Err, Ok, Result
 
+from aiobinance.api.model.exchange_info import RateLimit
+from aiobinance.api.ratelimiter import RateLimiter
 from aiobinance.config import Credentials
 
+try:
+    import aiohttp
+except ImportError:  # optional : we fallback on requests, in an executor thread
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # optional : we fallback on the standard json module
+    orjson = None
+
+
+logger = logging.getLogger("aiobinance.api.rawapi")
+
+
+def default_decoder() -> Callable[[bytes], Any]:
+    """ The fastest json decoder available """
+    return json.loads if orjson is None else orjson.loads
+
 
 class PrivateRequestNonAuthorized(Exception):
     pass
@@ -21,59 +45,180 @@ class PrivateRequestNonAuthorized(Exception):
 
 class Binance:
 
+    # Ref : https://binance-docs.github.io/apidocs/spot/en/#general-api-information
+    url: str = "https://api.binance.com/"
+
+    # Ref : https://binance-docs.github.io/apidocs/spot/en/#market-data-endpoints
+    # weight is the REQUEST_WEIGHT cost of each call, see Binance.weight() for parameter dependent ones.
     methods = {
         #  Public methods
-        "ping": {"url": "api/v3/ping", "method": "GET", "private": False},
-        "time": {"url": "api/v3/time", "method": "GET", "private": False},
+        "ping": {"url": "api/v3/ping", "method": "GET", "private": False, "weight": 1},
+        "time": {"url": "api/v3/time", "method": "GET", "private": False, "weight": 1},
         "exchangeInfo": {
             "url": "api/v3/exchangeInfo",
             "method": "GET",
             "private": False,
+            "weight": 10,
+        },
+        "depth": {
+            "url": "api/v3/depth",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
+        },
+        "trades": {
+            "url": "api/v3/trades",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
         },
-        "depth": {"url": "api/v3/depth", "method": "GET", "private": False},
-        "trades": {"url": "api/v3/trades", "method": "GET", "private": False},
         "historicalTrades": {
             "url": "api/v3/historicalTrades",
             "method": "GET",
             "private": False,
+            "weight": 5,
+        },
+        "aggTrades": {
+            "url": "api/v3/aggTrades",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
+        },
+        "klines": {
+            "url": "api/v3/klines",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
+        },
+        "avgPrice": {
+            "url": "api/v3/avgPrice",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
+        },
+        "ticker24hr": {
+            "url": "api/v3/ticker/24hr",
+            "method": "GET",
+            "private": False,
+            "weight": 1,
         },
-        "aggTrades": {"url": "api/v3/aggTrades", "method": "GET", "private": False},
-        "klines": {"url": "api/v3/klines", "method": "GET", "private": False},
-        "avgPrice": {"url": "api/v3/avgPrice", "method": "GET", "private": False},
-        "ticker24hr": {"url": "api/v3/ticker/24hr", "method": "GET", "private": False},
         "tickerPrice": {
             "url": "api/v3/ticker/price",
             "method": "GET",
             "private": False,
+            "weight": 1,
         },
         "tickerBookTicker": {
             "url": "api/v3/ticker/bookTicker",
             "method": "GET",
             "private": False,
+            "weight": 1,
         },
         #  Private methods
-        "createOrder": {"url": "api/v3/order", "method": "POST", "private": True},
-        "testOrder": {"url": "api/v3/order/test", "method": "POST", "private": True},
-        "orderInfo": {"url": "api/v3/order", "method": "GET", "private": True},
-        "cancelOrder": {"url": "api/v3/order", "method": "DELETE", "private": True},
-        "openOrders": {"url": "api/v3/openOrders", "method": "GET", "private": True},
-        "allOrders": {"url": "api/v3/allOrders", "method": "GET", "private": True},
-        "account": {"url": "api/v3/account", "method": "GET", "private": True},
-        "myTrades": {"url": "api/v3/myTrades", "method": "GET", "private": True},
+        "createOrder": {
+            "url": "api/v3/order",
+            "method": "POST",
+            "private": True,
+            "weight": 1,
+            "orders": 1,  # counts in the ORDERS rate limits
+        },
+        "testOrder": {
+            "url": "api/v3/order/test",
+            "method": "POST",
+            "private": True,
+            "weight": 1,
+        },
+        "orderInfo": {
+            "url": "api/v3/order",
+            "method": "GET",
+            "private": True,
+            "weight": 2,
+        },
+        "cancelOrder": {
+            "url": "api/v3/order",
+            "method": "DELETE",
+            "private": True,
+            "weight": 1,
+        },
+        "openOrders": {
+            "url": "api/v3/openOrders",
+            "method": "GET",
+            "private": True,
+            "weight": 3,
+        },
+        "allOrders": {
+            "url": "api/v3/allOrders",
+            "method": "GET",
+            "private": True,
+            "weight": 10,
+        },
+        "account": {
+            "url": "api/v3/account",
+            "method": "GET",
+            "private": True,
+            "weight": 10,
+        },
+        "myTrades": {
+            "url": "api/v3/myTrades",
+            "method": "GET",
+            "private": True,
+            "weight": 10,
+        },
         # added aiobinance  TMP waiting refactor...
         "coins": {
             "url": "sapi/v1/capital/config/getall",
             "method": "GET",
             "private": True,
+            "weight": 1,  # Note : sapi has its own limits, but it doesn't hurt to count it here.
         },
     }
 
+    # weight when the symbol is omitted (all symbols at once)
+    methods_all_symbols_weight = {
+        "ticker24hr": 40,
+        "tickerPrice": 2,
+        "tickerBookTicker": 2,
+        "openOrders": 40,
+    }
+
+    # depth weight depends on the limit
+    depth_weight = {5: 1, 10: 1, 20: 1, 50: 1, 100: 1, 500: 5, 1000: 10, 5000: 50}
+
     def __init__(
         self,
         credentials: Optional[Credentials] = None,
+        pool_size: int = 10,
+        decoder: Optional[Callable[[bytes], Any]] = None,
+        url: Optional[str] = None,
     ):
+        """
+        :param credentials: needed only for private requests
+        :param pool_size: maximum number of keep-alive connections to the binance host
+        :param decoder: json decoder for response bodies, orjson if installed, json otherwise
+        :param url: the api base url, binance by default
+        """
         self.credentials = credentials
+        self.url = self.url if url is None else url
         self.shift_seconds = 0
+        self.pool_size = pool_size
+        self.decoder = default_decoder() if decoder is None else decoder
+
+        # client-side rate limiting, configured with default limits until we know the exchange ones.
+        self.limiter = RateLimiter()
+
+        # sync transport : a requests session keeps connections alive between calls
+        self.session = requests.Session()
+        self.session.mount(
+            "https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        )
+
+        # async transport : created lazily, as it is bound to the running event loop
+        # Note : these must be set here, otherwise __getattr__ would answer for them...
+        self.client = None
+        self.client_loop = None
+
+        # identical GET requests being sent, shared by concurrent callers
+        self.in_flight = {}
 
     def __getattr__(self, name):
         def wrapper(*args, **kwargs):
@@ -85,6 +230,17 @@ class Binance:
     def set_shift_seconds(self, seconds):
         self.shift_seconds = seconds
 
+    def set_rate_limits(self, rate_limits: List[RateLimit]):
+        self.limiter.configure(rate_limits)
+
+    def weight(self, command: str, **params) -> int:
+        """ The REQUEST_WEIGHT cost of a call """
+        if command == "depth":
+            return self.depth_weight.get(int(params.get("limit", 100)), 50)
+        if "symbol" not in params and command in self.methods_all_symbols_weight:
+            return self.methods_all_symbols_weight[command]
+        return self.methods[command]["weight"]
+
     @staticmethod
     def interval(
         startTime: int, endTime: int, max_datapoints=240
@@ -129,10 +285,10 @@ class Binance:
         # otherwise the original '1M' setting
         return interval
 
-    def call_api(self, **kwargs) -> Result[Dict, Dict]:
-
+    def _prepare(self, **kwargs) -> Tuple[str, str, str, Dict[str, str]]:
+        """ Builds the http request (method, url, body, headers) for a command """
         command = kwargs.pop("command")
-        api_url = "https://api.binance.com/" + self.methods[command]["url"]
+        api_url = self.url + self.methods[command]["url"]
         payload = kwargs
         headers = {}
 
@@ -159,15 +315,142 @@ class Binance:
             api_url += "?" + payload_str
         # TODO : review this... some commands put payload inside request body, which is not filtered on cassettes (annoyance...)
         # print(api_url, payload_str, self.methods[command])
-        response = requests.request(
-            method=self.methods[command]["method"],
-            url=api_url,
-            data="" if self.methods[command]["method"] == "GET" else payload_str,
+        return (
+            self.methods[command]["method"],
+            api_url,
+            "" if self.methods[command]["method"] == "GET" else payload_str,
+            headers,
+        )
+
+    def _result(self, status: int, body: bytes) -> Result[Dict, Dict]:
+        """ Decodes the response body, and detects errors from the status and the payload structure """
+        # Ref : https://binance-docs.github.io/apidocs/spot/en/#error-codes
+        try:
+            payload = self.decoder(body)
+        except ValueError:  # orjson.JSONDecodeError and json.JSONDecodeError are ValueError
+            if status < 400:
+                raise
+            # error pages from proxies, firewall, etc. might not be json
+            payload = {"code": status, "msg": body.decode("utf-8", errors="replace")}
+
+        # Note : some endpoints (sapi) signal errors in a payload sent with a 200 status
+        if status >= 400 or (
+            isinstance(payload, dict) and "code" in payload and "msg" in payload
+        ):
+            logger.warning(f"Binance error {status}: {payload}")
+            return Err(payload)
+        return Ok(payload)
+
+    async def _client_session(self) -> "aiohttp.ClientSession":
+        loop = asyncio.get_running_loop()
+        # a session cannot be shared between event loops (tests, repeated asyncio.run, etc.)
+        if (
+            self.client is not None
+            and not self.client.closed
+            and self.client_loop is not loop
+        ):
+            await self._close_client()
+        if self.client is None or self.client.closed:
+            self.client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size)
+            )
+            self.client_loop = loop
+        return self.client
+
+    async def _close_client(self):
+        """ Closes the session left over by another event loop """
+        client, client_loop = self.client, self.client_loop
+        self.client = None
+        self.client_loop = None
+        if client_loop.is_running():
+            # Note : that loop runs in another thread, the session must be closed there.
+            asyncio.run_coroutine_threadsafe(client.close(), client_loop)
+        else:
+            # its loop is gone (repeated asyncio.run), only the session itself is left to release.
+            await client.close()
+
+    @staticmethod
+    def flight_key(**kwargs) -> Tuple:
+        """ identifies identical requests : same command and same parameter values, in any order """
+        return tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+
+    async def call_api(self, **kwargs) -> Result[Dict, Dict]:
+        """Sends the request without blocking the event loop, reusing pooled connections.
+
+        Concurrent identical GET requests are sent only once, and all callers get the same result.
+        Note : the payload is then shared, it should not be modified.
+        """
+        if self.methods[kwargs["command"]]["method"] != "GET":
+            return await self._call(**kwargs)  # orders are never merged
+
+        loop = asyncio.get_running_loop()
+        key = self.flight_key(**kwargs)
+        flight = self.in_flight.get(key)
+        if flight is None or flight.get_loop() is not loop:
+            flight = loop.create_task(self._call(**kwargs))
+            self.in_flight[key] = flight
+
+            def landed(task):
+                if self.in_flight.get(key) is task:
+                    self.in_flight.pop(key)
+
+            flight.add_done_callback(landed)
+
+        # Note : one caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(flight)
+
+    async def _call(self, **kwargs) -> Result[Dict, Dict]:
+        await self.limiter.acquire(
+            self.weight(**kwargs),
+            orders=self.methods[kwargs["command"]].get("orders", 0),
+        )
+
+        if aiohttp is None:
+            # no async http client available : run the sync transport in a thread instead.
+            return await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._send_sync, **kwargs)
+            )
+
+        method, url, data, headers = self._prepare(**kwargs)
+        client = await self._client_session()
+        async with client.request(
+            method=method, url=url, data=data, headers=headers
+        ) as response:
+            body = await response.read()
+            self.limiter.update(response.status, response.headers)
+
+        return self._result(response.status, body)
+
+    def call_api_sync(self, **kwargs) -> Result[Dict, Dict]:
+        """ Sends the request and blocks until the response arrives """
+        self.limiter.acquire_sync(
+            self.weight(**kwargs),
+            orders=self.methods[kwargs["command"]].get("orders", 0),
+        )
+        return self._send_sync(**kwargs)
+
+    def _send_sync(self, **kwargs) -> Result[Dict, Dict]:
+        method, url, data, headers = self._prepare(**kwargs)
+        response = self.session.request(
+            method=method,
+            url=url,
+            data=data,
             headers=headers,
         )
+        self.limiter.update(response.status_code, response.headers)
+
+        return self._result(response.status_code, response.content)
+
+    async def close(self):
+        """ Closes pooled connections. The transports will be recreated on next call if needed """
+        if self.client is not None and not self.client.closed:
+            await self.client.close()
+        self.client = None
+        self.client_loop = None
+        self.session.close()
+
+    async def __aenter__(self):
+        return self
 
-        if "code" in response.text:
-            print(response.text)
-            response = response.json()
-            return Err(response)
-        return Ok(response.json())
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from asyncio import Task
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import portion
+from portion import Interval
+
+from aiobinance.api.model.timeinterval import TimeInterval, TimeStep
+
+logger = logging.getLogger("aiobinance.api.scheduler")
+
+# priorities, lower first
+VISIBLE = 0  # data currently displayed
+BACKGROUND = 1
+
+# retrieves data for (start, stop, step). start and stop are None for the most recent data.
+Fetch = Callable[
+    [Optional[datetime], Optional[datetime], Optional[TimeStep]], Awaitable
+]
+
+
+class Expectation:
+    """ Time intervals expected for one view and step, merged together """
+
+    fetch: Fetch
+    step: Optional[TimeStep]
+    interval: Interval
+    latest: bool  # most recent data, without specific bounds
+    priority: int
+
+    def __init__(self, fetch: Fetch, step: Optional[TimeStep], priority: int):
+        self.fetch = fetch
+        self.step = step
+        self.interval = portion.empty()
+        self.latest = False
+        self.priority = priority
+
+    def add(self, tint: TimeInterval, priority: int):
+        if tint.interval is None:
+            self.latest = True
+        else:
+            self.interval |= tint.interval
+        self.priority = min(self.priority, priority)
+
+    def without(self, others: List[Expectation]) -> Expectation:
+        """ the part of this expectation that is not already expected by others """
+        remaining = Expectation(
+            fetch=self.fetch, step=self.step, priority=self.priority
+        )
+        remaining.interval = self.interval
+        remaining.latest = self.latest
+        for o in others:
+            remaining.interval -= o.interval
+            remaining.latest = remaining.latest and not o.latest
+        return remaining
+
+    @property
+    def empty(self) -> bool:
+        return self.interval.empty and not self.latest
+
+    @property
+    def order(self) -> Tuple[int, float]:
+        """ sorting key : best priority first, then most recent data first """
+        if self.latest or self.interval.empty:
+            return self.priority, float("-inf")
+        return self.priority, -self.interval.upper.timestamp()
+
+    def bounds(self) -> List[Tuple[Optional[datetime], Optional[datetime]]]:
+        """ the bounds of each request to do, most recent first """
+        requests = [] if not self.latest else [(None, None)]
+        requests += [(i.lower, i.upper) for i in reversed(list(self.interval))]
+        return requests
+
+
+class Scheduler:
+    """Gathers expectations from all views, and dispatches them from a single loop.
+
+    Overlapping intervals expected for the same view and step are merged, and expectations are
+    dispatched by priority, then most recent first. Ranges already being retrieved are not requested
+    again. Views still call the API themselves, so requests are paced by its rate limiter, and at
+    most `concurrency` views are retrieving data at the same time.
+    """
+
+    concurrency: int
+
+    pending: Dict[Hashable, Expectation]
+    in_flight: Dict[Hashable, List[Expectation]]
+    # views whose most recent data is expected again on every tick
+    polled: Dict[Hashable, Fetch]
+
+    task: Optional[Task]
+    # the tasks retrieving dispatched expectations, until they are done
+    dispatched: Set[Task]
+
+    def __init__(self, concurrency: int = 8):
+        self.concurrency = concurrency
+        self.pending = {}
+        self.in_flight = {}
+        self.polled = {}
+        self.task = None
+        self.dispatched = set()
+        self.semaphore = None
+        self.semaphore_loop = None
+
+    def expect(
+        self,
+        key: Hashable,
+        fetch: Fetch,
+        tint: TimeInterval,
+        priority: int = BACKGROUND,
+    ):
+        """ adds an expected time interval for the view identified by key """
+        key = (key, tint.step)
+        if key not in self.pending:
+            self.pending[key] = Expectation(
+                fetch=fetch, step=tint.step, priority=priority
+            )
+        self.pending[key].add(tint, priority)
+
+    def poll(self, key: Hashable, fetch: Fetch, step: Optional[TimeStep] = None):
+        """ expects the most recent data for the view identified by key, on every tick """
+        self.polled[(key, step)] = fetch
+
+    def expecting(self, key: Hashable) -> bool:
+        """ whether some data is still expected for the view identified by key """
+        return any(k == key for k, _ in self.pending) or any(
+            k == key and e for (k, _), e in self.in_flight.items()
+        )
+
+    async def _dispatch(self, key: Hashable, expectation: Expectation):
+        try:
+            async with self.semaphore:
+                for start, stop in expectation.bounds():
+                    await expectation.fetch(start, stop, expectation.step)
+        except Exception:  # one failing view must not stop the others
+            logger.exception(f"Failed to retrieve {key}")
+        finally:
+            self.in_flight[key].remove(expectation)
+            if not self.in_flight[key]:
+                self.in_flight.pop(key)
+
+    def tick(self) -> List[Task]:
+        """ dispatches the pending expectations, and returns the tasks retrieving them """
+        loop = asyncio.get_running_loop()
+        if self.semaphore_loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.semaphore_loop = loop
+
+        for (key, step), fetch in self.polled.items():
+            self.expect(key, fetch, TimeInterval(step=step))
+
+        pending, self.pending = self.pending, {}
+        tasks = []
+        # Note : tasks are started in order, and the semaphore lets them run in that order
+        for key, expectation in sorted(pending.items(), key=lambda ke: ke[1].order):
+            expectation = expectation.without(self.in_flight.get(key, []))
+            if expectation.empty:
+                continue  # already being retrieved
+            self.in_flight.setdefault(key, []).append(expectation)
+            task = loop.create_task(self._dispatch(key, expectation))
+            # Note : the loop keeps only weak references to tasks, nobody might be waiting for this one
+            self.dispatched.add(task)
+            task.add_done_callback(self.dispatched.discard)
+            tasks.append(task)
+        return tasks
+
+    async def _loop(self, mini_sleep: timedelta):
+        while True:
+            # minisleep to avoid looping too fast.
+            await asyncio.sleep(mini_sleep.total_seconds())
+            self.tick()
+
+    async def run(self, mini_sleep: timedelta = timedelta(seconds=3)):
+        """Dispatches the current expectations and waits for them,
+        then keeps dispatching new ones in a background task, if it is not running already."""
+        await asyncio.gather(*self.tick())
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.task = loop.create_task(self._loop(mini_sleep=mini_sleep))
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.task = None
+
+
+# Note : one scheduler for all views, so that expectations from all of them can be merged
+scheduler = Scheduler()
+
+
+class Expectations:
+    """The expectations of one view, sent to the scheduler.
+    This keeps the interface of the Queue each view had before."""
+
+    scheduler: Scheduler
+    key: Hashable  # identifying the view, even when it is initialized again
+    fetch: Fetch
+
+    def __init__(self, key: Hashable, fetch: Fetch, scheduler: Scheduler = scheduler):
+        self.key = key
+        self.fetch = fetch
+        self.scheduler = scheduler
+
+    def put_nowait(self, tint: TimeInterval, priority: int = BACKGROUND):
+        self.scheduler.expect(self.key, self.fetch, tint, priority=priority)
+
+    def poll(self, step: Optional[TimeStep] = None):
+        self.scheduler.poll(self.key, self.fetch, step=step)
+
+    def empty(self) -> bool:
+        return not self.scheduler.expecting(self.key)
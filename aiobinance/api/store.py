@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from aiobinance.api.model import columns
+from aiobinance.api.model.coverage import Coverage
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.pricecandle import PriceCandle
+from aiobinance.api.model.timeinterval import TimeStep, from_ms, to_ms
+from aiobinance.api.model.tradeframe import TradeFrame
+from aiobinance.config import AIOBINANCE_CACHE_DIR
+
+try:
+    import pyarrow
+except ImportError:  # optional : without it, data cannot be persisted on disk
+    pyarrow = None
+
+
+class CandleStore:
+    """Candles persisted on disk, in parquet files, per symbol and timestep.
+
+    Partitions are append-only : each fetched time range is written to a new file, named after
+    the [ms] bounds of that range, so that covered ranges are known without reading candles.
+    Ranges without any candle get an empty partition, to not request them again.
+    """
+
+    path: str
+
+    def __init__(self, path: str = AIOBINANCE_CACHE_DIR):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required to store candles in parquet files")
+        self.path = os.path.join(path, "candles")
+
+    def _directory(self, symbol: str, step: TimeStep) -> str:
+        return os.path.join(self.path, symbol, step.to_api())
+
+    def partitions(self, symbol: str, step: TimeStep) -> List[Tuple[int, int, str]]:
+        """ the [ms] bounds, both inclusive, and the file of each partition """
+        directory = self._directory(symbol, step)
+        if not os.path.isdir(directory):
+            return []
+        parts = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".parquet"):
+                start, stop = name[: -len(".parquet")].split("_")
+                parts.append((int(start), int(stop), os.path.join(directory, name)))
+        return parts
+
+    def covered(self, symbol: str, step: TimeStep) -> Coverage:
+        """ the time ranges of candle open times already stored """
+        coverage = Coverage()
+        for start, stop, _ in self.partitions(symbol, step):
+            coverage.add(from_ms(start), from_ms(stop))
+        return coverage
+
+    def gaps(
+        self, symbol: str, step: TimeStep, start_time: datetime, stop_time: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """ the time ranges, both bounds inclusive, that are not stored yet """
+        return self.covered(symbol, step).gaps(start_time, stop_time)
+
+    def load(
+        self, symbol: str, step: TimeStep, start_time: datetime, stop_time: datetime
+    ) -> OHLCFrame:
+        """ the stored candles opening between start_time and stop_time, both inclusive """
+        start, stop = to_ms(start_time), to_ms(stop_time)
+        tables = [
+            pd.read_parquet(f)
+            for lower, upper, f in self.partitions(symbol, step)
+            if lower <= stop and start <= upper
+        ]
+        if not tables:
+            return OHLCFrame()
+        table = pd.concat(tables, ignore_index=True)
+        table = table[(table.open_time >= start) & (table.open_time <= stop)]
+        return self._frame(table)
+
+    def append(
+        self,
+        symbol: str,
+        step: TimeStep,
+        start_time: datetime,
+        stop_time: datetime,
+        frame: OHLCFrame,
+        now: Optional[datetime] = None,
+    ):
+        """Stores the candles fetched for the [start_time, stop_time] range.
+        The candle still open at `now` might change, so the stored range stops before it.
+        """
+        now = datetime.now(tz=timezone.utc) if now is None else now
+        step_ms = step.delta.value // timedelta(milliseconds=1)
+        start = to_ms(start_time)
+        stop = min(to_ms(stop_time), to_ms(now) - step_ms)
+        if stop < start:
+            return
+
+        table = self._table(frame)
+        table = table[(table.open_time >= start) & (table.open_time <= stop)]
+
+        directory = self._directory(symbol, step)
+        os.makedirs(directory, exist_ok=True)
+        filepath = os.path.join(directory, f"{start}_{stop}.parquet")
+        # writing in a temporary file first, to never leave a partial partition behind
+        table.to_parquet(filepath + ".tmp", index=False)
+        os.replace(filepath + ".tmp", filepath)
+
+    @staticmethod
+    def _table(frame: OHLCFrame) -> pd.DataFrame:
+        """ the candles as in binance klines : timestamps in [ms] and decimals as strings """
+        df = frame._decoded(frame.df)
+        if not frame.empty:  # otherwise open_time is still a column
+            df = df.reset_index()
+        table = {}
+        for name, dtype in PriceCandle.as_dtype().items():
+            if dtype.kind == "M":
+                table[name] = df[name].to_numpy(dtype="datetime64[ms]").astype("int64")
+            elif dtype.kind == "O":
+                table[name] = df[name].map(str).to_numpy(dtype=object)
+            else:
+                table[name] = df[name].to_numpy(dtype=dtype)
+        return pd.DataFrame(table)
+
+    @staticmethod
+    def _frame(table: pd.DataFrame) -> OHLCFrame:
+        if table.empty:
+            return OHLCFrame()
+        df = {}
+        for name, dtype in PriceCandle.as_dtype().items():
+            if dtype.kind == "M":
+                df[name] = columns.datetimes_from_ms(name, table[name].to_numpy())
+            elif dtype.kind == "O":
+                df[name] = columns.decimals(name, table[name])
+            else:
+                df[name] = columns.integers(name, table[name].to_numpy(), dtype=dtype)
+        return OHLCFrame(df=pd.DataFrame(df))
+
+
+class TradeStore:
+    """Account trades persisted on disk, in parquet files, per symbol.
+
+    Trades are requested by increasing id, from the first one, so partitions are append-only and
+    named after the ids they contain. The state remembers the last trade id, the time of the first
+    trade, and the time until which all trades are known, to only request trades after that.
+    """
+
+    path: str
+
+    def __init__(self, path: str = AIOBINANCE_CACHE_DIR):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required to store trades in parquet files")
+        self.path = os.path.join(path, "trades")
+
+    def _directory(self, symbol: str) -> str:
+        return os.path.join(self.path, symbol)
+
+    def state(
+        self, symbol: str
+    ) -> Tuple[Optional[int], Optional[datetime], Optional[datetime]]:
+        """the last trade id stored, the time of the first trade stored,
+        and the time until which all trades are stored"""
+        filepath = os.path.join(self._directory(symbol), "state.json")
+        if not os.path.exists(filepath):
+            return None, None, None
+        with open(filepath, mode="r", encoding="utf-8") as f:
+            state = json.load(f)
+        return (
+            state["last_id"],
+            None if state["begin"] is None else from_ms(state["begin"]),
+            None if state["end"] is None else from_ms(state["end"]),
+        )
+
+    def load(self, symbol: str) -> TradeFrame:
+        directory = self._directory(symbol)
+        if not os.path.isdir(directory):
+            return TradeFrame(symbol=symbol)
+        tables = [
+            pd.read_parquet(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".parquet")
+        ]
+        if not tables:
+            return TradeFrame(symbol=symbol)
+        return TradeFrame.from_mytrades(
+            symbol, pd.concat(tables, ignore_index=True).to_dict("records")
+        )
+
+    def append(self, symbol: str, rows: List[Dict], end: Optional[datetime] = None):
+        """Stores raw myTrades rows, following the ones already stored.
+        end is the time until which all trades are now known, if it has changed.
+        """
+        last_id, begin, previous_end = self.state(symbol)
+
+        directory = self._directory(symbol)
+        os.makedirs(directory, exist_ok=True)
+        if rows:
+            ids = [r["id"] for r in rows]
+            filepath = os.path.join(directory, f"{min(ids)}_{max(ids)}.parquet")
+            # writing in a temporary file first, to never leave a partial partition behind
+            pd.DataFrame(rows).to_parquet(filepath + ".tmp", index=False)
+            os.replace(filepath + ".tmp", filepath)
+            last_id = max(ids) if last_id is None else max(last_id, max(ids))
+            first = from_ms(min(r["time"] for r in rows))
+            begin = first if begin is None else min(begin, first)
+
+        # Note : trades are requested from the first one, so the whole history is known until end
+        end = previous_end if end is None else end
+        state = {
+            "last_id": last_id,
+            "begin": None if begin is None else to_ms(begin),
+            "end": None if end is None else to_ms(end),
+        }
+        filepath = os.path.join(directory, "state.json")
+        with open(filepath + ".tmp", mode="w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(filepath + ".tmp", filepath)
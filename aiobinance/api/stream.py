@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.timeinterval import TimeStep
+from aiobinance.api.ohlcview import OHLCView
+from aiobinance.api.rawapi import default_decoder
+
+try:
+    import aiohttp
+except ImportError:  # optional : without it, there is no websocket client
+    aiohttp = None
+
+logger = logging.getLogger("aiobinance.api.stream")
+
+
+class KlineStream:
+    """Live candles of one market and timestep, pushed by binance through a websocket.
+
+    Each kline event is applied to the OHLCView as it arrives, updating the last candle in place
+    or appending a new one, instead of polling klines.
+    """
+
+    # Ref : https://binance-docs.github.io/apidocs/spot/en/#websocket-market-streams
+    url: str = "wss://stream.binance.com:9443/ws"
+
+    ohlcv: OHLCView
+    timestep: TimeStep
+
+    # time to wait before connecting again, after the connection was lost
+    reconnect: timedelta
+    # the connection is considered lost when no message arrives for that long
+    timeout: timedelta
+
+    def __init__(
+        self,
+        ohlcv: OHLCView,
+        timestep: TimeStep,
+        url: Optional[str] = None,
+        reconnect: timedelta = timedelta(seconds=5),
+        timeout: timedelta = timedelta(minutes=1),
+        decoder: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        :param url: the websocket base url, binance by default
+        :param decoder: json decoder for events, orjson if installed, json otherwise
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required to stream from binance websockets")
+        self.ohlcv = ohlcv
+        self.timestep = timestep
+        self.url = self.url if url is None else url
+        self.reconnect = reconnect
+        self.timeout = timeout
+        self.decoder = default_decoder() if decoder is None else decoder
+
+    @property
+    def stream_url(self) -> str:
+        return f"{self.url}/{self.ohlcv.symbol.lower()}@kline_{self.timestep.to_api()}"
+
+    def apply(self, message: str) -> Optional[OHLCFrame]:
+        """ applies one message from the websocket, and returns the candle it changed """
+        event = self.decoder(message)
+        if not isinstance(event, dict) or event.get("e") != "kline":
+            return None  # not a kline event
+        return self.ohlcv.apply_kline(self.timestep, event["k"])
+
+    def _apply(self, message: str):
+        """ applies one message, logging the error instead of raising it """
+        try:
+            self.apply(message)
+        except Exception as exc:  # Note : one bad message must not end the stream
+            logger.warning(
+                f"Kline stream {self.stream_url} skipped {message!r}: {exc!r}"
+            )
+
+    async def run(self):
+        """Applies events as they arrive, connecting again when the connection is lost or silent.
+        A message that cannot be applied is logged and skipped. This runs until its task is cancelled."""
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    # Note : aiohttp answers binance pings by itself
+                    # Note : closing a lost connection waits for the server as long
+                    async with session.ws_connect(
+                        self.stream_url,
+                        timeout=self.timeout.total_seconds(),
+                        receive_timeout=self.timeout.total_seconds(),
+                    ) as ws:
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self._apply(msg.data)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    logger.warning(f"Kline stream {self.stream_url} failed: {exc!r}")
+                # minisleep to avoid connecting again too fast.
+                await asyncio.sleep(self.reconnect.total_seconds())
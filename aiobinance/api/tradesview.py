@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-from asyncio import Queue, Task
+from asyncio import Task
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Dict, List, Optional
 
 import hypothesis.strategies as st
 
+from aiobinance.api.model.coverage import Coverage
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.timeinterval import TimeInterval, TimeStep
 from aiobinance.api.model.trade import Trade
 from aiobinance.api.pure.tradesviewbase import TradeFrame, TradesViewBase
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.scheduler import Expectations
+from aiobinance.api.store import TradeStore
 
 # TODO: this should probably done in types instead (metaclass, etc.)
 _tradeview_instances: Dict[str, TradesView] = {}
@@ -31,13 +35,28 @@ class TradesView(TradesViewBase):
     begin: Optional[datetime] = None
     end: Optional[datetime] = None
 
-    # TODO : aiostream instead of queue here ?
-    #  we need to think about combining expectatinos in a way that make sense (Time Interval arithmetic)
-    expectations: Optional[Queue]  # containing TimeInterval as the requested dataset
+    # the TimeIntervals requested, merged and dispatched by the shared scheduler
+    expectations: Expectations
 
     update_hooks: List[Callable[[TradeFrame], bool]]
     update_loop: Optional[Task]
 
+    # building a Trade for each received trade, to debug data issues.
+    validate: bool = False
+
+    # when set, trades are kept on disk, and only trades after the last known id are requested.
+    store: Optional[TradeStore] = None
+    last_id: Optional[int] = None
+
+    # time ranges already requested
+    coverage: Coverage
+
+    # maximum number of trades in one response
+    limit: int = 1000
+
+    # when set, trades are stored as scaled int64 in the frame, as numpy operates on them natively.
+    precision: Optional[FixedPoint] = None
+
     @staticmethod
     def strategy(max_size=5):
         return st.builds(
@@ -47,7 +66,13 @@ class TradesView(TradesViewBase):
             frame=TradeFrame.strategy(max_size=max_size),
         )
 
-    def __new__(cls, api: Binance, symbol: str, frame: Optional[TradeFrame] = None):
+    def __new__(
+        cls,
+        api: Binance,
+        symbol: str,
+        frame: Optional[TradeFrame] = None,
+        precision: Optional[FixedPoint] = None,
+    ):
 
         if symbol in _tradeview_instances.keys():
             return _tradeview_instances[
@@ -59,18 +84,32 @@ class TradesView(TradesViewBase):
         _tradeview_instances[symbol] = self
         return self  # init will do the rest
 
-    def __init__(self, api: Binance, symbol: str, frame: Optional[TradeFrame] = None):
+    def __init__(
+        self,
+        api: Binance,
+        symbol: str,
+        frame: Optional[TradeFrame] = None,
+        precision: Optional[FixedPoint] = None,
+    ):
         self.api = api
         self.symbol = symbol
+        self.precision = precision
 
         if frame is None:
-            frame = TradeFrame(symbol=symbol) if frame is None else frame
+            # Note : an empty frame keeps its precision, for the trades merged in it
+            frame = TradeFrame(symbol=symbol, precision=precision)
         else:
-            frame = frame
+            frame = frame.with_precision(precision)
             self.begin = frame.time_utc[0]
             self.end = frame.time_utc[-1]
 
-        self.expectations = None  # maybe no async event loop just yet
+        self.last_id = None  # stored trades will be loaded again on next sync
+        self.coverage = Coverage()
+        # Note that timeStep is not involved in trade requests
+        self.expectations = Expectations(
+            key=(TradesView, symbol),
+            fetch=lambda start, stop, step: self.at(start_time=start, stop_time=stop),
+        )
         self.update_hooks = []  # because multiple things can wait for one update
         self.update_loop = None
 
@@ -82,7 +121,7 @@ class TradesView(TradesViewBase):
     async def request(
         self, start_time: datetime = None, stop_time: datetime = None, **kwargs
     ):
-        """ this retrieves recent trades, update the frame, and broadcast updates"""
+        """ this retrieves recent trades, update the frame, broadcast updates, and returns the received trades"""
 
         # keep old frame version
         # Note : for this to work, this must be the only point where it is possible to update the encapsulated data
@@ -107,9 +146,9 @@ class TradesView(TradesViewBase):
 
         reqparams.update({"symbol": self.symbol})
 
-        reqparams.update({"limit": 1000})
+        reqparams.update({"limit": self.limit})
 
-        res = self.api.call_api(command="myTrades", **reqparams)
+        res = await self.api.call_api(command="myTrades", **reqparams)
 
         if res.is_ok():
             res = res.value
@@ -118,26 +157,9 @@ class TradesView(TradesViewBase):
 
         # Binance translation is only a matter of binance json -> python data structure && avoid data duplication.
         # We do not want to change the semantics of the exchange exposed models here.
-        trades = [
-            Trade(
-                time_utc=r["time"] * 1e-3,  # converting [ms] to [s] as float
-                symbol=r["symbol"],
-                id=r["id"],
-                order_id=r["orderId"],
-                order_list_id=r["orderListId"],
-                price=r["price"],
-                qty=r["qty"],
-                quote_qty=r["quoteQty"],
-                commission=r["commission"],
-                commission_asset=r["commissionAsset"],
-                is_buyer=r["isBuyer"],
-                is_maker=r["isMaker"],
-                is_best_match=r["isBestMatch"],
-            )
-            for r in res
-        ]
-        # TODO: probably better idea to store data in frame, before converting (but still verifying data type somehow...)
-        frame = TradeFrame.from_tradeslist(self.symbol, *trades)
+        frame = TradeFrame.from_mytrades(
+            self.symbol, res, validate=self.validate, precision=self.precision
+        )
         # We let baseclasse aggregate tradeframes
         super(TradesView, self).__call__(frame=frame)
         # we upgrade bounds here, based on request
@@ -145,7 +167,6 @@ class TradesView(TradesViewBase):
         self.end = stop_time if self.end is None else max(self.end, stop_time)
 
         # broadcast update
-        # TODO : OPTIMIZE THIS ! Difference Computation is too slow...
         frameupdate = self.frame.difference(old_frame)
         # NEW WAY
         if not frameupdate.empty:
@@ -153,46 +174,61 @@ class TradesView(TradesViewBase):
                 hook(frameupdate)
                 # TODO : somethg useful with return value ? popping the hook ?
 
-    async def loop(self, mini_sleep: timedelta = timedelta(seconds=10)):
-
-        if self.expectations is None:
-            self.expectations = Queue()
+        return frame
 
-        # TODO : avoid multiple calls here !!
-        tint = None
-        while not self.expectations.empty():  # to avoid blocking when not useful
-            new_tint = await self.expectations.get()
-
-            tint = (
-                tint.union(new_tint) if tint is not None else new_tint
-            )  # merging time intervals to minimize calls
-
-            self.expectations.task_done()
+    async def sync(self):
+        """Loads the stored trades, then requests the following ones, one page of trade ids at a time.
+        This keeps the whole trade history, and only costs one call when there is no new trade."""
+        old_frame = self.frame
 
-        if tint is None:  # no interval specified ->  rely on default values
-            await self.at()
-        else:  # only ensure data present for the specified interval
-            await self.at(  # Note that timeStep is not involved in trade requests
-                start_time=tint.start, stop_time=tint.stop
+        if self.last_id is None:
+            super(TradesView, self).__call__(
+                frame=self.store.load(self.symbol).with_precision(self.precision)
+            )
+            self.last_id, self.begin, self.end = self.store.state(self.symbol)
+
+        # Note : trades after this time might not be in the last page
+        now = datetime.now(tz=timezone.utc)
+        while True:
+            res = await self.api.call_api(
+                command="myTrades",
+                symbol=self.symbol,
+                fromId=0 if self.last_id is None else self.last_id + 1,
+                limit=self.limit,
             )
+            if res.is_err():
+                raise RuntimeError(res.err())
+            rows = res.ok()
+
+            super(TradesView, self).__call__(
+                frame=TradeFrame.from_mytrades(
+                    self.symbol, rows, validate=self.validate, precision=self.precision
+                )
+            )
+            complete = len(rows) < self.limit
+            self.store.append(self.symbol, rows, end=now if complete else None)
+            self.last_id, self.begin, self.end = self.store.state(self.symbol)
+            if complete:
+                break
 
-        if self.update_loop is not None:  # not the first time
-            await asyncio.sleep(
-                mini_sleep.total_seconds()
-            )  # minisleep to avoid looping too fast.
+        # broadcast update
+        frameupdate = self.frame.difference(old_frame)
+        if not frameupdate.empty:
+            for hook in self.update_hooks:
+                hook(frameupdate)
 
-        # this trampoline and behaves as a minimal inner service...
-        self.update_loop = asyncio.get_running_loop().create_task(
-            self.loop(mini_sleep=mini_sleep)
-        )
+        return self.frame
 
-        # we return after first process, while leaving a task running when possible...
-        # TODO:investigate if trio might be better here for structured async concurrency...
+    async def loop(self, mini_sleep: timedelta = timedelta(seconds=10)):
+        """Processes the current expectations, while leaving the shared scheduler running,
+        to process later ones, and to retrieve recent trades on each tick."""
+        self.expectations.poll()
+        await self.expectations.scheduler.run(mini_sleep=mini_sleep)
+        self.update_loop = self.expectations.scheduler.task
 
     async def run(self, mini_sleep: timedelta = timedelta(seconds=3)):
-        if self.update_loop is None:
-            await self.loop(mini_sleep=mini_sleep)
-        # else we silently skip it because we ever want only ONE loop !
+        # Note : the scheduler runs only ONE loop for all views.
+        await self.loop(mini_sleep=mini_sleep)
 
     async def at(
         self,
@@ -204,31 +240,42 @@ class TradesView(TradesViewBase):
         :param stop_time: the stop_time of data we need to retrieve (might not be returned, use [] to access it if needed)
         :return:
         """
-        if (
+        if self.store is not None:
+            # the whole history is known up to self.end, no need to look at trades here
+            if self.end is None or stop_time is None or self.end < stop_time:
+                await self.sync()
+                if self.begin is not None:  # no trade before the first one stored
+                    self.coverage.add(self.begin, self.end)
+            return self.frame
+
+        if start_time is not None and stop_time is not None:
+            # only the time ranges not requested yet are requested, one window at a time
+            for gap_start, gap_stop in self.coverage.gaps(start_time, stop_time):
+                while gap_start <= gap_stop:
+                    # Note : binance limits myTrades requests to 24h
+                    window_stop = min(gap_start + timedelta(hours=24), gap_stop)
+                    now = datetime.now(tz=timezone.utc)
+                    frame = await self.request(
+                        start_time=gap_start, stop_time=window_stop
+                    )
+                    if len(frame) >= self.limit:
+                        # full page : more trades might share the time of the last one, so we start again from it
+                        window_stop = max(
+                            max(frame.time_utc) - timedelta(milliseconds=1), gap_start
+                        )
+                    # trades happening after now are not covered yet
+                    self.coverage.add(
+                        gap_start, min(window_stop, now), empty=frame.empty
+                    )
+                    gap_start = window_stop + timedelta(milliseconds=1)
+
+        elif (
             self.frame.empty
             or (start_time is not None and self.begin > start_time)
             or (stop_time is not None and self.end < stop_time)
         ):
-
-            if start_time is None or stop_time is None:
-                # do the first request to get recent data, and await
-                await self.request(start_time=start_time, stop_time=stop_time)
-            else:
-                req_itv = min(stop_time - start_time, timedelta(hours=24))
-                # 1 deciding if we request after known data or before
-                while self.frame.empty or self.end < stop_time:  # after
-                    await self.request(
-                        start_time=start_time, stop_time=start_time + req_itv
-                    )
-                    # this will modify self.close_time but we also need to change start_time to make progress
-                    start_time = start_time + req_itv
-
-                while self.frame.empty or self.begin > start_time:  # before
-                    await self.request(
-                        start_time=stop_time - req_itv, stop_time=stop_time
-                    )
-                    # this will modify self.open_time but we also need to change stop_time to make progress
-                    stop_time = stop_time - req_itv
+            # do the first request to get recent data, and await
+            await self.request(start_time=start_time, stop_time=stop_time)
 
         # return the frame
         return self.frame
@@ -8,6 +8,7 @@ from aiobinance.api.account import Account
 from aiobinance.api.exchange import Exchange
 from aiobinance.api.ohlcview import OHLCView
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.store import TradeStore
 from aiobinance.api.tradesview import TradesView
 from aiobinance.cli.cli_group import cli, pass_creds
 from aiobinance.cli.params.date import Date
@@ -46,6 +47,9 @@ def balance(creds: Credentials):
 )  # default to today
 @click.option("--utc", "utc", default=False, is_flag=True)
 @click.option("--html", default=False, is_flag=True)
+@click.option(
+    "--cache", default=False, is_flag=True
+)  # keeping trades on disk, in AIOBINANCE_CACHE_DIR
 @pass_creds
 def trades(
     creds: Credentials,
@@ -54,6 +58,7 @@ def trades(
     to_date: date,
     utc=False,
     html=True,
+    cache=False,
 ):
     """display trades for this account"""
     import asyncio
@@ -68,6 +73,9 @@ def trades(
     api = Binance(credentials=creds)  # we need private requests here !
 
     trades = TradesView(api=api, symbol=market_pair)
+    if cache:
+        # only the trades after the last one stored will be requested
+        trades.store = TradeStore()
 
     # while we are moving to an async interface
     asyncio.run(trades.at(start_time=from_datetime, stop_time=to_datetime))
@@ -92,7 +100,8 @@ def trades(
 
     # TODO : terminal plot ??
 
-    print(trades)
+    # Note : with a cache, the view holds the whole trade history
+    print(trades.frame[from_datetime:to_datetime] if cache else trades)
 
 
 if __name__ == "__main__":
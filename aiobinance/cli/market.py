@@ -9,8 +9,10 @@ from aiobinance.api.exchange import Exchange
 from aiobinance.api.market import Market
 from aiobinance.api.model.timeinterval import TimeStep
 from aiobinance.api.rawapi import Binance
+from aiobinance.api.store import CandleStore
 from aiobinance.cli.cli_group import cli
 from aiobinance.cli.params.date import Date
+from aiobinance.config import AIOBINANCE_CACHE_DIR
 
 local_tz = datetime.now(tz=timezone.utc).astimezone().tzinfo
 
@@ -51,6 +53,9 @@ local_tz = datetime.now(tz=timezone.utc).astimezone().tzinfo
 )  # default to nothing -> calculated based on max data point (for one request only)
 @click.option("--utc", default=False, is_flag=True)
 @click.option("--html", default=False, is_flag=True)
+@click.option(
+    "--cache", default=False, is_flag=True
+)  # keeping candles on disk, in AIOBINANCE_CACHE_DIR
 def price(
     market: str,
     from_date: date,
@@ -58,6 +63,7 @@ def price(
     interval: Optional[str] = None,
     utc=False,
     html=True,
+    cache=False,
 ):
     """display prices"""
     import asyncio
@@ -65,10 +71,19 @@ def price(
     # API for public endpoints only
     api = Binance()
 
-    exchange = Exchange(api=api, test=True)
+    # with a cache, exchange info is also kept on disk, and requested only when outdated
+    exchange = Exchange(
+        api=api, test=True, cache_dir=AIOBINANCE_CACHE_DIR if cache else None
+    )
+
+    async def update():
+        await exchange()
+        if exchange.refreshing is not None:
+            # Note : we will not be running long enough for a background refresh
+            await exchange.refreshing
 
     # while we are moving to an async interface
-    asyncio.run(exchange())  # retrieving data
+    asyncio.run(update())  # retrieving data
 
     market = exchange.markets[market]
 
@@ -97,12 +112,13 @@ def price(
         raise RuntimeError(f"Cannot understand timestep {interval}")
     interval = TimeStep(interval)
 
+    ohlcv = market.price
+    if cache:
+        # only the candles not stored yet will be requested
+        ohlcv.store = CandleStore()
+
     # while we are moving to an async interface
-    ohlcv = asyncio.run(
-        market.price.request(
-            start_time=from_datetime, stop_time=to_datetime, interval=interval
-        )
-    )
+    asyncio.run(ohlcv.at(interval, start_time=from_datetime, stop_time=to_datetime))
 
     if html:
 
@@ -16,6 +16,12 @@ DEFAULT_BINANCE_API_KEYFILE = os.path.expanduser("~/.config/aiobinance/binance.k
 BINANCE_API_KEYFILE = os.getenv("AIOBINANCE_API_KEYFILE", DEFAULT_BINANCE_API_KEYFILE)
 BINANCE_API_KEYFILE = os.path.normpath(BINANCE_API_KEYFILE)
 
+DEFAULT_AIOBINANCE_CACHE_DIR = os.path.expanduser("~/.cache/aiobinance")
+
+# If the environment variable is set, override the default value
+AIOBINANCE_CACHE_DIR = os.getenv("AIOBINANCE_CACHE_DIR", DEFAULT_AIOBINANCE_CACHE_DIR)
+AIOBINANCE_CACHE_DIR = os.path.normpath(AIOBINANCE_CACHE_DIR)
+
 logger = logging.getLogger("aiobinance.config")
 
 
@@ -10,7 +10,7 @@ from bokeh.server.server import Server
 from aiobinance.api.exchange import Exchange
 from aiobinance.api.market import Market
 from aiobinance.api.rawapi import Binance
-from aiobinance.config import load_api_keyfile
+from aiobinance.config import AIOBINANCE_CACHE_DIR, load_api_keyfile
 from aiobinance.web.exchange import ExchangeHandler
 from aiobinance.web.market import MarketHandler
 
@@ -58,6 +58,8 @@ async def main(exchange: Exchange):
 
 creds = load_api_keyfile()
 
-exchange = Exchange(api=Binance(credentials=creds), test=True)
+exchange = Exchange(
+    api=Binance(credentials=creds), test=True, cache_dir=AIOBINANCE_CACHE_DIR
+)
 
 asyncio.run(main(exchange))
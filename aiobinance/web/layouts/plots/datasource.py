@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from bokeh.models import ColumnDataSource
+
+
+class SourceUpdater:
+    """Sends updated rows of a frame to a ColumnDataSource, without sending the other rows again.
+
+    Rows of the source are identified by a sorted key column (open_time, trade id...).
+    Rows already in the source are patched where they are, rows after the last one are streamed,
+    keeping at most `rollover` rows, and only rows older than the last one need to send the whole
+    source again.
+    """
+
+    source: ColumnDataSource
+    key: str
+    rollover: Optional[int]
+
+    # keys of the rows in the source, in the same order
+    keys: np.ndarray
+
+    def __init__(
+        self, source: ColumnDataSource, key: str, rollover: Optional[int] = None
+    ):
+        self.source = source
+        self.key = key
+        self.rollover = rollover
+        self.keys = np.asarray(source.data[key])
+
+    @staticmethod
+    def _runs(positions: np.ndarray) -> List[Tuple[int, int, int]]:
+        """ contiguous runs of positions, as (start, stop) in the source, and start in positions """
+        breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+        return [
+            (int(positions[b]), int(positions[e - 1]) + 1, int(b))
+            for b, e in zip(np.r_[0, breaks], np.r_[breaks, len(positions)])
+        ]
+
+    def update(self, data: Dict[str, np.ndarray]):
+        """Applies rows of data, with the same columns as the source, sorted by key.
+        Browser traffic is proportional to the number of rows in data, unless some are older rows."""
+        keys = np.asarray(data[self.key])
+        if len(keys) == 0:
+            return
+        data = {c: np.asarray(v) for c, v in data.items()}
+
+        positions = self.keys.searchsorted(keys)
+        known = positions < len(self.keys)
+        known[known] = self.keys[positions[known]] == keys[known]
+        later = (
+            np.ones(len(keys), dtype=bool)
+            if len(self.keys) == 0
+            else keys > self.keys[-1]
+        )
+
+        if not np.all(known | later):
+            # older rows cannot be inserted with a patch or a stream
+            self._reset(data, known)
+            return
+
+        if known.any():
+            patches = {c: [] for c in data}
+            for start, stop, first in self._runs(positions[known]):
+                for c, values in data.items():
+                    rows = values[known][first : first + stop - start]
+                    patches[c].append((slice(start, stop), rows))
+            self.source.patch(patches)
+
+        if later.any():
+            self.source.stream(
+                {c: values[later] for c, values in data.items()},
+                rollover=self.rollover,
+            )
+            self.keys = np.concatenate([self.keys, keys[later]])
+            if self.rollover is not None:
+                self.keys = self.keys[-self.rollover :]
+
+    def _reset(self, data: Dict[str, np.ndarray], known: np.ndarray):
+        """ sends the whole source again, with data merged in it """
+        positions = self.keys.searchsorted(data[self.key][known])
+        merged = {}
+        for c, values in data.items():
+            current = np.array(self.source.data[c])  # a copy, patched here
+            current[positions] = values[known]
+            merged[c] = np.concatenate([current, values[~known]])
+        self.reset(merged)
+
+    def reset(self, data: Dict[str, np.ndarray]):
+        """ sends the whole source again, sorted by key """
+        order = np.argsort(np.asarray(data[self.key]), kind="stable")
+        self.source.data = {c: np.asarray(v)[order] for c, v in data.items()}
+        self.keys = np.asarray(self.source.data[self.key])
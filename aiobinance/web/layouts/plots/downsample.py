@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
+
+
+def envelope(x: np.ndarray, y: np.ndarray, start, stop, width: int) -> np.ndarray:
+    """Positions of the points to draw the line of (x, y) on `width` pixels, between start and stop.
+
+    For each pixel column, only the first, last, lowest and highest points are kept : the line drawn
+    looks the same, with at most 4 points per pixel, however many points are in [start, stop].
+    The points just outside [start, stop] are kept as well, for the line to reach the borders.
+    x is sorted, numbers or datetime64, and start, stop are of the same kind.
+    """
+    x = _numeric(x)
+    start, stop = _numeric(start), _numeric(stop)
+    lo = max(int(np.searchsorted(x, start, side="left")) - 1, 0)
+    hi = min(int(np.searchsorted(x, stop, side="right")) + 1, len(x))
+    if hi - lo <= 4 * width:
+        return np.arange(lo, hi)
+
+    # a pixel column for each point, points outside [start, stop] have their own, on each side
+    # Note : in float, nanoseconds times width would overflow int64
+    span = max(stop - start, 1)
+    columns = np.clip(np.floor((x[lo:hi] - start) / span * width), -1, width)
+
+    # sorted by column, then y : the lowest and highest points are the first and last of a column
+    order = np.lexsort((np.asarray(y[lo:hi], dtype="float64"), columns))
+    bounds = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    lasts = np.r_[bounds[1:], len(columns)] - 1
+    kept = np.unique(np.r_[bounds, lasts, order[bounds], order[lasts]])
+    return kept + lo
+
+
+def _numeric(x):
+    """ datetime64 as int64 nanoseconds, numbers as they are """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64")
+    return x
+
+
+def candle_step(
+    step: TimeStep, span: timedelta, width: int, candle_width: int
+) -> Optional[TimeStep]:
+    """The finest step built from `step` candles, showing `span` with candles of at least
+    `candle_width` pixels, on `width` pixels. None if candles of `step` are wide enough already."""
+    candles = max(width // candle_width, 1)
+    if span / step.delta.value <= candles:
+        return None
+    coarser = [
+        TimeStep(d)
+        for d in TimeIntervalDelta
+        if d > step.delta and step.divides(TimeStep(d))
+    ]
+    for c in coarser:
+        if span / c.delta.value <= candles:
+            return c
+    # Note : even the coarsest candles are too thin, they are the fewest we can show
+    return coarser[-1] if coarser else None
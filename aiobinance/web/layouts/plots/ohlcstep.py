@@ -4,7 +4,7 @@ import asyncio
 import functools
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 import numpy as np
 from bokeh.document import Document
@@ -34,7 +34,10 @@ from aiobinance.api.model.timeinterval import (
 )
 from aiobinance.api.model.tradeframe import TradeFrame
 from aiobinance.api.ohlcview import OHLCView
+from aiobinance.api.scheduler import VISIBLE
 from aiobinance.api.tradesview import TradesView
+from aiobinance.web.layouts.plots.datasource import SourceUpdater
+from aiobinance.web.layouts.plots.downsample import candle_step
 
 
 @dataclass
@@ -46,6 +49,14 @@ class OHLCStepPlots:
 
     selected_tf: TimeStep = field(default=TimeIntervalDelta.minutely)
     num_candles: int = field(default=120)
+    # candles kept in the browser, while streaming new ones
+    rollover: Optional[int] = field(default=5_000)
+    # candles thinner than this, in pixels, are merged into candles of a coarser step
+    candle_width: int = field(default=3)
+
+    # the step and the time window of the candles in the datasource
+    shown_step: Optional[TimeStep] = field(default=None, init=False)
+    shown_window: Optional[Tuple[datetime, datetime]] = field(default=None, init=False)
 
     # update_needed: asyncio.Event = field(default_factory=asyncio.Event)
 
@@ -55,15 +66,26 @@ class OHLCStepPlots:
 
     @functools.cached_property
     def datasource(self) -> ColumnDataSource:
-        return self.framesource.as_datasource(
-            compute_mid_time=True, compute_upwards=True
-        )
+        # until the browser tells us the visible range, only the last candles are sent
+        frame = self.framesource
+        return OHLCFrame(
+            df=frame.df.iloc[-3 * self.num_candles :], precision=frame.precision
+        ).as_datasource(compute_mid_time=True, compute_upwards=True)
+
+    @functools.cached_property
+    def updater(self) -> SourceUpdater:
+        return SourceUpdater(self.datasource, key="open_time", rollover=self.rollover)
 
     @functools.cached_property
     def tradesource(self) -> Optional[ColumnDataSource]:
         if self.trades:
             return self.trades.frame.as_datasource()
 
+    @functools.cached_property
+    def tradeupdater(self) -> Optional[SourceUpdater]:
+        if self.tradesource is not None:
+            return SourceUpdater(self.tradesource, key="trade_id")
+
     @functools.cached_property
     def fig(self) -> Figure:
 
@@ -72,7 +94,7 @@ class OHLCStepPlots:
             follow_interval=self.num_candles * self.selected_tf.delta.value,
             # computation  is somehow wrong here ??
             min_interval=(self.num_candles // 2) * self.selected_tf.delta.value,
-            max_interval=self.num_candles * 2 * self.selected_tf.delta.value,
+            # Note : no max_interval, candles are merged when zooming out
             # range_padding= 3* self.selected_tf.delta.value
         )
         date_xrange.on_change("start", self.on_xrange_start_changed)
@@ -229,13 +251,81 @@ class OHLCStepPlots:
                 # maybe requesting new data
                 self(from_date=earliest, til_date=open_time)
 
+            # showing candles for the new range
+            self.downsample()
+
+    def _viewport(self) -> Optional[Tuple[datetime, datetime, int]]:
+        """ the visible time range, and its width in pixels, None until the browser sets it """
+        start, end = self.fig.x_range.start, self.fig.x_range.end
+        if start is None or end is None or end <= start:
+            return None
+        # Note : inner_width is set by the browser, once the figure is laid out
+        width = self.fig.inner_width or self.fig.plot_width
+        return (
+            datetime.fromtimestamp(start * 0.001, tz=timezone.utc),
+            datetime.fromtimestamp(end * 0.001, tz=timezone.utc),
+            width,
+        )
+
+    def _candles(self, step: TimeStep, start: datetime, stop: datetime) -> OHLCFrame:
+        """ candles of step in [start, stop[, built from the candles of the selected timestep """
+        frame = self.ohlcv[self.selected_tf]
+        # converting datetime to unaware timezone, in utc. to allow comparison with unaware numpy values.
+        start = start.astimezone(tz=timezone.utc).replace(tzinfo=None)
+        stop = stop.astimezone(tz=timezone.utc).replace(tzinfo=None)
+        # Note : unlike a slice of the frame, this does not pick border candles of another bucket
+        frame = OHLCFrame(
+            df=frame.df.iloc[
+                frame.df.index.searchsorted(start) : frame.df.index.searchsorted(stop)
+            ],
+            precision=frame.precision,
+        )
+        return frame if step == self.selected_tf else frame.resample(step)
+
+    def downsample(self, force: bool = False):
+        """Shows the candles of the visible range, merged when they would be too thin.
+
+        The datasource holds the candles of three times the visible range, centered on it.
+        It is sent again only when the view goes out of these, or needs candles of another step,
+        so the browser never holds more than a few times its width in candles.
+        """
+        viewport = self._viewport()
+        if viewport is None:
+            return
+        start, stop, width = viewport
+        span = stop - start
+        step = (
+            candle_step(self.selected_tf, span, width, self.candle_width)
+            or self.selected_tf
+        )
+        if (
+            not force
+            and step == self.shown_step
+            and self.shown_window is not None
+            and self.shown_window[0] <= start
+            and stop <= self.shown_window[1]
+        ):
+            return  # the candles shown are still the right ones
+
+        window = (step.floor(start - span), step.floor(stop + span) + step.delta.value)
+        candles = self._candles(step, *window)
+        self.updater.reset(
+            candles.as_datasource(compute_mid_time=True, compute_upwards=True).data
+        )
+        self.upbar.glyph.width = step.delta.value
+        self.downbar.glyph.width = step.delta.value
+        self.shown_step, self.shown_window = step, window
+
     def __post_init__(self):
+        self.shown_step = self.selected_tf
 
         # register update hook
         self.ohlcv.update_hook(ts=self.selected_tf, callback=self._update_hook)
 
         # send a request for this timeframe (as we would do on change)
-        self.ohlcv.expectations.put_nowait(TimeInterval(step=self.selected_tf))
+        self.ohlcv.expectations.put_nowait(
+            TimeInterval(step=self.selected_tf), priority=VISIBLE
+        )
 
         # # NOT WORKING :-/
         # fig.on_change(
@@ -274,74 +364,42 @@ class OHLCStepPlots:
         """ View updates, need to be in sync with document tick... """
         # proceed with the update of this tf...
 
+        if self.shown_step != self.selected_tf and not frameupdate.empty:
+            # merged candles containing the update are built again
+            frameupdate = self._candles(
+                self.shown_step,
+                self.shown_step.floor(frameupdate.open_time),
+                self.shown_step.floor(frameupdate.close_time)
+                + self.shown_step.delta.value,
+            )
+
         newsource = frameupdate.as_datasource(
             compute_mid_time=True, compute_upwards=True
         )
-
-        # TODO: PATCH existing candles in plot...
-        # new elements : we stream new data
-        # patch method cannot add data BUT it cleans up potential graphical artifacts from previous stream/patches
-        try:
-            # let bokeh refresh entirely from new datasource...
-            self.datasource.stream(newsource.data)
-        except Exception as e:
-            raise e
-        # In all cases:
-        # manual patch (somehow bokeh stream fails to patch properly)
-
-        # TODO : Optimization : Later...
-        #
-        # if len(ohlcvpatch) > 0 and len(self.ohlcv) > 0:  # otherwise stream has already done the job
-        #     prev_close_time = np.datetime64(self.ohlcv.close_time.replace(tzinfo=None))
-        #
-        #     # compute indexes depending on open_time
-        #     idxs = []
-        #     for (
-        #         ot
-        #     ) in (
-        #         ohlcvpatch.df.index
-        #     ):  # since we are playing with numpy here, lets access the dataframe directly
-        #         npot = ot.to_datetime64()
-        #         if npot < prev_close_time:  # if opentime is in previous data
-        #             # exactly matching open_time on previous datasource and recover numeric index
-        #             idx = np.where(self.datasource.data["open_time"] == npot)[
-        #                 0
-        #             ]  # one dimension
-        #             idxs += idx.tolist()
-        #         # else we skip those (stream should have handled them, no need to patch)
-        #
-        #     if idxs:  # only attempting update if there is any difference in past data
-        #         dspatch = ohlcvpatch.as_datasource(
-        #             compute_mid_time=True, compute_upwards=True
-        #         )
-        #         # DEBUG
-        #         # print(dspatch.data)
-        #
-        #         # applying indexes to al columns
-        #         patches = {
-        #             col: [(idx, v) for idx, v in zip(idxs, valarray)]
-        #             for col, valarray in dspatch.data.items()
-        #         }
-        #         self.datasource.patch(patches)
-        #
-        #     # updating base value in all case when difference detected
-        #     # Note: we want to attempt recomputing the same patch on next tick if something fails for some reason
-        #     self.ohlcv = ohlcv
-
-        # otherwise nothing changes
+        # candles already displayed are patched, new ones are streamed
+        self.updater.update(newsource.data)
 
         if self.trades is not None:
             # we can use trades to plot together...
-            new_tradesource = self.trades.frame.as_datasource()
-            if (
-                new_tradesource.data != self.tradesource.data
-            ):  # detecting difference in datasource (working ? optimal ?)
-
-                # let bokeh refresh entirely from new datasource...
-                self.tradesource.stream(new_tradesource.data)
-
-                # is this needed ? probably not...
-                # self.tradesource = new_tradesource
+            frame = self.trades.frame
+            shown = self.tradeupdater.keys
+            if not frame.empty and (
+                len(shown) == 0
+                or frame.df.index.searchsorted(shown[-1], side="right") != len(shown)
+            ):
+                # trades before the last one displayed, like backfilled ones, change the
+                # cumulated values after them : the whole source is sent again
+                self.tradeupdater.reset(frame.as_datasource().data)
+            elif not frame.empty:
+                # Note : trades do not change, only the ones after those displayed are new
+                newtrades = frame[int(shown[-1]) + 1 :]
+                if not newtrades.empty:
+                    data = newtrades.as_datasource().data
+                    # the cumulated value goes on from the trades displayed
+                    data["cumvalue"] = (
+                        data["cumvalue"] + self.tradesource.data["cumvalue"][-1]
+                    )
+                    self.tradeupdater.update(data)
 
         return self
 
@@ -391,7 +449,8 @@ class OHLCStepPlots:
             ):
                 # Here we request more data from ohlcview
                 self.ohlcv.expectations.put_nowait(
-                    TimeInterval(start=from_date, stop=til_date, step=self.selected_tf)
+                    TimeInterval(start=from_date, stop=til_date, step=self.selected_tf),
+                    priority=VISIBLE,  # being displayed
                 )
         # TODO : shall we move this to the plot itself ?
 
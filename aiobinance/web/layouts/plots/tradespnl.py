@@ -3,7 +3,7 @@ from __future__ import annotations
 import functools
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from bokeh.document import Document
@@ -14,7 +14,9 @@ from bokeh.plotting import Figure
 from aiobinance.api.ledgerview import LedgerView
 from aiobinance.api.model.timeinterval import TimeInterval
 from aiobinance.api.model.tradeframe import TradeFrame
+from aiobinance.api.scheduler import VISIBLE
 from aiobinance.api.tradesview import TradesView
+from aiobinance.web.layouts.plots.downsample import envelope
 
 
 @dataclass
@@ -23,9 +25,14 @@ class TradesPnL:
     document: Document
     trades: TradesView
 
+    # all trades, as datasource columns, and the time window of the ones in the datasource
+    plotdata: Dict[str, np.ndarray] = field(default_factory=dict, init=False)
+    shown_window: Optional[Tuple[datetime, datetime]] = field(default=None, init=False)
+
     @functools.cached_property
     def datasource(self) -> ColumnDataSource:
-        return self.trades.frame.as_datasource()
+        # until the browser tells us the visible range, all trades are downsampled
+        return ColumnDataSource(self._downsampled(self._viewport()))
 
     @functools.cached_property
     def fig(self) -> Figure:
@@ -52,7 +59,70 @@ class TradesPnL:
     def pnl(self) -> GlyphRenderer:
         return self.fig.line(x="time_utc", y="cumvalue", source=self.datasource)
 
+    def _viewport(self) -> Optional[Tuple[datetime, datetime, int]]:
+        """ the visible time range, and its width in pixels, all the trades until the browser sets it """
+        start, end = self.fig.x_range.start, self.fig.x_range.end
+        if start is None or end is None or end <= start:
+            x = self.plotdata["time_utc"]
+            if len(x) == 0:
+                return None
+            start, end = (
+                x[0].astype("datetime64[ms]").astype("int64"),
+                x[-1].astype("datetime64[ms]").astype("int64") + 1,
+            )
+        # Note : inner_width is set by the browser, once the figure is laid out
+        width = self.fig.inner_width or self.fig.plot_width
+        return (
+            datetime.fromtimestamp(start * 0.001, tz=timezone.utc),
+            datetime.fromtimestamp(end * 0.001, tz=timezone.utc),
+            width,
+        )
+
+    def _downsampled(
+        self, viewport: Optional[Tuple[datetime, datetime, int]]
+    ) -> Dict[str, np.ndarray]:
+        """the trades drawing the pnl line in three times the visible range, centered on it,
+        with at most 4 trades per pixel"""
+        if viewport is None:
+            self.shown_window = None
+            return self.plotdata
+        start, stop, width = viewport
+        span = stop - start
+        self.shown_window = (start - span, stop + span)
+        positions = envelope(
+            self.plotdata["time_utc"],
+            self.plotdata["cumvalue"],
+            # converting datetime to unaware timezone, in utc. to compare with unaware numpy values.
+            *(
+                np.datetime64(dt.astimezone(tz=timezone.utc).replace(tzinfo=None))
+                for dt in self.shown_window
+            ),
+            width=3 * width,
+        )
+        return {c: v[positions] for c, v in self.plotdata.items()}
+
+    def downsample(self, force: bool = False):
+        """Shows the pnl line of the visible range, with at most 4 trades per pixel.
+
+        The datasource is sent again only when the view goes out of the trades it holds,
+        or is zoomed in enough to need more details, so its size never depends on the trades count.
+        """
+        viewport = self._viewport()
+        if viewport is not None and not force and self.shown_window is not None:
+            start, stop, _ = viewport
+            shown_start, shown_stop = self.shown_window
+            if (
+                shown_start <= start
+                and stop <= shown_stop
+                and (shown_stop - shown_start) <= 6 * (stop - start)
+            ):
+                return  # the trades shown are detailed enough
+        self.datasource.data = self._downsampled(viewport)
+
     def __post_init__(self):
+        self.plotdata = {
+            c: np.asarray(v) for c, v in self.trades.frame.as_datasource().data.items()
+        }
 
         # register update hook
         self.trades.update_hook(callback=self._update_hook)
@@ -63,7 +133,7 @@ class TradesPnL:
         start_time = datetime.fromtimestamp(1598524340551 / 1000, tz=timezone.utc)
         stop_time = start_time + timedelta(days=1)
         self.trades.expectations.put_nowait(
-            TimeInterval(start=start_time, stop=stop_time)
+            TimeInterval(start=start_time, stop=stop_time), priority=VISIBLE
         )  # simple testing with existing data
         # TODO : dynamic data retrieval
         # self.trades.expectations.put_nowait(TimeInterval())
@@ -89,22 +159,30 @@ class TradesPnL:
         """ View updates, need to be in sync with document tick... """
         # proceed with the update of this tf...
 
-        newsource = frameupdate.as_datasource()
-
-        # PATCH existing plot...
-        # for trade in frameupdate:
-        #     if trade.time_utc < self.trades.frame.time_utc[0]:
-        #         raise NotImplementedError
-        #     elif trade.time_utc > self.trades.frame.time_utc[-1]:
-        #         raise NotImplementedError
-
-        # new elements : we stream new data
-        # patch method cannot add data BUT it cleans up potential graphical artifacts from previous stream/patches
-        try:
-            # let bokeh refresh entirely from new datasource...
-            self.datasource.stream(newsource.data)
-        except Exception as e:
-            raise e
+        frame = self.trades.frame
+        shown = self.plotdata.get("trade_id", [])
+        if not frame.empty and (
+            len(shown) == 0
+            or frame.df.index.searchsorted(shown[-1], side="right") != len(shown)
+        ):
+            # trades before the last one plotted, like backfilled ones, change the
+            # cumulated values after them : all trades are converted again
+            self.plotdata = {
+                c: np.asarray(v) for c, v in frame.as_datasource().data.items()
+            }
+        elif not frame.empty:
+            # Note : trades do not change, only the ones after those plotted are new
+            newtrades = frame[int(shown[-1]) + 1 :]
+            if not newtrades.empty:
+                data = newtrades.as_datasource().data
+                # the cumulated value goes on from the last trade plotted
+                data["cumvalue"] = data["cumvalue"] + self.plotdata["cumvalue"][-1]
+                self.plotdata = {
+                    c: np.concatenate([v, np.asarray(data[c])])
+                    for c, v in self.plotdata.items()
+                }
+        # the trades shown are downsampled again, their count does not depend on the update
+        self.downsample(force=True)
 
         return self
 
@@ -132,7 +210,12 @@ class TradesPnL:
             print(f"{attr}: {old} -> {new}")
 
             # CAREFUL : we dont want the framesource cached version, but the original dynamic one...
-            open_time = self.trades.frame.time_utc[0]
+            # Note : only the first trade, without converting all of them
+            open_time = (
+                self.trades.frame.df.time_utc.iloc[0]
+                .to_pydatetime()
+                .replace(tzinfo=timezone.utc)
+            )
             # only realistic if expectation Q is empty:  (duplicate test, but better not to pileup calls when it is knosn to be useless)
             if open_time > new and self.trades.expectations.empty():
                 # new data needed
@@ -140,6 +223,9 @@ class TradesPnL:
                 # maybe requesting new data
                 self(from_date=earliest, til_date=open_time)
 
+            # showing trades for the new range
+            self.downsample()
+
     def __call__(self, from_date: datetime = None, til_date: datetime = None):
         # determining if we need update... between before and now
         # TODO :this should be adjusted to reflect user interactions with plot
@@ -174,7 +260,7 @@ class TradesPnL:
             #     ):
             # Here we request more data from ohlcview
             self.trades.expectations.put_nowait(
-                TimeInterval(start=from_date, stop=til_date)
+                TimeInterval(start=from_date, stop=til_date), priority=VISIBLE
             )
 
         # TODO : shall we move this to the plot itself ?
@@ -149,6 +149,24 @@ class TripleScreen:
     # relevant graphical component for each timestep
     plots: Dict[TimeStep, OHLCStepPlots] = field(default_factory=dict)
 
+    # timesteps retrieved from binance, others are built from the coarsest of these dividing them
+    bases: List[TimeStep] = field(
+        default_factory=lambda: [
+            TimeStep(TimeIntervalDelta.minutely),
+            TimeStep(TimeIntervalDelta.hourly),
+            TimeStep(TimeIntervalDelta.daily),
+        ]
+    )
+
+    def __post_init__(self):
+        for ti in TimeIntervalDelta:
+            step = TimeStep(ti)
+            if step in self.bases or step in self.ohlcv.derived:
+                continue  # Note : the view is shared with other documents
+            bases = [b for b in self.bases if b.divides(step)]
+            if bases:
+                self.ohlcv.derive(step, base=max(bases))
+
     # Properties based layout...
     # TODO : maybe some hierarchy of classes to get the same composability effect for seamless updates ??
     @functools.cached_property
@@ -58,11 +58,13 @@ if __name__ == "__main__":
 
     from bokeh.util.browser import view
 
-    from aiobinance.config import load_api_keyfile
+    from aiobinance.config import AIOBINANCE_CACHE_DIR, load_api_keyfile
 
     creds = load_api_keyfile()  # we need to authenticate to access our trades
 
-    exchange = Exchange(api=Binance(credentials=creds), test=True)
+    exchange = Exchange(
+        api=Binance(credentials=creds), test=True, cache_dir=AIOBINANCE_CACHE_DIR
+    )
 
     async def main():  # need async starting point for bokeh server ot hookup onto the existing eventloop
 
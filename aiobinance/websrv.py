@@ -78,10 +78,12 @@ async def websrv(exchange: Exchange):
 
 
 if __name__ == "__main__":
-    from aiobinance.config import load_api_keyfile
+    from aiobinance.config import AIOBINANCE_CACHE_DIR, load_api_keyfile
 
     creds = load_api_keyfile()
 
-    exchange = Exchange(api=Binance(credentials=creds), test=True)
+    exchange = Exchange(
+        api=Binance(credentials=creds), test=True, cache_dir=AIOBINANCE_CACHE_DIR
+    )
 
     asyncio.run(websrv(exchange))
@@ -0,0 +1,224 @@
+"""Timing OHLCFrame operations on large frames.
+
+Run with : python benchmarks/bench_ohlcframe.py
+"""
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.pricecandle import PriceCandle
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
+
+
+def make_frame(size: int, start: datetime, step: timedelta = timedelta(minutes=1)):
+    """ builds a frame directly from arrays, as building it from PriceCandle instances takes too long here """
+    rng = np.random.default_rng(42)
+    open_times = pd.date_range(start=start, periods=size, freq=step)
+    # Decimal instances are shared, to not spend all the time creating them
+    pool = np.array([Decimal(p) / 100 for p in range(100, 10000)], dtype=object)
+    prices = pool[rng.integers(0, len(pool), size=size)]
+    npa = np.empty(size, dtype=list(PriceCandle.as_dtype().items()))
+    npa["open_time"] = open_times
+    npa["close_time"] = open_times + step
+    for col in [
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "qav",
+        "taker_base_vol",
+        "taker_quote_vol",
+    ]:
+        npa[col] = prices
+    npa["num_trades"] = rng.integers(0, 1000, size=size)
+    npa["is_best_match"] = True
+    return OHLCFrame(df=pd.DataFrame(data=npa))
+
+
+def bench_union(size: int = 1_000_000, overlap: int = 10_000, number: int = 3):
+    start = datetime(2020, 1, 1)
+    left = make_frame(size, start=start)
+    # the right frame overlaps the left one on its last `overlap` candles
+    right = make_frame(size, start=start + timedelta(minutes=size - overlap))
+
+    duration = timeit.timeit(lambda: left.union(right), number=number) / number
+    print(
+        f"union of {size} rows frames with {overlap} overlapping candles: {duration:.3f} s"
+    )
+
+
+def bench_difference(size: int = 100_000, new: int = 10, number: int = 10):
+    start = datetime(2020, 1, 1)
+    old = make_frame(size, start=start)
+    # as after an update : a few more candles at the end
+    updated = old.union(make_frame(new, start=start + timedelta(minutes=size)))
+
+    duration = timeit.timeit(lambda: updated.difference(old), number=number) / number
+    print(f"difference of {size} rows frames: {duration * 1000:.1f} ms")
+    duration = timeit.timeit(lambda: updated.intersection(old), number=number) / number
+    print(f"intersection of {size} rows frames: {duration * 1000:.1f} ms")
+
+
+def bench_precision(size: int = 1_000_000, overlap: int = 10_000, number: int = 3):
+    precision = FixedPoint(
+        places={
+            col: 8
+            for col in [
+                "open",
+                "high",
+                "low",
+                "close",
+                "volume",
+                "qav",
+                "taker_base_vol",
+                "taker_quote_vol",
+            ]
+        }
+    )
+    start = datetime(2020, 1, 1)
+    left = make_frame(size, start=start)
+    right = make_frame(size, start=start + timedelta(minutes=size - overlap))
+    fixed_left = left.with_precision(precision)
+    fixed_right = right.with_precision(precision)
+
+    for name, frame in [("Decimal", left), ("int64", fixed_left)]:
+        memory = frame.df.memory_usage(deep=True).sum() / size
+        print(f"{name} storage: {memory:.0f} bytes per candle")
+
+    duration = (
+        timeit.timeit(lambda: fixed_left.union(fixed_right), number=number) / number
+    )
+    print(
+        f"int64 union of {size} rows frames with {overlap} overlapping candles: {duration:.3f} s"
+    )
+    duration = timeit.timeit(lambda: left.df.volume.sum(), number=number) / number
+    print(f"Decimal volume sum over {size} candles: {duration * 1000:.1f} ms")
+    duration = timeit.timeit(lambda: fixed_left.df.volume.sum(), number=number) / number
+    print(f"int64 volume sum over {size} candles: {duration * 1000:.1f} ms")
+
+
+def legacy_slice(frame: OHLCFrame, start: datetime, stop: datetime) -> OHLCFrame:
+    """ the previous implementation of time slicing, for comparison """
+    selector = pd.Series({i: True for i in frame.df.index})
+    selector = selector & (start <= frame.df.close_time.astype(dtype="datetime64[us]"))
+    selector = selector & (
+        frame.df.index.to_series().astype(dtype="datetime64[us]") <= stop
+    )
+    return OHLCFrame(df=frame.df.loc[selector])
+
+
+def bench_getitem(size: int = 1_000_000, number: int = 10):
+    start = datetime(2020, 1, 1)
+    frame = make_frame(size, start=start)
+    # a plot window
+    begin = start + timedelta(minutes=size // 2)
+    end = begin + timedelta(hours=12)
+
+    assert legacy_slice(frame, begin, end) == frame[begin:end]
+
+    duration = timeit.timeit(lambda: legacy_slice(frame, begin, end), number=1)
+    print(f"previous slice of {size} candles: {duration * 1000:.1f} ms")
+    duration = timeit.timeit(lambda: frame[begin:end], number=number) / number
+    print(f"slice of {size} candles: {duration * 1000:.3f} ms")
+    duration = timeit.timeit(lambda: frame[end], number=number) / number
+    print(f"point lookup in {size} candles: {duration * 1000:.3f} ms")
+
+
+def bench_from_klines(size: int = 1000, number: int = 10):
+    # one binance klines page, as received from the json API
+    start_ms = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    rows = [
+        [
+            start_ms + i * 60_000,
+            "0.00123400",
+            "0.00123500",
+            "0.00123300",
+            "0.00123450",
+            "1234.56000000",
+            start_ms + (i + 1) * 60_000 - 1,
+            "1.52400000",
+            42,
+            "600.00000000",
+            "0.74100000",
+            "0",
+        ]
+        for i in range(size)
+    ]
+
+    assert OHLCFrame.from_klines(rows) == OHLCFrame.from_klines(rows, validate=True)
+
+    duration = (
+        timeit.timeit(lambda: OHLCFrame.from_klines(rows, validate=True), number=number)
+        / number
+    )
+    print(f"validated ingest of {size} klines: {duration * 1000:.1f} ms")
+    duration = (
+        timeit.timeit(lambda: OHLCFrame.from_klines(rows), number=number) / number
+    )
+    print(f"columnar ingest of {size} klines: {duration * 1000:.1f} ms")
+
+
+def bench_extend(sizes=(1000, 1_000_000), number: int = 1000):
+    start = datetime(2020, 1, 1)
+    # as markets store candles
+    precision = FixedPoint(
+        places={
+            col: 8
+            for col in [
+                "open",
+                "high",
+                "low",
+                "close",
+                "volume",
+                "qav",
+                "taker_base_vol",
+                "taker_quote_vol",
+            ]
+        }
+    )
+    for size in sizes:
+        frame = make_frame(size, start=start).with_precision(precision)
+        # live polling : the next candle began
+        updates = [
+            make_frame(1, start=start + timedelta(minutes=size + i))
+            for i in range(number + 1)
+        ]
+
+        def poll():
+            nonlocal frame
+            frame = frame.extend(updates.pop(0))
+
+        poll()  # the first update copies candles in a buffer, with spare rows
+        duration = timeit.timeit(poll, number=number) / number
+        assert len(frame) == size + number + 1
+        print(f"appending to {size} candles frame: {duration * 1000:.3f} ms")
+
+        # the current candle changed : frames do not change, candles are copied
+        last = make_frame(1, start=start + timedelta(minutes=size + number))
+        duration = timeit.timeit(lambda: frame.extend(last, force=True), number=10) / 10
+        print(f"replacing the last of {size} candles: {duration * 1000:.3f} ms")
+
+
+def bench_resample(size: int = 1_000_000, number: int = 3):
+    start = datetime(2020, 1, 1)
+    frame = make_frame(size, start=start)
+    for tdelta in [TimeIntervalDelta.minutely_5, TimeIntervalDelta.daily]:
+        step = TimeStep(tdelta)
+        duration = timeit.timeit(lambda: frame.resample(step), number=number) / number
+        print(f"resampling {size} 1m candles to {step}: {duration * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    bench_union()
+    bench_difference()
+    bench_precision()
+    bench_getitem()
+    bench_from_klines()
+    bench_extend()
+    bench_resample()
@@ -0,0 +1,86 @@
+"""Timing the decoding of large binance responses.
+
+Run with : python benchmarks/bench_rawapi.py
+"""
+import gzip
+import json
+import os
+import timeit
+
+import yaml
+from result import Err, Ok
+
+from aiobinance.api.rawapi import Binance, orjson
+
+# the exchangeInfo recorded for tests (~1.3 MB)
+exchangeinfo_cassette = os.path.join(
+    os.path.dirname(__file__),
+    os.pardir,
+    "tests",
+    "api",
+    "cassettes",
+    "test_exchange",
+    "test_exchange_from_binance.yaml",
+)
+
+
+def legacy_result(text: str):
+    """ the previous implementation of response decoding, for comparison """
+    if "code" in text:
+        return Err(json.loads(text))
+    return Ok(json.loads(text))
+
+
+def exchangeinfo_body() -> bytes:
+    with open(exchangeinfo_cassette) as f:
+        cassette = yaml.safe_load(f)
+    return gzip.decompress(cassette["interactions"][0]["response"]["body"]["string"])
+
+
+def klines_body(size: int = 1000) -> bytes:
+    # one binance klines page
+    return json.dumps(
+        [
+            [
+                1609459200000 + i * 60_000,
+                "0.00123400",
+                "0.00123500",
+                "0.00123300",
+                "0.00123450",
+                "1234.56000000",
+                1609459200000 + (i + 1) * 60_000 - 1,
+                "1.52400000",
+                42,
+                "600.00000000",
+                "0.74100000",
+                "0",
+            ]
+            for i in range(size)
+        ]
+    ).encode("utf-8")
+
+
+def bench_decode(name: str, body: bytes, number: int = 20):
+    # Note : the previous implementation also had to decode the body to text first.
+    duration = (
+        timeit.timeit(lambda: legacy_result(body.decode("utf-8")), number=number)
+        / number
+    )
+    print(f"previous decoding of {name} ({len(body)} bytes): {duration * 1000:.1f} ms")
+
+    api = Binance(decoder=json.loads)
+    assert api._result(200, body).ok() == legacy_result(body.decode("utf-8")).ok()
+    duration = timeit.timeit(lambda: api._result(200, body), number=number) / number
+    print(f"json decoding of {name}: {duration * 1000:.1f} ms")
+
+    if orjson is not None:
+        api = Binance(decoder=orjson.loads)
+        duration = timeit.timeit(lambda: api._result(200, body), number=number) / number
+        print(f"orjson decoding of {name}: {duration * 1000:.1f} ms")
+    else:
+        print("orjson is not installed")
+
+
+if __name__ == "__main__":
+    bench_decode("exchangeInfo", exchangeinfo_body())
+    bench_decode("1000 klines", klines_body())
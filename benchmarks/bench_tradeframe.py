@@ -0,0 +1,132 @@
+"""Timing TradeFrame operations on large frames.
+
+Run with : python benchmarks/bench_tradeframe.py
+"""
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from aiobinance.api.model.bars import BarBuilder, BarKind
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.trade import Trade
+from aiobinance.api.model.tradeframe import TradeFrame
+
+
+def make_frame(size: int, start_id: int = 0, symbol: str = "COTIBNB"):
+    """ builds a frame directly from arrays, as building it from Trade instances takes too long here """
+    rng = np.random.default_rng(42)
+    # Decimal instances are shared, to not spend all the time creating them
+    pool = np.array([Decimal(p) / 100 for p in range(100, 10000)], dtype=object)
+    npa = np.empty(size, dtype=list(Trade.as_dtype().items()))
+    npa["id"] = np.arange(start_id, start_id + size, dtype="uint64")
+    npa["time_utc"] = pd.date_range(
+        start=datetime(2020, 1, 1) + timedelta(seconds=start_id), periods=size, freq="s"
+    )
+    npa["symbol"] = symbol
+    for col in ["price", "qty", "quote_qty", "commission"]:
+        npa[col] = pool[rng.integers(0, len(pool), size=size)]
+    npa["commission_asset"] = "BNB"
+    npa["is_buyer"] = rng.integers(0, 2, size=size).astype(bool)
+    npa["is_maker"] = rng.integers(0, 2, size=size).astype(bool)
+    npa["order_id"] = npa["id"]
+    npa["order_list_id"] = None
+    npa["is_best_match"] = True
+    return TradeFrame(symbol=symbol, df=pd.DataFrame(data=npa))
+
+
+def bench_setops(size: int, new: int = 100, number: int = 3):
+    old = make_frame(size)
+    # as after a poll : a few more trades at the end
+    updated = old.union(make_frame(new, start_id=size))
+
+    for op in ["union", "intersection", "difference"]:
+        duration = (
+            timeit.timeit(lambda: getattr(updated, op)(old), number=number) / number
+        )
+        print(f"{op} of {size} trades frames: {duration * 1000:.1f} ms")
+
+
+def legacy_slice(frame: TradeFrame, start: datetime, stop: datetime) -> TradeFrame:
+    """ the previous implementation of time slicing, for comparison """
+    selector = pd.Series({i: True for i in frame.df.index})
+    selector = selector & (start <= frame.df.time_utc.astype(dtype="datetime64[us]"))
+    selector = selector & (frame.df.time_utc.astype(dtype="datetime64[us]") <= stop)
+    return TradeFrame(symbol=frame.symbol, df=frame.df.loc[selector])
+
+
+def bench_getitem(size: int = 1_000_000, number: int = 10):
+    frame = make_frame(size)
+    begin = datetime(2020, 1, 1) + timedelta(seconds=size // 2)
+    end = begin + timedelta(hours=1)
+
+    assert legacy_slice(frame, begin, end) == frame[begin:end]
+
+    duration = timeit.timeit(lambda: legacy_slice(frame, begin, end), number=1)
+    print(f"previous time slice of {size} trades: {duration * 1000:.1f} ms")
+    duration = timeit.timeit(lambda: frame[begin:end], number=number) / number
+    print(f"time slice of {size} trades: {duration * 1000:.3f} ms")
+    duration = timeit.timeit(lambda: frame[end], number=number) / number
+    print(f"time lookup in {size} trades: {duration * 1000:.3f} ms")
+
+
+def bench_records(size: int = 1_000_000):
+    frame = make_frame(size)
+
+    duration = timeit.timeit(lambda: sum(1 for _ in frame.records()), number=1)
+    print(f"iterating records of {size} trades: {duration:.3f} s")
+    fixed = frame.with_precision(
+        FixedPoint(places={"price": 2, "qty": 2, "quote_qty": 2})
+    )
+    duration = timeit.timeit(lambda: sum(1 for _ in fixed.records()), number=1)
+    print(f"iterating records of {size} int64 trades: {duration:.3f} s")
+    duration = timeit.timeit(
+        lambda: sum(1 for _ in fixed.records(scaled=True)), number=1
+    )
+    print(f"iterating scaled records of {size} int64 trades: {duration:.3f} s")
+    # validating every row is much slower, measuring on a subset
+    subset = frame[: size // 100]
+    duration = timeit.timeit(lambda: sum(1 for _ in subset), number=1)
+    print(f"iterating Trades of {size // 100} trades: {duration:.3f} s")
+
+
+def bench_bars(size: int = 5_000_000, number: int = 3):
+    frame = make_frame(size)
+    fixed = frame.with_precision(
+        FixedPoint(places={"price": 2, "qty": 2, "quote_qty": 2})
+    )
+
+    for kind, threshold in [
+        (BarKind.tick, 1000),
+        (BarKind.volume, "50000"),
+        (BarKind.dollar, "500000"),
+    ]:
+        duration = (
+            timeit.timeit(lambda: BarBuilder(kind, threshold)(fixed), number=number)
+            / number
+        )
+        print(f"int64 {kind.name} bars from {size} trades: {duration:.3f} s")
+    duration = timeit.timeit(
+        lambda: BarBuilder(BarKind.volume, "50000")(frame), number=1
+    )
+    print(f"Decimal volume bars from {size} trades: {duration:.3f} s")
+
+    # as trades arrive : a few more trades, closing bars and adding to the open one
+    builder = BarBuilder(BarKind.volume, "50000")
+    builder(fixed[: datetime(2020, 1, 1) + timedelta(seconds=size - 10_001)])
+    updates = [
+        fixed[: datetime(2020, 1, 1) + timedelta(seconds=size - 10_001 + 1000 * i)]
+        for i in range(1, 11)
+    ]
+    duration = timeit.timeit(lambda: builder(updates.pop(0)), number=10) / 10
+    print(f"1000 more trades after {size} trades: {duration * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    for size in [10_000, 100_000, 1_000_000]:
+        bench_setops(size)
+    bench_getitem()
+    bench_records()
+    bench_bars()
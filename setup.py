@@ -22,5 +22,13 @@ setup(
         "result",
         "portion",
     ],
+    extras_require={
+        # optional native async http transport
+        "aiohttp": ["aiohttp"],
+        # optional faster json decoding of responses
+        "orjson": ["orjson"],
+        # optional persistence of market data on disk
+        "store": ["pyarrow"],
+    },
     zip_safe=False,
 )
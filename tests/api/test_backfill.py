@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from result import Err, Ok
+
+from aiobinance.api.backfill import OHLCBackfill
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
+from aiobinance.api.ohlcview import OHLCView
+
+
+class KlinesAPI:
+    """ Generates klines rows, like binance would, optionally failing once on some pages """
+
+    def __init__(self, fail_on=(), volume: str = "10.0"):
+        self.calls = []
+        self.fail_on = set(fail_on)
+        self.volume = volume
+
+    async def call_api(self, command, symbol, interval, startTime, endTime, limit):
+        assert command == "klines"
+        self.calls.append((startTime, endTime))
+        if startTime in self.fail_on:
+            self.fail_on.remove(startTime)
+            return Err({"code": -1003, "msg": "Too many requests"})
+
+        step = 60_000  # 1m
+        first = startTime + (-startTime % step)  # first open_time in the page
+        rows = [
+            [
+                ot,
+                "1.0",
+                "2.0",
+                "0.5",
+                "1.5",
+                self.volume,
+                ot + step - 1,
+                "15.0",
+                3,
+                "5.0",
+                "7.5",
+                "0",
+            ]
+            for ot in range(first, endTime + 1, step)
+        ]
+        assert len(rows) <= limit
+        return Ok(rows)
+
+
+@pytest.mark.asyncio
+async def test_backfill_pages():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=3)  # 4320 candles -> 5 pages
+
+    progress = []
+    api = KlinesAPI()
+    backfill = OHLCBackfill(
+        api=api,
+        symbol="COTIBNB",
+        step=TimeStep(TimeIntervalDelta.minutely),
+        start_time=start_time,
+        stop_time=stop_time,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert backfill.total == 5
+
+    frame = await backfill()
+
+    assert backfill.complete
+    assert len(api.calls) == 5
+    assert progress[-1] == (5, 5)
+    # both bounds included
+    assert len(frame) == 3 * 24 * 60 + 1
+    assert frame.open_time == start_time
+    assert frame.df.index.is_unique and frame.df.index.is_monotonic_increasing
+
+
+@pytest.mark.asyncio
+async def test_backfill_resume():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=3)
+    failing_page = int((start_time + timedelta(minutes=2000)).timestamp() * 1000)
+
+    api = KlinesAPI(fail_on=[failing_page])
+    backfill = OHLCBackfill(
+        api=api,
+        symbol="COTIBNB",
+        step=TimeStep(TimeIntervalDelta.minutely),
+        start_time=start_time,
+        stop_time=stop_time,
+    )
+
+    with pytest.raises(RuntimeError):
+        await backfill()
+
+    assert backfill.done == 4
+    assert backfill.pending == [(failing_page, failing_page + 1000 * 60_000 - 1)]
+
+    frame = await backfill()
+
+    # only the failed page has been requested again
+    assert len(api.calls) == 6
+    assert len(frame) == 3 * 24 * 60 + 1
+
+    # pages of another interval, covered by the ones retrieved, are not requested again
+    shifted = OHLCBackfill(
+        api=api,
+        symbol="COTIBNB",
+        step=TimeStep(TimeIntervalDelta.minutely),
+        start_time=start_time + timedelta(minutes=500),
+        stop_time=stop_time,
+    )
+    shifted.resume(backfill)
+    assert shifted.complete
+    assert await shifted() == frame[start_time + timedelta(minutes=500) :]
+    assert len(api.calls) == 6
+
+
+@pytest.mark.asyncio
+async def test_view_backfill_resume():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=3)
+    failing_page = int((start_time + timedelta(minutes=2000)).timestamp() * 1000)
+    minutely = TimeStep(TimeIntervalDelta.minutely)
+
+    api = KlinesAPI(fail_on=[failing_page])
+    ohlcv = OHLCView(api=api, symbol="RESUMEBNB")
+    with pytest.raises(RuntimeError):
+        await ohlcv.request(
+            start_time=start_time, stop_time=stop_time, interval=minutely
+        )
+    assert len(api.calls) == 5
+
+    # a later request, until a later now, resumes from the pages already retrieved
+    api.calls.clear()
+    later = stop_time + timedelta(minutes=30)
+    await ohlcv.request(start_time=start_time, stop_time=later, interval=minutely)
+    assert len(api.calls) == 2  # the failed page, and the last one
+    assert len(ohlcv[minutely]) == 3 * 24 * 60 + 31
+    # nothing is kept after success
+    assert ohlcv.backfills == {}
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
@@ -1,9 +1,11 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import pytest
+from result import Ok
 
-from aiobinance.api.exchange import Exchange
+from aiobinance.api.exchange import CacheStats, Exchange
 from aiobinance.api.model.exchange_info import RateLimit
 from aiobinance.api.model.filters import Filter
 from aiobinance.api.rawapi import Binance
@@ -132,6 +134,126 @@ async def test_exchange_from_binance():
     assert ethbtc_market.info.symbol == "ETHBTC"
 
 
+def fake_exchangeinfo(requested: list, symbols=()):
+    """ a fake exchangeInfo response, recording each request """
+
+    async def exchangeinfo(**kwargs):
+        requested.append(kwargs)
+        await asyncio.sleep(0.01)
+        return Ok(
+            {
+                "timezone": "UTC",
+                # Note : the server time changes on every request
+                "serverTime": 1598524340551 + len(requested),
+                "rateLimits": [],
+                "exchangeFilters": [],
+                "symbols": [
+                    {
+                        "symbol": f"{s}BNB",
+                        "status": "TRADING",
+                        "baseAsset": s,
+                        "baseAssetPrecision": 8,
+                        "quoteAsset": "BNB",
+                        "quotePrecision": 8,
+                        "quoteAssetPrecision": 8,
+                        "baseCommissionPrecision": 8,
+                        "quoteCommissionPrecision": 8,
+                        "orderTypes": ["LIMIT", "MARKET"],
+                        "icebergAllowed": True,
+                        "ocoAllowed": True,
+                        "quoteOrderQtyMarketAllowed": True,
+                        "isSpotTradingAllowed": True,
+                        "isMarginTradingAllowed": False,
+                        "filters": [],
+                        "permissions": ["SPOT"],
+                    }
+                    for s in symbols
+                ],
+            }
+        )
+
+    return exchangeinfo
+
+
+@pytest.mark.asyncio
+async def test_exchange_concurrent_updates(monkeypatch):
+    api = Binance()
+    requested = []
+    monkeypatch.setattr(api, "_call", fake_exchangeinfo(requested))
+    exchange = Exchange(api=api, test=True)
+
+    # like multiple web requests at the same time
+    await asyncio.gather(exchange(), exchange(), exchange())
+    assert len(requested) == 1
+    assert exchange.info is not None
+
+    # forcing a refresh requests it again
+    await exchange(refresh=True)
+    assert len(requested) == 2
+
+
+@pytest.mark.asyncio
+async def test_exchange_ttl(monkeypatch):
+    api = Binance()
+    requested = []
+    monkeypatch.setattr(api, "_call", fake_exchangeinfo(requested))
+    exchange = Exchange(api=api, test=True, ttl=timedelta(minutes=1))
+
+    await exchange()
+    await exchange()
+    assert len(requested) == 1
+    assert exchange.stats == CacheStats(hits=1, misses=1, refreshes=1)
+
+    # outdated info is served, and refreshed in the background
+    exchange.fetched -= timedelta(minutes=2)
+    info = exchange.info
+    await exchange()
+    assert exchange.info is info
+    await exchange.refreshing
+    assert len(requested) == 2
+    assert exchange.stats == CacheStats(hits=2, misses=1, refreshes=2)
+    assert exchange.fetched > datetime.now(tz=timezone.utc) - timedelta(minutes=1)
+
+
+@pytest.mark.asyncio
+async def test_exchange_refresh_markets(monkeypatch):
+    api = Binance()
+    requested = []
+    monkeypatch.setattr(api, "_call", fake_exchangeinfo(requested, symbols=["COTI"]))
+    exchange = Exchange(api=api, test=True)
+
+    await exchange()
+    market = exchange.markets["COTIBNB"]
+    ohlcv = market.price
+
+    # the same markets are refreshed : they keep their views, and the candles in them
+    await exchange(refresh=True)
+    assert len(requested) == 2
+    assert exchange.markets["COTIBNB"] is market
+    assert market.price is ohlcv
+
+
+@pytest.mark.asyncio
+async def test_exchange_cache_dir(monkeypatch, tmp_path):
+    api = Binance()
+    requested = []
+    monkeypatch.setattr(api, "_call", fake_exchangeinfo(requested))
+
+    exchange = Exchange(api=api, test=True, cache_dir=str(tmp_path))
+    await exchange()
+    assert len(requested) == 1
+
+    # another process finds it on disk
+    restored = Exchange(api=api, test=True, cache_dir=str(tmp_path))
+    await restored()
+    assert len(requested) == 1
+    assert restored.info == exchange.info
+    assert restored.fetched == exchange.fetched.replace(
+        microsecond=exchange.fetched.microsecond // 1000 * 1000
+    )
+    assert restored.stats == CacheStats(hits=1, misses=0, refreshes=0)
+
+
 if __name__ == "__main__":
     pytest.main(["-s", __file__, "--block-network"])
     # record run
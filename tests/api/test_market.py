@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from result import Ok
+
+from aiobinance.api.market import Market
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.market_info import MarketInfo
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
+from tests.api.test_backfill import KlinesAPI
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+
+# more than int64 bounds, once scaled by 10 ** 8
+large = "350000000000.00000000"
+
+
+class LargeVolumeAPI(KlinesAPI):
+    """ Serves klines and trades with volumes of a market like SHIBUSDT """
+
+    def __init__(self):
+        super(LargeVolumeAPI, self).__init__(volume=large)
+
+    async def call_api(self, command, **kwargs):
+        if command != "myTrades":
+            return await super(LargeVolumeAPI, self).call_api(command, **kwargs)
+        return Ok(
+            [
+                {
+                    "symbol": "SHIBUSDT",
+                    "id": 1000,
+                    "orderId": 5000,
+                    "orderListId": -1,
+                    "price": "0.00002700",
+                    "qty": large,
+                    "quoteQty": "9450000.00000000",
+                    "commission": "0.01000000",
+                    "commissionAsset": "BNB",
+                    "time": kwargs["startTime"],
+                    "isBuyer": True,
+                    "isMaker": True,
+                    "isBestMatch": True,
+                }
+            ]
+        )
+
+
+info = MarketInfo(
+    symbol="SHIBUSDT",
+    status="TRADING",
+    base_asset="SHIB",
+    base_asset_precision=8,
+    quote_asset="USDT",
+    quote_precision=8,
+    quote_asset_precision=8,
+    base_commission_precision=8,
+    quote_commission_precision=8,
+    order_types=["LIMIT", "MARKET"],
+    iceberg_allowed=True,
+    oco_allowed=True,
+    is_spot_trading_allowed=True,
+    is_margin_trading_allowed=False,
+    quote_order_qty_market_allowed=True,
+    filters=[],
+    permissions=["SPOT"],
+)
+
+
+@pytest.mark.asyncio
+async def test_market_large_volumes():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(hours=1)
+    market = Market(api=LargeVolumeAPI(), info=info)
+
+    # candles and trades of any volume are stored exactly
+    frame = await market.price.at(minutely, start_time=start_time, stop_time=stop_time)
+    assert len(frame) == 61
+    assert frame.df.volume.iloc[0] == Decimal(large)
+    assert next(iter(frame)).volume == Decimal(large)
+
+    trades = await market.trades.request(start_time=start_time, stop_time=stop_time)
+    assert trades.df.qty.iloc[0] == Decimal(large)
+    assert next(market.trades.frame.records()).qty == Decimal(large)
+
+    # Note : these do not fit in int64 with the market precision
+    with pytest.raises(ValueError):
+        FixedPoint.for_candles(info).to_int("volume", [large])
+    with pytest.raises(ValueError):
+        FixedPoint.for_trades(info).to_int("qty", [large])
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
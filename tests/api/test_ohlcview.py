@@ -1,13 +1,17 @@
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
+import numpy as np
 import pytest
 
 from aiobinance.api.exchange import Exchange
+from aiobinance.api.model.fixedpoint import FixedPoint
 from aiobinance.api.model.ohlcframe import PriceCandle
 from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
 from aiobinance.api.ohlcview import OHLCView
 from aiobinance.api.rawapi import Binance
+from tests.api.test_backfill import KlinesAPI
+from tests.api.test_stream import kline_event
 
 
 @pytest.mark.asyncio
@@ -21,7 +25,7 @@ async def test_price_from_binance():
     api = Binance()  # we dont need private requests here
     # Ref : https://binance-docs.github.io/apidocs/spot/en/#kline-candlestick-data
 
-    exchange = Exchange(api=api, test=True)
+    exchange = Exchange(api=api, test=True, fixed_point=True)
 
     await exchange()  # need to retrieve markets
 
@@ -34,6 +38,11 @@ async def test_price_from_binance():
     await ohlcv.request(start_time=start_time, stop_time=end_time, interval=ts)
 
     assert len(ohlcv[ts]) == 480
+    # candles are stored exactly as int64, with the market precision
+    assert ohlcv[ts].precision == FixedPoint.for_candles(
+        exchange.markets["COTIBNB"].info
+    )
+    assert ohlcv[ts].df.open.dtype == np.dtype("int64")
     for c in ohlcv[ts]:
         assert isinstance(c, PriceCandle)
 
@@ -64,6 +73,86 @@ async def test_price_from_binance():
         break  # breaking out after first candle check
 
 
+@pytest.mark.asyncio
+async def test_at_coverage():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=1)
+    ts = TimeStep(TimeIntervalDelta.minutely)
+
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="COVERBNB")
+
+    await ohlcv.at(ts, start_time=start_time, stop_time=stop_time)
+    assert len(api.calls) == 2
+
+    # a time range already requested is not requested again
+    await ohlcv.at(ts, start_time=start_time + timedelta(hours=1), stop_time=stop_time)
+    assert len(api.calls) == 2
+
+    # only the missing ranges are requested
+    await ohlcv.at(
+        ts,
+        start_time=start_time - timedelta(hours=1),
+        stop_time=stop_time + timedelta(hours=1),
+    )
+    assert api.calls[2:] == [
+        (
+            int((start_time - timedelta(hours=1)).timestamp() * 1000),
+            int(start_time.timestamp() * 1000) - 1,
+        ),
+        (
+            int(stop_time.timestamp() * 1000) + 1,
+            int((stop_time + timedelta(hours=1)).timestamp() * 1000),
+        ),
+    ]
+    assert len(ohlcv[ts]) == 26 * 60 + 1
+
+
+@pytest.mark.asyncio
+async def test_derived():
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    minutely = TimeStep(TimeIntervalDelta.minutely)
+    fivemin = TimeStep(TimeIntervalDelta.minutely_5)
+
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="DERIVEDBNB")
+    ohlcv.derive(fivemin, base=minutely)
+    with pytest.raises(ValueError):
+        ohlcv.derive(TimeStep(TimeIntervalDelta.minutely_3), base=fivemin)
+
+    updates = []
+    ohlcv.update_hook(fivemin, updates.append)
+
+    # 5m candles are built from 1m candles, retrieved instead
+    frame = await ohlcv.at(
+        fivemin,
+        start_time=start_time + timedelta(minutes=2),
+        stop_time=start_time + timedelta(hours=1),
+    )
+    assert api.calls == [
+        (
+            int(start_time.timestamp() * 1000),
+            int((start_time + timedelta(hours=1)).timestamp() * 1000),
+        )
+    ]
+    assert len(ohlcv[minutely]) == 61
+    assert len(frame) == 13
+    assert frame == ohlcv[minutely].resample(fivemin)
+    assert len(updates) == 1 and len(updates[0]) == 13
+
+    # and updated with them
+    candle = ohlcv.apply_kline(
+        minutely,
+        kline_event(start_time + timedelta(hours=1, minutes=1), "0.00400000")["k"],
+    )
+    assert len(ohlcv[fivemin]) == 13
+    last = ohlcv[fivemin][start_time + timedelta(hours=1)]
+    assert last.volume == Decimal("10.0") + candle.df.volume.iloc[0]
+    assert last.close == Decimal("0.00400000")
+    assert len(updates) == 2 and len(updates[-1]) == 1
+    assert ohlcv[fivemin] == ohlcv[minutely].resample(fivemin)
+
+
 if __name__ == "__main__":
     pytest.main(["-s", __file__, "--block-network"])
     # record run
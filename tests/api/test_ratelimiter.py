@@ -0,0 +1,121 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from aiobinance.api.model.exchange_info import RateLimit
+from aiobinance.api.ratelimiter import RateLimiter, TokenBucket
+from aiobinance.api.rawapi import Binance
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tokenbucket():
+    clock = FakeClock()
+    b = TokenBucket(capacity=10, interval=timedelta(seconds=10), clock=clock)
+
+    assert b.delay(10) == 0
+    b.consume(10)
+    assert b.delay(1) == pytest.approx(1.0)
+    assert b.delay(5) == pytest.approx(5.0)
+
+    clock.now += 3
+    assert b.delay(3) == 0
+    # no more than capacity
+    clock.now += 100
+    assert b.refill().tokens == 10
+
+    # server reports usage
+    b.sync(used=8)
+    assert b.tokens == 2
+    # sync never adds tokens
+    b.consume(2).sync(used=1)
+    assert b.tokens == 0
+
+
+def test_ratelimiter_limits():
+    clock = FakeClock()
+    rl = RateLimiter(
+        [
+            RateLimit(
+                rate_limit_type="REQUEST_WEIGHT",
+                interval="MINUTE",
+                interval_num=1,
+                limit=60,
+            ),
+            RateLimit(
+                rate_limit_type="ORDERS", interval="SECOND", interval_num=10, limit=2
+            ),
+        ],
+        clock=clock,
+    )
+
+    assert rl.delay(weight=60) == 0
+    rl.consume(weight=50, orders=2)
+    assert rl.delay(weight=10) == 0
+    # orders are limited separately
+    assert rl.delay(weight=1, orders=1) == pytest.approx(5.0)
+
+    # usage reported by binance takes precedence
+    rl.update(200, {"X-MBX-USED-WEIGHT-1M": "60", "X-MBX-USED-WEIGHT": "60"})
+    assert rl.delay(weight=1) == pytest.approx(1.0)
+
+    # banned : waiting what the server says
+    rl.update(429, {"Retry-After": "30"})
+    assert rl.delay(weight=0) == pytest.approx(30.0)
+
+
+def test_ratelimiter_configure_keeps_usage():
+    clock = FakeClock()
+    rl = RateLimiter(clock=clock)  # defaults
+    rl.consume(weight=1000)
+
+    rl.configure(
+        [
+            RateLimit(
+                rate_limit_type="REQUEST_WEIGHT",
+                interval="MINUTE",
+                interval_num=1,
+                limit=1200,
+            ),
+        ]
+    )
+    assert rl.buckets["REQUEST_WEIGHT"][0].tokens == 200
+
+
+@pytest.mark.asyncio
+async def test_ratelimiter_acquire():
+    rl = RateLimiter(
+        [
+            RateLimit(
+                rate_limit_type="REQUEST_WEIGHT",
+                interval="SECOND",
+                interval_num=1,
+                limit=10,
+            ),
+        ]
+    )
+
+    start = time.monotonic()
+    await rl.acquire(weight=10)
+    await rl.acquire(weight=2)  # has to wait for refill
+    assert time.monotonic() - start >= 0.15
+
+
+def test_binance_weight():
+    api = Binance()
+    assert api.weight("klines", symbol="COTIBNB") == 1
+    assert api.weight("myTrades", symbol="COTIBNB") == 10
+    assert api.weight("depth", symbol="COTIBNB", limit=1000) == 10
+    assert api.weight("depth", symbol="COTIBNB") == 1
+    assert api.weight("ticker24hr") == 40
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
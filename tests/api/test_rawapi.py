@@ -0,0 +1,243 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from result import Ok
+
+from aiobinance.api import rawapi
+from aiobinance.api.rawapi import Binance
+
+# reusing the exchangeInfo recorded for the exchange test
+exchangeinfo_cassette = os.path.join(
+    os.path.dirname(__file__),
+    "cassettes",
+    "test_exchange",
+    "test_exchange_from_binance.yaml",
+)
+
+
+@pytest.mark.vcr(exchangeinfo_cassette)
+def test_call_api_sync():
+    api = Binance()
+
+    res = api.call_api_sync(command="exchangeInfo")
+
+    assert res.is_ok()
+    assert res.ok()["timezone"] == "UTC"
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr(exchangeinfo_cassette)
+async def test_call_api():
+    api = Binance()
+
+    res = await api.call_api(command="exchangeInfo")
+
+    assert res.is_ok()
+    assert res.ok()["timezone"] == "UTC"
+
+    await api.close()
+
+
+def test_result():
+    api = Binance()
+
+    ok = api._result(200, b'{"symbols": [{"code": "not an error"}]}')
+    assert ok.is_ok()
+    assert ok.ok() == {"symbols": [{"code": "not an error"}]}
+
+    # error detected from status
+    err = api._result(400, b'{"code": -1121, "msg": "Invalid symbol."}')
+    assert err.is_err()
+    assert err.err()["code"] == -1121
+
+    # error detected from payload structure
+    err = api._result(200, b'{"code": -1003, "msg": "Too many requests."}')
+    assert err.is_err()
+
+    # non json error page
+    err = api._result(502, b"<html>Bad Gateway</html>")
+    assert err.is_err()
+    assert err.err()["code"] == 502
+
+
+def test_decoder():
+    decoded = []
+
+    def decoder(body: bytes):
+        decoded.append(body)
+        return json.loads(body)
+
+    api = Binance(decoder=decoder)
+
+    assert api._result(200, b"{}").ok() == {}
+    assert decoded == [b"{}"]
+
+
+@pytest.mark.parametrize("module", ["json", "orjson"])
+def test_default_decoder(module, monkeypatch):
+    if module == "json":
+        # Note : as if orjson was not installed
+        monkeypatch.setattr(rawapi, "orjson", None)
+        loads = json.loads
+    else:
+        loads = pytest.importorskip("orjson").loads
+        monkeypatch.setattr(rawapi, "orjson", sys.modules["orjson"])
+    assert rawapi.default_decoder() is loads
+
+    api = Binance()
+    assert api._result(200, b'{"price": "0.00123400"}').ok() == {"price": "0.00123400"}
+    err = api._result(502, b"<html>Bad Gateway</html>")
+    assert err.err()["code"] == 502
+
+
+@pytest.mark.asyncio
+async def test_single_flight(monkeypatch):
+    api = Binance()
+    sent = []
+
+    async def call(**kwargs):
+        sent.append(kwargs)
+        await asyncio.sleep(0.01)
+        return Ok([len(sent)])
+
+    monkeypatch.setattr(api, "_call", call)
+
+    # identical requests, even with parameters in another order
+    results = await asyncio.gather(
+        api.call_api(command="klines", symbol="COTIBNB", interval="1m"),
+        api.call_api(command="klines", interval="1m", symbol="COTIBNB"),
+        api.klines(symbol="COTIBNB", interval="1m"),
+    )
+    # are sent only once
+    assert len(sent) == 1
+    assert all(r.ok() is results[0].ok() for r in results)
+    assert api.in_flight == {}
+
+    # different requests are all sent
+    await asyncio.gather(
+        api.call_api(command="klines", symbol="COTIBNB", interval="1m"),
+        api.call_api(command="klines", symbol="COTIBNB", interval="3m"),
+    )
+    assert len(sent) == 3
+
+    # orders are never merged
+    await asyncio.gather(
+        api.call_api(command="testOrder", symbol="COTIBNB", quantity=1),
+        api.call_api(command="testOrder", symbol="COTIBNB", quantity=1),
+    )
+    assert len(sent) == 5
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled(monkeypatch):
+    api = Binance()
+
+    async def call(**kwargs):
+        await asyncio.sleep(0.01)
+        return Ok(kwargs)
+
+    monkeypatch.setattr(api, "_call", call)
+
+    first = asyncio.get_running_loop().create_task(api.klines(symbol="COTIBNB"))
+    second = asyncio.get_running_loop().create_task(api.klines(symbol="COTIBNB"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    # the other caller still gets its result
+    assert (await second).ok() == {"command": "klines", "symbol": "COTIBNB"}
+
+
+@pytest.mark.asyncio
+async def test_client_session_pool():
+    pytest.importorskip("aiohttp")
+
+    api = Binance(pool_size=3)
+
+    client = await api._client_session()
+    assert client.connector.limit_per_host == 3
+    # the session is reused on next call
+    assert await api._client_session() is client
+
+    await api.close()
+    assert client.closed
+    # and recreated after close
+    assert await api._client_session() is not client
+
+    await api.close()
+
+
+def test_client_session_loops():
+    pytest.importorskip("aiohttp")
+
+    api = Binance()
+
+    first = asyncio.run(api._client_session())
+    # another event loop gets its own session, and the previous one is closed
+    second = asyncio.run(api._client_session())
+    assert second is not first
+    assert first.closed and not second.closed
+
+    asyncio.run(api.close())
+    assert second.closed
+
+
+@pytest.mark.asyncio
+async def test_client_session_context():
+    pytest.importorskip("aiohttp")
+
+    async with Binance() as api:
+        client = await api._client_session()
+        assert not client.closed
+
+    assert client.closed
+
+
+@pytest.mark.asyncio
+@pytest.mark.block_network(allowed_hosts=["127.0.0.1"])
+async def test_call_api_aiohttp():
+    pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    requests = []
+
+    async def klines(request):
+        # a stand-in for binance api
+        requests.append(request)
+        if request.query["symbol"] == "UNKNOWN":
+            return web.json_response(
+                {"code": -1121, "msg": "Invalid symbol."},
+                status=400,
+                headers={"x-mbx-used-weight-1m": "2"},
+            )
+        return web.json_response(
+            [[1598524380000, "0.00320100"]], headers={"x-mbx-used-weight-1m": "1"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/api/v3/klines", klines)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+
+    api = Binance(url=str(server.make_url("/")))
+    try:
+        res = await api.klines(symbol="COTIBNB", interval="1m")
+        assert res.ok() == [[1598524380000, "0.00320100"]]
+        assert requests[0].query["interval"] == "1m"
+
+        err = await api.klines(symbol="UNKNOWN", interval="1m")
+        assert err.err() == {"code": -1121, "msg": "Invalid symbol."}
+
+        # both requests went through the same pooled session
+        assert len(requests) == 2
+        assert api.client is not None and not api.client.closed
+    finally:
+        await api.close()
+        await server.close()
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
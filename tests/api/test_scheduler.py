@@ -0,0 +1,214 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from aiobinance.api.model.timeinterval import (
+    TimeInterval,
+    TimeIntervalDelta,
+    TimeStep,
+    to_ms,
+)
+from aiobinance.api.ohlcview import OHLCView
+from aiobinance.api.scheduler import BACKGROUND, VISIBLE, Expectations, Scheduler
+from tests.api.test_backfill import KlinesAPI
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+
+
+class Recorder:
+    """ A fake view, recording what is fetched """
+
+    def __init__(self, delay: float = 0):
+        self.calls = []
+        self.delay = delay
+
+    async def fetch(self, start, stop, step):
+        self.calls.append((start, stop, step))
+        await asyncio.sleep(self.delay)
+
+
+@pytest.mark.asyncio
+async def test_merge():
+    scheduler = Scheduler()
+    view = Recorder()
+    expectations = Expectations(key="view", fetch=view.fetch, scheduler=scheduler)
+
+    hour = timedelta(hours=1)
+    expectations.put_nowait(
+        TimeInterval(start=start_time, stop=start_time + 2 * hour, step=minutely)
+    )
+    expectations.put_nowait(
+        TimeInterval(start=start_time + hour, stop=start_time + 3 * hour, step=minutely)
+    )
+    expectations.put_nowait(
+        TimeInterval(
+            start=start_time + 5 * hour, stop=start_time + 6 * hour, step=minutely
+        )
+    )
+    assert not expectations.empty()
+
+    await asyncio.gather(*scheduler.tick())
+    assert expectations.empty()
+    # overlapping intervals are merged, and the most recent is requested first
+    assert view.calls == [
+        (start_time + 5 * hour, start_time + 6 * hour, minutely),
+        (start_time, start_time + 3 * hour, minutely),
+    ]
+
+    # nothing expected anymore
+    await asyncio.gather(*scheduler.tick())
+    assert len(view.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_priority():
+    scheduler = Scheduler(concurrency=1)
+    calls = []
+
+    def fetch(name):
+        async def fetch(start, stop, step):
+            calls.append(name)
+
+        return fetch
+
+    tint = TimeInterval(start=start_time, stop=start_time + timedelta(hours=1))
+    recent = TimeInterval(
+        start=start_time + timedelta(days=1), stop=start_time + timedelta(days=2)
+    )
+    scheduler.expect("old", fetch("old"), tint, priority=BACKGROUND)
+    scheduler.expect("recent", fetch("recent"), recent, priority=BACKGROUND)
+    scheduler.expect("latest", fetch("latest"), TimeInterval(), priority=BACKGROUND)
+    scheduler.expect("visible", fetch("visible"), tint, priority=VISIBLE)
+
+    await asyncio.gather(*scheduler.tick())
+    assert calls == ["visible", "latest", "recent", "old"]
+
+
+@pytest.mark.asyncio
+async def test_in_flight():
+    scheduler = Scheduler()
+    view = Recorder(delay=0.1)
+    expectations = Expectations(key="view", fetch=view.fetch, scheduler=scheduler)
+
+    tint = TimeInterval(
+        start=start_time, stop=start_time + timedelta(hours=2), step=minutely
+    )
+    expectations.put_nowait(tint)
+    running = scheduler.tick()
+    await asyncio.sleep(0)
+    assert not expectations.empty()  # still being retrieved
+
+    # the same range is not requested again, only the part not in flight
+    expectations.put_nowait(tint)
+    expectations.put_nowait(
+        TimeInterval(
+            start=start_time + timedelta(hours=1),
+            stop=start_time + timedelta(hours=3),
+            step=minutely,
+        )
+    )
+    running += scheduler.tick()
+    await asyncio.gather(*running)
+
+    assert expectations.empty()
+    assert view.calls[0] == (start_time, start_time + timedelta(hours=2), minutely)
+    assert len(view.calls) == 2
+    lower, upper, _ = view.calls[1]
+    assert lower == start_time + timedelta(hours=2)  # excluded by the interval
+    assert upper == start_time + timedelta(hours=3)
+
+
+@pytest.mark.asyncio
+async def test_failure():
+    scheduler = Scheduler()
+    view = Recorder()
+
+    async def failing(start, stop, step):
+        raise RuntimeError("failing view")
+
+    scheduler.expect("failing", failing, TimeInterval())
+    scheduler.expect("view", view.fetch, TimeInterval())
+    await asyncio.gather(*scheduler.tick())
+
+    # one failing view does not prevent others to get their data
+    assert view.calls == [(None, None, None)]
+    assert not scheduler.expecting("failing")
+
+
+@pytest.mark.asyncio
+async def test_poll():
+    scheduler = Scheduler()
+    view = Recorder()
+    expectations = Expectations(key="view", fetch=view.fetch, scheduler=scheduler)
+    expectations.poll()
+
+    await scheduler.run(mini_sleep=timedelta(milliseconds=10))
+    assert view.calls == [(None, None, None)]
+
+    # running again does not start another loop
+    task = scheduler.task
+    await scheduler.run(mini_sleep=timedelta(milliseconds=10))
+    assert scheduler.task is task
+
+    await asyncio.sleep(0.1)
+    scheduler.stop()
+    assert len(view.calls) > 2
+    assert set(view.calls) == {(None, None, None)}
+
+
+@pytest.mark.asyncio
+async def test_run_while_looping():
+    scheduler = Scheduler()
+    view = Recorder()
+    await scheduler.run(mini_sleep=timedelta(hours=1))
+
+    # expectations are retrieved when running again, without waiting for the next tick
+    tint = TimeInterval(
+        start=start_time, stop=start_time + timedelta(hours=1), step=minutely
+    )
+    scheduler.expect("view", view.fetch, tint)
+    await scheduler.run(mini_sleep=timedelta(hours=1))
+    assert view.calls == [(tint.start, tint.stop, minutely)]
+
+    # dispatched tasks are kept until they are done
+    scheduler.expect("view", view.fetch, TimeInterval())
+    tasks = scheduler.tick()
+    assert scheduler.dispatched == set(tasks)
+    await asyncio.gather(*tasks)
+    assert scheduler.dispatched == set()
+    scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_ohlcview_expectations(monkeypatch):
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="SCHEDBNB")
+    monkeypatch.setattr(ohlcv.expectations, "scheduler", Scheduler())
+
+    # multiple plots expecting overlapping ranges of the same candles
+    ohlcv.expectations.put_nowait(
+        TimeInterval(
+            start=start_time, stop=start_time + timedelta(hours=12), step=minutely
+        )
+    )
+    ohlcv.expectations.put_nowait(
+        TimeInterval(
+            start=start_time + timedelta(hours=6),
+            stop=start_time + timedelta(hours=18),
+            step=minutely,
+        ),
+        priority=VISIBLE,
+    )
+    await asyncio.gather(*ohlcv.expectations.scheduler.tick())
+
+    # are retrieved together, in as few pages as possible
+    assert len(api.calls) == 2
+    assert api.calls[0][0] == to_ms(start_time)
+    assert api.calls[-1][1] == to_ms(start_time + timedelta(hours=18))
+    assert len(ohlcv[minutely]) == 18 * 60 + 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from result import Ok
+
+from aiobinance.api.market import Market
+from aiobinance.api.model.fixedpoint import FixedPoint
+from aiobinance.api.model.market_info import MarketInfo
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep
+from aiobinance.api.model.tradeframe import TradeFrame
+from aiobinance.api.ohlcview import OHLCView
+from aiobinance.api.tradesview import TradesView
+from tests.api.test_backfill import KlinesAPI
+
+pytest.importorskip("pyarrow")
+
+from aiobinance.api.model.timeinterval import from_ms, to_ms  # noqa: E402
+from aiobinance.api.store import CandleStore, TradeStore  # noqa: E402
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+
+
+@pytest.mark.asyncio
+async def test_candlestore(tmp_path):
+    store = CandleStore(path=str(tmp_path))
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(hours=1)
+
+    assert store.gaps("COTIBNB", minutely, start_time, stop_time) == [
+        (start_time, stop_time)
+    ]
+
+    api = KlinesAPI()
+    rows = (
+        await api.call_api(
+            "klines", "COTIBNB", "1m", to_ms(start_time), to_ms(stop_time), 1000
+        )
+    ).ok()
+    frame = OHLCFrame.from_klines(rows)
+    store.append("COTIBNB", minutely, start_time, stop_time, frame)
+
+    assert store.load("COTIBNB", minutely, start_time, stop_time) == frame
+    assert (
+        store.load("COTIBNB", minutely, start_time, stop_time - timedelta(minutes=1))
+        == frame[start_time : stop_time - timedelta(minutes=1)]
+    )
+
+    # only the range after the stored one is missing
+    later = stop_time + timedelta(hours=1)
+    assert store.gaps("COTIBNB", minutely, start_time, later) == [
+        (stop_time + timedelta(milliseconds=1), later)
+    ]
+
+    # a range without candles is stored as well
+    store.append("COTIBNB", minutely, later, later + timedelta(hours=1), OHLCFrame())
+    assert store.gaps("COTIBNB", minutely, later, later + timedelta(hours=1)) == []
+    assert store.load("COTIBNB", minutely, later, later + timedelta(hours=1)).empty
+
+
+def test_candlestore_open_candle(tmp_path):
+    store = CandleStore(path=str(tmp_path))
+    now = datetime(2020, 8, 27, 12, 0, 30, tzinfo=timezone.utc)
+    start_time = now - timedelta(hours=1)
+
+    store.append("COTIBNB", minutely, start_time, now, OHLCFrame(), now=now)
+
+    # the candle still open at that time is not considered stored
+    assert store.gaps("COTIBNB", minutely, start_time, now) == [
+        (now - timedelta(minutes=1) + timedelta(milliseconds=1), now)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ohlcview_store(tmp_path, monkeypatch):
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=1)
+
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="STOREBNB")
+    monkeypatch.setattr(ohlcv, "store", CandleStore(path=str(tmp_path)))
+
+    frame = await ohlcv.at(minutely, start_time=start_time, stop_time=stop_time)
+    assert len(frame) == 24 * 60 + 1
+    assert len(api.calls) == 2
+
+    # after a restart, the candles are read from disk
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="STOREBNB")
+    assert minutely not in ohlcv
+
+    restored = await ohlcv.at(minutely, start_time=start_time, stop_time=stop_time)
+    assert restored == frame
+    assert api.calls == []
+
+    # and only the missing range is requested
+    await ohlcv.at(
+        minutely, start_time=start_time, stop_time=stop_time + timedelta(hours=1)
+    )
+    assert api.calls == [(to_ms(stop_time) + 1, to_ms(stop_time + timedelta(hours=1)))]
+
+
+def market_info(symbol: str) -> MarketInfo:
+    return MarketInfo(
+        symbol=symbol,
+        status="TRADING",
+        base_asset="COTI",
+        base_asset_precision=8,
+        quote_asset="BNB",
+        quote_precision=8,
+        quote_asset_precision=8,
+        base_commission_precision=8,
+        quote_commission_precision=8,
+        order_types=["LIMIT", "MARKET"],
+        iceberg_allowed=True,
+        oco_allowed=True,
+        is_spot_trading_allowed=True,
+        is_margin_trading_allowed=False,
+        quote_order_qty_market_allowed=True,
+        filters=[],
+        permissions=["SPOT"],
+    )
+
+
+@pytest.mark.asyncio
+async def test_market_store(tmp_path):
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(hours=6)
+    info = market_info("MARKETSTOREBNB")
+
+    market = Market(
+        api=KlinesAPI(), info=info, cache_dir=str(tmp_path), fixed_point=True
+    )
+    frame = await market.price.at(minutely, start_time=start_time, stop_time=stop_time)
+
+    # the market of another process, like the web server, reads candles from disk
+    api = KlinesAPI()
+    market = Market(api=api, info=info, cache_dir=str(tmp_path), fixed_point=True)
+    restored = await market.price.at(
+        minutely, start_time=start_time, stop_time=stop_time
+    )
+    assert restored == frame
+    assert restored.precision == FixedPoint.for_candles(info)
+    assert api.calls == []
+    assert isinstance(market.trades.store, TradeStore)
+
+
+class MyTradesAPI:
+    """ Serves myTrades pages by id, like binance would, from a list of trades """
+
+    def __init__(self, count: int):
+        self.calls = []
+        start_ms = to_ms(datetime(2020, 8, 27, tzinfo=timezone.utc))
+        self.trades = [
+            {
+                "symbol": "COTIBNB",
+                "id": 1000 + i,
+                "orderId": 5000 + i,
+                "orderListId": -1,
+                "price": "0.00326100",
+                "qty": "300.00000000",
+                "quoteQty": "0.97830000",
+                "commission": "0.00066035",
+                "commissionAsset": "BNB",
+                "time": start_ms + i * 60_000,
+                "isBuyer": False,
+                "isMaker": True,
+                "isBestMatch": True,
+            }
+            for i in range(count)
+        ]
+
+    async def call_api(self, command, symbol, fromId, limit):
+        assert command == "myTrades"
+        self.calls.append(fromId)
+        return Ok([t for t in self.trades if t["id"] >= fromId][:limit])
+
+
+def test_tradestore(tmp_path):
+    store = TradeStore(path=str(tmp_path))
+    assert store.state("COTIBNB") == (None, None, None)
+    assert store.load("COTIBNB").empty
+
+    rows = MyTradesAPI(count=10).trades
+    end = datetime(2020, 8, 28, tzinfo=timezone.utc)
+    store.append("COTIBNB", rows[:5])
+    store.append("COTIBNB", rows[5:], end=end)
+
+    # all trades are known, from the first one
+    assert store.state("COTIBNB") == (1009, from_ms(rows[0]["time"]), end)
+    assert store.load("COTIBNB") == TradeFrame.from_mytrades("COTIBNB", rows)
+
+    # no new trade
+    store.append("COTIBNB", [], end=end + timedelta(days=1))
+    assert store.state("COTIBNB") == (
+        1009,
+        from_ms(rows[0]["time"]),
+        end + timedelta(days=1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_tradesview_store(tmp_path, monkeypatch):
+    api = MyTradesAPI(count=25)
+    trades = TradesView(api=api, symbol="STOREBNB")
+    monkeypatch.setattr(trades, "store", TradeStore(path=str(tmp_path)))
+    monkeypatch.setattr(trades, "limit", 10)
+
+    await trades.sync()
+    assert len(trades.frame) == 25
+    assert api.calls == [0, 1010, 1020]
+    assert trades.last_id == 1024
+
+    # after a restart, only trades after the last one stored are requested
+    api = MyTradesAPI(count=30)
+    trades = TradesView(api=api, symbol="STOREBNB")
+    assert trades.frame.empty
+
+    frame = await trades.at()
+    assert len(frame) == 30
+    assert api.calls == [1025]
+
+    # a time range already known is not requested again
+    await trades.at(
+        start_time=datetime(2020, 8, 27, tzinfo=timezone.utc),
+        stop_time=datetime(2020, 8, 28, tzinfo=timezone.utc),
+    )
+    assert api.calls == [1025]
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
@@ -0,0 +1,213 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep, to_ms
+from aiobinance.api.ohlcview import OHLCView
+from tests.api.test_backfill import KlinesAPI
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+
+
+def kline_event(open_time: datetime, close: str, closed: bool = False) -> dict:
+    """ a binance kline event, as pushed in the websocket """
+    return {
+        "e": "kline",
+        "E": to_ms(open_time) + 30_000,
+        "s": "COTIBNB",
+        "k": {
+            "t": to_ms(open_time),
+            "T": to_ms(open_time) + 59_999,
+            "s": "COTIBNB",
+            "i": "1m",
+            "f": 100,
+            "L": 200,
+            "o": "0.00320100",
+            "c": close,
+            "h": max("0.00322600", close),
+            "l": "0.00320100",
+            "v": "7705.00000000",
+            "n": 100,
+            "x": closed,
+            "q": "24.66804700",
+            "V": "500.00000000",
+            "Q": "1.60000000",
+            "B": "0",
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_apply_kline():
+    api = KlinesAPI()
+    ohlcv = OHLCView(api=api, symbol="STREAMBNB")
+    await ohlcv.at(
+        minutely, start_time=start_time, stop_time=start_time + timedelta(hours=1)
+    )
+    assert len(ohlcv[minutely]) == 61
+    last = ohlcv[minutely].df.index[-1].to_pydatetime().replace(tzinfo=timezone.utc)
+
+    updates = []
+    ohlcv.update_hook(minutely, updates.append)
+
+    # the last candle is replaced
+    candle = ohlcv.apply_kline(minutely, kline_event(last, "0.00400000")["k"])
+    buffer = ohlcv[minutely].buffer
+    assert buffer is not None
+    assert len(ohlcv[minutely]) == 61
+    assert ohlcv[minutely].close == Decimal("0.00400000")
+    assert updates == [candle]
+    assert len(candle) == 1
+
+    # the next candle is appended
+    candle = ohlcv.apply_kline(
+        minutely, kline_event(last + timedelta(minutes=1), "0.00410000")["k"]
+    )
+    assert len(ohlcv[minutely]) == 62
+    assert ohlcv[minutely].close == Decimal("0.00410000")
+    assert ohlcv[minutely].close_time == last + timedelta(minutes=2) - timedelta(
+        milliseconds=1
+    )
+    assert updates[-1] == candle
+    assert len(updates) == 2
+    # in place, without copying the previous candles
+    assert ohlcv[minutely].buffer is buffer
+
+    # candles in the middle are merged as usual
+    ohlcv.apply_kline(minutely, kline_event(start_time, "0.00300000")["k"])
+    assert len(ohlcv[minutely]) == 62
+    assert ohlcv[minutely][start_time].close == Decimal("0.00300000")
+
+
+def test_apply_kline_empty():
+    ohlcv = OHLCView(api=KlinesAPI(), symbol="STREAMEMPTYBNB")
+
+    candle = ohlcv.apply_kline(minutely, kline_event(start_time, "0.00400000")["k"])
+    assert ohlcv[minutely] == candle
+    assert candle.open_time == start_time
+
+
+@pytest.mark.asyncio
+@pytest.mark.block_network(allowed_hosts=["127.0.0.1"])
+async def test_kline_stream():
+    pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    from aiobinance.api.stream import KlineStream
+
+    events = [
+        kline_event(start_time, "0.00321000"),
+        kline_event(start_time, "0.00322000", closed=True),
+        {"result": None, "id": 1},  # not a kline event
+        "not json",
+        {"e": "kline", "k": {"t": "not a time"}},  # a malformed kline
+        # the stream goes on after messages that cannot be applied
+        kline_event(start_time + timedelta(minutes=1), "0.00323000"),
+    ]
+    paths = []
+
+    async def stream(request):
+        # a stand-in for binance websocket stream
+        paths.append(request.path)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for e in events:
+            await ws.send_str(e if isinstance(e, str) else json.dumps(e))
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws/{stream}", stream)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+
+    ohlcv = OHLCView(api=KlinesAPI(), symbol="COTIBNB")
+    updates = []
+    received = asyncio.Event()
+
+    def hook(candle: OHLCFrame):
+        updates.append(candle)
+        if len(updates) == 3:
+            received.set()
+
+    ohlcv.update_hook(minutely, hook)
+
+    kstream = KlineStream(
+        ohlcv,
+        minutely,
+        url=str(server.make_url("/ws")),
+        reconnect=timedelta(seconds=10),
+    )
+    task = asyncio.get_running_loop().create_task(kstream.run())
+    try:
+        await asyncio.wait_for(received.wait(), timeout=5)
+    finally:
+        task.cancel()
+        await server.close()
+
+    assert paths == ["/ws/cotibnb@kline_1m"]
+    assert [u.close for u in updates] == [
+        Decimal("0.00321000"),
+        Decimal("0.00322000"),
+        Decimal("0.00323000"),
+    ]
+    assert len(ohlcv[minutely]) == 2
+    assert ohlcv[minutely][start_time].close == Decimal("0.00322000")
+
+
+@pytest.mark.asyncio
+@pytest.mark.block_network(allowed_hosts=["127.0.0.1"])
+async def test_kline_stream_timeout():
+    pytest.importorskip("aiohttp")
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    from aiobinance.api.stream import KlineStream
+
+    connected = []
+
+    async def stream(request):
+        connected.append(request.path)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if len(connected) > 1:  # the first connection stays silent
+            await ws.send_str(json.dumps(kline_event(start_time, "0.00321000")))
+        await ws.receive()  # until the client closes
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws/{stream}", stream)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+
+    ohlcv = OHLCView(api=KlinesAPI(), symbol="STREAMTIMEOUTBNB")
+    received = asyncio.Event()
+    ohlcv.update_hook(minutely, lambda candle: received.set())
+
+    kstream = KlineStream(
+        ohlcv,
+        minutely,
+        url=str(server.make_url("/ws")),
+        reconnect=timedelta(milliseconds=10),
+        timeout=timedelta(milliseconds=200),
+    )
+    task = asyncio.get_running_loop().create_task(kstream.run())
+    try:
+        # the stream connects again, instead of waiting forever
+        await asyncio.wait_for(received.wait(), timeout=5)
+    finally:
+        task.cancel()
+        await server.close()
+
+    assert len(connected) == 2
+    assert ohlcv[minutely].close == Decimal("0.00321000")
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
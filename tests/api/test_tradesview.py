@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
+import numpy as np
 import pytest
+from result import Ok
 
 from aiobinance.api.exchange import Exchange
 from aiobinance.api.model.trade import Trade
@@ -21,7 +23,7 @@ async def test_trades_from_binance(keyfile):
 
     api = Binance(credentials=keyfile)  # we need private requests here !
 
-    exchange = Exchange(api=api)
+    exchange = Exchange(api=api, fixed_point=True)
 
     await exchange()  # to retrieve data
 
@@ -33,6 +35,8 @@ async def test_trades_from_binance(keyfile):
     await trades.at(start_time=start_time, stop_time=end_time)
 
     assert len(trades) == 17
+    # trades are stored exactly as int64, with the market precision
+    assert trades.frame.df.price.dtype == np.dtype("int64")
     for t in trades:
         assert isinstance(t, Trade)
 
@@ -65,6 +69,64 @@ async def test_trades_from_binance(keyfile):
     assert first.quote_qty == Decimal("0.97830000")
 
 
+class WindowedTradesAPI:
+    """ Serves myTrades by time window, like binance would, with one trade per hour """
+
+    def __init__(self):
+        self.calls = []
+
+    async def call_api(self, command, symbol, startTime, endTime, limit):
+        assert command == "myTrades"
+        assert endTime - startTime <= 24 * 3_600_000
+        self.calls.append((startTime, endTime))
+        hour = 3_600_000
+        return Ok(
+            [
+                {
+                    "symbol": symbol,
+                    "id": t // hour,
+                    "orderId": t // hour,
+                    "orderListId": -1,
+                    "price": "0.00326100",
+                    "qty": "300.00000000",
+                    "quoteQty": "0.97830000",
+                    "commission": "0.00066035",
+                    "commissionAsset": "BNB",
+                    "time": t,
+                    "isBuyer": False,
+                    "isMaker": True,
+                    "isBestMatch": True,
+                }
+                for t in range(startTime + (-startTime % hour), endTime + 1, hour)
+            ][:limit]
+        )
+
+
+@pytest.mark.asyncio
+async def test_at_coverage(monkeypatch):
+    start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    stop_time = start_time + timedelta(days=2)
+
+    api = WindowedTradesAPI()
+    trades = TradesView(api=api, symbol="COVERBNB")
+
+    await trades.at(start_time=start_time, stop_time=stop_time)
+    # in 24h windows
+    assert len(api.calls) == 2
+    assert len(trades.frame) == 49
+
+    # a time range already requested is not requested again
+    await trades.at(start_time=start_time + timedelta(hours=5), stop_time=stop_time)
+    assert len(api.calls) == 2
+
+    # when a page is full, the next request starts from the last trade received
+    monkeypatch.setattr(trades, "limit", 10)
+    await trades.at(start_time=stop_time, stop_time=stop_time + timedelta(hours=12))
+    assert len(api.calls) == 4
+    assert len(trades.frame) == 49 + 12
+    assert (stop_time, stop_time + timedelta(hours=12)) in trades.coverage
+
+
 if __name__ == "__main__":
     pytest.main(["-s", __file__, "--block-network"])
     # record run
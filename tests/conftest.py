@@ -72,4 +72,15 @@ def clirunner():
     yield cli_runner
 
 
+@pytest.fixture(autouse=True)
+def requests_transport(request, monkeypatch):
+    """Cassettes have been recorded with requests, and vcrpy cannot replay them via aiohttp.
+    So for cassette tests only, we force the (async) api calls to go through the requests fallback transport.
+    """
+    if request.node.get_closest_marker("vcr") is not None:
+        import aiobinance.api.rawapi
+
+        monkeypatch.setattr(aiobinance.api.rawapi, "aiohttp", None)
+
+
 # TODO : disable rate limiter when testing with replay...
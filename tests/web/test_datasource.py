@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from bokeh.document import Document
+from bokeh.models import ColumnDataSource
+
+from aiobinance.api.model.ohlcframe import OHLCFrame
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep, to_ms
+from aiobinance.api.model.tradeframe import TradeFrame
+from aiobinance.api.ohlcview import OHLCView
+from aiobinance.api.tradesview import TradesView
+from aiobinance.web.layouts.plots.datasource import SourceUpdater
+from aiobinance.web.layouts.plots.ohlcstep import OHLCStepPlots
+from aiobinance.web.layouts.plots.tradespnl import TradesPnL
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+
+
+def klines(start: datetime, count: int, close: str = "1.5") -> OHLCFrame:
+    """ count 1m candles from start, as retrieved from binance """
+    first = to_ms(start)
+    return OHLCFrame.from_klines(
+        [
+            [ot, "1.0", "2.0", "0.5", close, "10.0", ot + 59_999]
+            + ["15.0", 3, "5.0", "7.5", "0"]
+            for ot in range(first, first + count * 60_000, 60_000)
+        ]
+    )
+
+
+def displayed(frame: OHLCFrame):
+    """ the datasource of frame in a document, and the changes sent to the browser """
+    source = frame.as_datasource()
+    doc = Document()
+    doc.add_root(source)
+    events = []
+    doc.on_change(events.append)
+    return source, events
+
+
+def test_patch_and_stream():
+    start = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    source, events = displayed(klines(start, 10))
+    updater = SourceUpdater(source, key="open_time", rollover=12)
+
+    # the last candle changed, and 3 candles are new
+    update = klines(start + timedelta(minutes=9), 4, close="1.9")
+    updater.update(update.as_datasource().data)
+
+    assert [e.hint.__class__.__name__ for e in events] == [
+        "ColumnsPatchedEvent",
+        "ColumnsStreamedEvent",
+    ]
+    # only the changed rows are sent
+    patched, streamed = events[0].hint, events[1].hint
+    assert [s for s, _ in patched.patches["close"]] == [slice(9, 10)]
+    assert len(streamed.data["close"]) == 3
+    assert streamed.rollover == 12
+
+    # older rows were rolled over
+    assert len(source.data["open_time"]) == 12
+    assert np.array_equal(source.data["open_time"], updater.keys)
+    assert list(source.data["close"][-5:]) == [Decimal("1.5")] + [Decimal("1.9")] * 4
+
+
+def test_older_rows():
+    start = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    source, events = displayed(klines(start, 10))
+    updater = SourceUpdater(source, key="open_time")
+
+    # rows before the first one cannot be streamed
+    updater.update(
+        klines(start - timedelta(minutes=5), 6, close="1.1").as_datasource().data
+    )
+
+    assert len(source.data["open_time"]) == 15
+    assert np.array_equal(source.data["open_time"], updater.keys)
+    assert (np.diff(updater.keys) > np.timedelta64(0)).all()
+    assert list(source.data["close"][:7]) == [Decimal("1.1")] * 6 + [Decimal("1.5")]
+    # the whole source was sent again
+    assert [e.hint.__class__.__name__ for e in events] == ["ColumnDataChangedEvent"]
+
+
+def mytrades(ids) -> TradeFrame:
+    """ trades of the given ids, one per minute, as retrieved from binance """
+    start_ms = to_ms(datetime(2020, 8, 27, tzinfo=timezone.utc))
+    return TradeFrame.from_mytrades(
+        "OVERLAYBNB",
+        [
+            {
+                "symbol": "OVERLAYBNB",
+                "id": i,
+                "orderId": 5000 + i,
+                "orderListId": -1,
+                "price": "1.5",
+                "qty": "10.0",
+                "quoteQty": "15.0",
+                "commission": "0.01",
+                "commissionAsset": "BNB",
+                "time": start_ms + (i - 1000) * 60_000,
+                "isBuyer": i % 2 == 0,
+                "isMaker": True,
+                "isBestMatch": True,
+            }
+            for i in ids
+        ],
+    )
+
+
+def test_ohlcstep_trades():
+    start = datetime(2020, 8, 27, tzinfo=timezone.utc)
+    ohlcv = OHLCView(api=None, symbol="OVERLAYBNB")
+    ohlcv(frame=klines(start, 10))
+    # a trade in the middle is not known yet
+    trades = TradesView(api=None, symbol="OVERLAYBNB", frame=mytrades([1000, 1002]))
+    plots = OHLCStepPlots(
+        document=Document(), ohlcv=ohlcv, trades=trades, selected_tf=minutely
+    )
+    assert list(plots.tradesource.data["trade_id"]) == [1000, 1002]
+
+    # new trades are streamed
+    trades(frame=mytrades([1003]))
+    plots._bokeh_update(OHLCFrame())
+    assert list(plots.tradesource.data["trade_id"]) == [1000, 1002, 1003]
+
+    # a backfilled trade is displayed, with the cumulated values after it
+    trades(frame=mytrades([1001]))
+    plots._bokeh_update(OHLCFrame())
+    assert list(plots.tradesource.data["trade_id"]) == [1000, 1001, 1002, 1003]
+    assert np.array_equal(
+        plots.tradesource.data["cumvalue"],
+        trades.frame.as_datasource().data["cumvalue"],
+    )
+
+
+def test_tradespnl_update():
+    trades = TradesView(api=None, symbol="OVERLAYBNB", frame=mytrades([1000, 1002]))
+    pnl = TradesPnL(document=Document(), trades=trades)
+    plotted = pnl.plotdata["cumvalue"]
+
+    # new trades are appended, the cumulated value goes on from the last one
+    trades(frame=mytrades([1003, 1004]))
+    pnl._bokeh_update(trades.frame)
+    assert list(pnl.plotdata["trade_id"]) == [1000, 1002, 1003, 1004]
+    assert np.array_equal(pnl.plotdata["cumvalue"][:2], plotted)
+    assert np.array_equal(
+        pnl.plotdata["cumvalue"], trades.frame.as_datasource().data["cumvalue"]
+    )
+
+    # a backfilled trade changes the cumulated values after it
+    trades(frame=mytrades([1001]))
+    pnl._bokeh_update(trades.frame)
+    assert list(pnl.plotdata["trade_id"]) == [1000, 1001, 1002, 1003, 1004]
+    assert np.array_equal(
+        pnl.plotdata["cumvalue"], trades.frame.as_datasource().data["cumvalue"]
+    )
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])
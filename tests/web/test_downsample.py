@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from bokeh.document import Document
+
+from aiobinance.api.model.timeinterval import TimeIntervalDelta, TimeStep, to_ms
+from aiobinance.api.ohlcview import OHLCView
+from aiobinance.web.layouts.plots.downsample import candle_step, envelope
+from aiobinance.web.layouts.plots.ohlcstep import OHLCStepPlots
+from tests.api.test_backfill import KlinesAPI
+
+minutely = TimeStep(TimeIntervalDelta.minutely)
+start_time = datetime(2020, 8, 27, tzinfo=timezone.utc)
+
+
+def test_envelope():
+    rng = np.random.default_rng(42)
+    x = np.arange(100_000)
+    y = np.cumsum(rng.normal(size=len(x)))
+
+    positions = envelope(x, y, 10_000, 60_000, width=100)
+
+    # at most 4 points per pixel, and one point on each side
+    assert len(positions) <= 4 * 102
+    assert (np.diff(positions) > 0).all()
+    assert positions[0] == 9_999 and positions[-1] == 60_001
+    # the line reaches the same extremes
+    visible = slice(10_000, 60_001)
+    assert y[positions].min() == y[visible].min()
+    assert y[positions].max() == y[visible].max()
+
+    # in each pixel column as well
+    for p in range(100):
+        column = slice(10_000 + p * 500, 10_000 + (p + 1) * 500)
+        kept = positions[(positions >= column.start) & (positions < column.stop)]
+        assert y[kept].max() == y[column].max()
+        assert y[kept].min() == y[column].min()
+
+
+def test_envelope_few_points():
+    x = np.arange(
+        np.datetime64("2020-08-27"), np.datetime64("2020-08-28"), np.timedelta64(1, "h")
+    )
+    # all points are kept when there are less than 4 per pixel
+    positions = envelope(
+        x,
+        np.ones(len(x)),
+        np.datetime64("2020-08-27T05"),
+        np.datetime64("2020-08-27T10"),
+        10,
+    )
+    assert list(positions) == list(range(4, 12))
+
+
+def test_candle_step():
+    # 120 candles on 600 pixels are wide enough
+    assert candle_step(minutely, timedelta(hours=2), 600, 3) is None
+    # a day of 1m candles : 15m candles are the finest fitting in 200 candles
+    assert candle_step(minutely, timedelta(days=1), 600, 3) == TimeStep(
+        TimeIntervalDelta.minutely_15
+    )
+    # only steps that can be built from 3m candles
+    assert candle_step(
+        TimeStep(TimeIntervalDelta.minutely_3), timedelta(hours=20), 600, 3
+    ) == TimeStep(TimeIntervalDelta.minutely_15)
+    # years of candles are shown weekly
+    assert candle_step(minutely, timedelta(weeks=520), 600, 3) == TimeStep(
+        TimeIntervalDelta.weekly
+    )
+
+
+@pytest.mark.asyncio
+async def test_ohlcstep_downsample():
+    ohlcv = OHLCView(api=KlinesAPI(), symbol="DOWNSAMPLEBNB")
+    await ohlcv.at(
+        minutely, start_time=start_time, stop_time=start_time + timedelta(days=3)
+    )
+    plots = OHLCStepPlots(document=Document(), ohlcv=ohlcv, selected_tf=minutely)
+    assert plots.shown_step == minutely
+
+    # zooming out on the second day
+    plots.fig.x_range.end = to_ms(start_time + timedelta(days=2))
+    # Note : this calls on_xrange_start_changed, as the browser would
+    plots.fig.x_range.start = to_ms(start_time + timedelta(days=1))
+
+    step = TimeStep(TimeIntervalDelta.minutely_15)
+    assert plots.shown_step == step
+    # three times the visible day, in 15m candles, until the one at the end of the window
+    assert len(plots.datasource.data["open_time"]) == 3 * 96 + 1
+    assert plots.upbar.glyph.width == step.delta.value.total_seconds() * 1000  # in ms
+    assert (
+        plots.datasource.data["volume"][0]
+        == 15 * ohlcv[minutely].df.volume.to_numpy()[0]
+    )
+
+    # panning a little does not send anything
+    data = plots.datasource.data
+    plots.fig.x_range.end = to_ms(start_time + timedelta(days=2, hours=1))
+    plots.fig.x_range.start = to_ms(start_time + timedelta(days=1, hours=1))
+    assert plots.datasource.data is data
+
+    # zooming in again shows 1m candles around the visible ones
+    plots.fig.x_range.end = to_ms(start_time + timedelta(days=1, hours=2))
+    plots.fig.x_range.start = to_ms(start_time + timedelta(days=1))
+    assert plots.shown_step == minutely
+    assert len(plots.datasource.data["open_time"]) == 3 * 120 + 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-s", __file__, "--block-network"])